@@ -0,0 +1,102 @@
+"""
+Подбор параметров Argon2 под бюджет задержки: python -m app.calibrate_argon2 --budget-ms 250
+
+Запускать на том же железе, где работает auth_service. При фиксированной
+памяти увеличивается time_cost, пока медианное время хеширования укладывается
+в бюджет; если не укладывается даже time_cost=1, память уменьшается вдвое.
+Выбранный профиль записывается в env-файл (ARGON2_*), который читают настройки.
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from argon2 import PasswordHasher
+
+MIN_MEMORY_KIB = 19 * 1024
+MAX_TIME_COST = 20
+SAMPLE_PASSWORD = "calibration-password-0123456789"
+
+
+def measure(time_cost: int, memory_kib: int, parallelism: int, samples: int) -> float:
+	"""Медианное время одного хеша в миллисекундах."""
+	hasher = PasswordHasher(time_cost=time_cost, memory_cost=memory_kib, parallelism=parallelism)
+	timings = []
+	for _ in range(samples):
+		started = time.perf_counter()
+		hasher.hash(SAMPLE_PASSWORD)
+		timings.append((time.perf_counter() - started) * 1000)
+	return statistics.median(timings)
+
+
+def calibrate(
+	*, budget_ms: float, memory_kib: int, parallelism: int, samples: int
+) -> tuple[int, int, float]:
+	"""Возвращает (time_cost, memory_cost KiB, измеренное время мс)."""
+	while True:
+		best: tuple[int, float] | None = None
+		for time_cost in range(1, MAX_TIME_COST + 1):
+			elapsed = measure(time_cost, memory_kib, parallelism, samples)
+			print(
+				f"t={time_cost} m={memory_kib // 1024}MiB p={parallelism}: {elapsed:.1f} ms",
+				file=sys.stderr,
+				flush=True,
+			)
+			if elapsed > budget_ms:
+				break
+			best = (time_cost, elapsed)
+		if best is not None:
+			return best[0], memory_kib, best[1]
+		if memory_kib // 2 < MIN_MEMORY_KIB:
+			# Бюджет недостижим без ослабления ниже минимума — берём самый дешёвый профиль
+			return 1, memory_kib, measure(1, memory_kib, parallelism, samples)
+		memory_kib //= 2
+
+
+def write_env(path: Path, values: dict[str, str]) -> None:
+	"""Обновляет ключи в env-файле, остальные строки оставляет как есть."""
+	lines = path.read_text(encoding="utf-8").splitlines() if path.exists() else []
+	pending = dict(values)
+	for index, line in enumerate(lines):
+		key = line.split("=", 1)[0].strip()
+		if key in pending:
+			lines[index] = f"{key}={pending.pop(key)}"
+	lines.extend(f"{key}={value}" for key, value in pending.items())
+	path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def main(argv: list[str] | None = None) -> int:
+	parser = argparse.ArgumentParser(description="Benchmark Argon2 cost parameters against a latency budget")
+	parser.add_argument("--budget-ms", type=float, default=250.0, help="target time per hash")
+	parser.add_argument("--memory-mib", type=int, default=64, help="starting memory cost")
+	parser.add_argument("--parallelism", type=int, default=2)
+	parser.add_argument("--samples", type=int, default=5)
+	parser.add_argument("--env-file", type=Path, default=Path(".env"))
+	parser.add_argument("--dry-run", action="store_true", help="print the profile without writing it")
+	args = parser.parse_args(argv)
+
+	time_cost, memory_kib, elapsed = calibrate(
+		budget_ms=args.budget_ms,
+		memory_kib=max(args.memory_mib * 1024, MIN_MEMORY_KIB),
+		parallelism=args.parallelism,
+		samples=args.samples,
+	)
+	profile = {
+		"ARGON2_TIME_COST": str(time_cost),
+		"ARGON2_MEMORY_COST": str(memory_kib),
+		"ARGON2_PARALLELISM": str(args.parallelism),
+	}
+	for key, value in profile.items():
+		print(f"{key}={value}")
+	print(f"# {elapsed:.1f} ms per hash (budget {args.budget_ms:.0f} ms)", file=sys.stderr)
+	if not args.dry_run:
+		write_env(args.env_file, profile)
+		print(f"Written to {args.env_file}", file=sys.stderr)
+	return 0
+
+
+if __name__ == "__main__":
+	raise SystemExit(main())
@@ -1,13 +1,60 @@
+from typing import Literal
+
 from common import BaseServiceSettings, make_get_settings
 
 
 class Settings(BaseServiceSettings):
 	app_name: str = "Auth Service"
+	# Подпись refresh-токенов (и access-токенов, если не задан jwt_signing_keys_dir)
+	jwt_secret: str
 	access_token_expire_minutes: int = 15
 	refresh_token_expire_days: int = 30
 	auth_internal_token: str | None = None
 	kafka_broker_url: str | None = None
 
+	# Каталог PEM-ключей ES256 для access-токенов (см. app/signing_keys.py); None — HS256 с jwt_secret
+	jwt_signing_keys_dir: str | None = None
+	jwt_signing_keys_reload_seconds: float = 60.0
+	# Сколько новый ключ только публикуется в JWKS, прежде чем начать подписывать;
+	# None — jwt_signing_keys_reload_seconds + jwt_jwks_refresh_seconds
+	jwt_signing_key_activation_seconds: float | None = None
+
+	# Argon2 в пуле потоков: число потоков и сколько задач может ждать в очереди (дальше — 503)
+	password_hash_workers: int = 4
+	password_hash_max_queue: int = 32
+
+	# Профиль Argon2 (python -m app.calibrate_argon2); None — значения библиотеки по умолчанию
+	argon2_time_cost: int | None = None
+	argon2_memory_cost: int | None = None
+	argon2_parallelism: int | None = None
+
+	# Кэш профилей для get_current_user и /refresh (0 — без кэша)
+	user_cache_ttl_seconds: float = 30.0
+	user_cache_max_entries: int = 10_000
+
+	# Очистка refresh_tokens на процессе-лидере
+	refresh_token_purge_interval_seconds: int = 3600
+	refresh_token_purge_chunk: int = 5000
+	refresh_token_revoked_retention_days: int = 7
+
+	# Пакетная запись refresh-токенов (token_writer): размер пачки, ожидание попутчиков,
+	# ждать ли fsync WAL при коммите пачки
+	refresh_token_write_batch: int = 500
+	refresh_token_write_linger_ms: float = 0.0
+	refresh_token_synchronous_commit: bool = False
+
+	# Ограничение попыток входа/регистрации: скользящие окна по IP и по логину/email
+	auth_throttle_enabled: bool = True
+	auth_throttle_store: Literal["memory", "postgres"] = "memory"  # postgres — общие счётчики для всех реплик
+	login_window_seconds: float = 300.0
+	login_ip_limit: int = 50
+	login_identifier_limit: int = 10
+	register_window_seconds: float = 3600.0
+	register_ip_limit: int = 10
+	register_identifier_limit: int = 3
+	throttle_lockout_base_seconds: float = 30.0
+	throttle_lockout_max_seconds: float = 3600.0
+
 
 get_settings = make_get_settings(Settings)
 
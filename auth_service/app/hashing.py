@@ -0,0 +1,89 @@
+"""
+Пул потоков для Argon2.
+
+argon2-cffi отпускает GIL на время вычисления хеша, поэтому потоков достаточно:
+хеширование идёт параллельно и не блокирует событийный цикл. Очередь ограничена —
+при переполнении запрос сразу отклоняется (503), а не копится в памяти.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from prometheus_client import Counter, Gauge, Histogram
+
+from .config import get_settings
+
+HASH_WAIT_SECONDS = Histogram(
+	"auth_password_hash_wait_seconds",
+	"Time a password hashing job waited for a free worker",
+	["operation"],
+	buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+HASH_DURATION_SECONDS = Histogram(
+	"auth_password_hash_duration_seconds",
+	"Time spent computing Argon2 hashes",
+	["operation"],
+	buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+HASH_REJECTED = Counter(
+	"auth_password_hash_rejected_total",
+	"Password hashing jobs rejected because the queue was full",
+	["operation"],
+)
+HASH_PENDING = Gauge(
+	"auth_password_hash_pending",
+	"Password hashing jobs running or waiting in the pool",
+)
+
+
+class PasswordHashPoolBusy(Exception):
+	pass
+
+
+class PasswordHashPool:
+	def __init__(self, *, workers: int, max_queue: int) -> None:
+		self._workers = max(workers, 1)
+		self._limit = self._workers + max(max_queue, 0)
+		self._pending = 0
+		self._executor: ThreadPoolExecutor | None = None
+
+	def _pool(self) -> ThreadPoolExecutor:
+		if self._executor is None:
+			self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="argon2")
+		return self._executor
+
+	async def run(self, operation: str, func: Callable[..., Any], *args: Any) -> Any:
+		if self._pending >= self._limit:
+			HASH_REJECTED.labels(operation).inc()
+			raise PasswordHashPoolBusy
+		submitted = time.perf_counter()
+
+		def timed() -> Any:
+			started = time.perf_counter()
+			HASH_WAIT_SECONDS.labels(operation).observe(started - submitted)
+			try:
+				return func(*args)
+			finally:
+				HASH_DURATION_SECONDS.labels(operation).observe(time.perf_counter() - started)
+
+		self._pending += 1
+		HASH_PENDING.set(self._pending)
+		try:
+			return await asyncio.get_running_loop().run_in_executor(self._pool(), timed)
+		finally:
+			self._pending -= 1
+			HASH_PENDING.set(self._pending)
+
+	def shutdown(self) -> None:
+		if self._executor is not None:
+			self._executor.shutdown(wait=False, cancel_futures=True)
+			self._executor = None
+
+
+password_hash_pool = PasswordHashPool(
+	workers=get_settings().password_hash_workers,
+	max_queue=get_settings().password_hash_max_queue,
+)
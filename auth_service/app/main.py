@@ -6,7 +6,10 @@ from common import configure_observability
 
 from .config import get_settings
 from .database import get_db, sync_engine
+from .hashing import password_hash_pool
 from .routers import auth_router
+from .token_purge import refresh_token_purger
+from .token_writer import refresh_token_writer
 
 
 settings = get_settings()
@@ -29,8 +32,17 @@ def apply_sql_migrations() -> None:
 
 
 @app.on_event("startup")
-def run_startup_tasks() -> None:
+async def run_startup_tasks() -> None:
 	apply_sql_migrations()
+	refresh_token_purger.start()
+	refresh_token_writer.start()
+
+
+@app.on_event("shutdown")
+async def stop_background_tasks() -> None:
+	await refresh_token_writer.stop()
+	await refresh_token_purger.stop()
+	password_hash_pool.shutdown()
 
 
 configure_observability(app, settings=settings, get_db=get_db)
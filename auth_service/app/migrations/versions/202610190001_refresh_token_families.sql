@@ -0,0 +1,7 @@
+-- Семейства refresh-токенов (цепочка ротаций от одного входа) и индексы под очистку
+ALTER TABLE refresh_tokens ADD COLUMN IF NOT EXISTS family_id UUID;
+UPDATE refresh_tokens SET family_id = token_id WHERE family_id IS NULL;
+ALTER TABLE refresh_tokens ALTER COLUMN family_id SET NOT NULL;
+
+CREATE INDEX IF NOT EXISTS ix_refresh_tokens_live_family_id ON refresh_tokens (family_id) WHERE NOT revoked;
+CREATE INDEX IF NOT EXISTS ix_refresh_tokens_revoked_at ON refresh_tokens (revoked_at) WHERE revoked;
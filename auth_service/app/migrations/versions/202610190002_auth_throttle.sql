@@ -0,0 +1,12 @@
+-- Общие для всех реплик счётчики ограничения входа/регистрации (AUTH_THROTTLE_STORE=postgres)
+CREATE UNLOGGED TABLE IF NOT EXISTS auth_throttle (
+	key TEXT PRIMARY KEY,
+	window_start DOUBLE PRECISION NOT NULL DEFAULT 0,
+	current_count INTEGER NOT NULL DEFAULT 0,
+	previous_count INTEGER NOT NULL DEFAULT 0,
+	strikes INTEGER NOT NULL DEFAULT 0,
+	locked_until DOUBLE PRECISION NOT NULL DEFAULT 0,
+	updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS ix_auth_throttle_updated_at ON auth_throttle (updated_at);
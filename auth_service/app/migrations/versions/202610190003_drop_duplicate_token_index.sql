@@ -0,0 +1,2 @@
+-- token_id уже покрыт уникальным индексом; частичный индекс по нему только удорожал запись
+DROP INDEX IF EXISTS ix_refresh_tokens_live_token_id;
@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 from uuid import UUID
 
-from sqlalchemy import Boolean, DateTime, Integer, String, UniqueConstraint, func
+from sqlalchemy import Boolean, DateTime, Index, Integer, String, UniqueConstraint, func, text
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -14,10 +14,14 @@ class RefreshToken(Base):
 	__tablename__ = "refresh_tokens"
 	__table_args__ = (
 		UniqueConstraint("token_hash", name="uq_refresh_tokens_token_hash"),
+		Index("ix_refresh_tokens_live_family_id", "family_id", postgresql_where=text("NOT revoked")),
+		Index("ix_refresh_tokens_revoked_at", "revoked_at", postgresql_where=text("revoked")),
 	)
 
 	id: Mapped[int] = mapped_column(Integer, primary_key=True)
 	token_id: Mapped[UUID] = mapped_column(PG_UUID(as_uuid=True), nullable=False, unique=True)
+	# Все токены, полученные ротацией от одного входа
+	family_id: Mapped[UUID] = mapped_column(PG_UUID(as_uuid=True), nullable=False)
 	user_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
 	token_hash: Mapped[str] = mapped_column(String(64), nullable=False)
 	expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
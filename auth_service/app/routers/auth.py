@@ -1,8 +1,8 @@
-from datetime import datetime, timezone
 import re
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import func, select
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, Response, status
+from sqlalchemy import any_, func, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..database import get_db
@@ -14,11 +14,18 @@ from ..security import (
 	create_refresh_token,
 	get_current_user,
 	get_password_hash,
+	password_needs_rehash,
+	rehash_password,
 	validate_refresh_token,
 	verify_password,
 )
+from ..signing_keys import signing_key_ring
+from ..throttling import auth_throttle, client_ip
+from ..user_cache import load_user
 
 USERNAME_ALLOWED_RE = re.compile(r"[^A-Za-z0-9_.-]+")
+USERNAME_CANDIDATES_PER_QUERY = 20
+USERNAME_ALLOCATION_ATTEMPTS = 5
 
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
@@ -38,52 +45,99 @@ def _sanitize_username(raw: str | None, email: str) -> str:
 	return base
 
 
-async def _ensure_unique_username(base: str, db: AsyncSession) -> str:
-	candidate = base
-	suffix = 1
-	while True:
-		stmt = select(User.id).where(func.lower(User.username) == candidate.lower())
-		exists = await db.scalar(stmt)
-		if not exists:
-			return candidate
-		suffix += 1
+def _username_candidates(base: str, start: int, count: int) -> list[str]:
+	candidates = [base] if start == 1 else []
+	for suffix in range(max(start, 2), start + count):
 		suffix_str = f"-{suffix}"
-		max_len = 32 - len(suffix_str)
-		candidate = f"{base[:max_len]}{suffix_str}"
+		candidates.append(f"{base[:32 - len(suffix_str)]}{suffix_str}")
+	return candidates
+
+
+async def _allocate_username(base: str, db: AsyncSession) -> str:
+	"""
+	Первый свободный вариант base, base-2, base-3, ...
+
+	Занятость пачки из USERNAME_CANDIDATES_PER_QUERY вариантов проверяется одним
+	запросом по uq_users_username_ci (lower(username) = ANY(...)), а не запросом на
+	каждый суффикс.
+	"""
+	start = 1
+	while True:
+		candidates = _username_candidates(base, start, USERNAME_CANDIDATES_PER_QUERY)
+		taken = set(
+			(
+				await db.scalars(
+					select(func.lower(User.username)).where(
+						func.lower(User.username) == any_([candidate.lower() for candidate in candidates])
+					)
+				)
+			).all()
+		)
+		for candidate in candidates:
+			if candidate.lower() not in taken:
+				return candidate
+		start += USERNAME_CANDIDATES_PER_QUERY
+
+
+def _violated_constraint(exc: IntegrityError) -> str:
+	# asyncpg кладёт исходную ошибку в __cause__, у неё есть имя ограничения
+	cause = getattr(exc.orig, "__cause__", None)
+	return getattr(cause, "constraint_name", None) or str(exc.orig)
 
 
 @router.post("/register", response_model=UserOut, status_code=status.HTTP_201_CREATED)
-async def register(user_in: UserCreate, db: AsyncSession = Depends(get_db)) -> UserOut:
+async def register(
+	user_in: UserCreate, request: Request, db: AsyncSession = Depends(get_db)
+) -> UserOut:
 	email = user_in.email.lower()
-	username = _sanitize_username(user_in.username if hasattr(user_in, "username") else None, email)
+	await auth_throttle.check("register", client_ip(request), email)
+	base_username = _sanitize_username(user_in.username if hasattr(user_in, "username") else None, email)
 
-	stmt = select(User).where(User.email == email)
-	existing = await db.scalar(stmt)
-	if existing:
+	stmt = select(User.id).where(func.lower(User.email) == email)
+	if await db.scalar(stmt):
 		raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
 
-	username = await _ensure_unique_username(username, db)
-
-	user = User(email=email, username=username, hashed_password=get_password_hash(user_in.password))
-	db.add(user)
-	await db.commit()
-	await db.refresh(user)
-	return user
+	hashed_password = await get_password_hash(user_in.password)
+	# Свободное имя могут занять между проверкой и вставкой — тогда подбираем заново
+	for _ in range(USERNAME_ALLOCATION_ATTEMPTS):
+		username = await _allocate_username(base_username, db)
+		user = User(email=email, username=username, hashed_password=hashed_password)
+		db.add(user)
+		try:
+			await db.commit()
+		except IntegrityError as exc:
+			await db.rollback()
+			if "email" in _violated_constraint(exc):
+				raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
+			continue
+		await db.refresh(user)
+		return user
+	raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Could not allocate username, retry")
 
 
 @router.post("/login", response_model=Token)
-async def login(data: LoginInput, db: AsyncSession = Depends(get_db)) -> Token:
+async def login(
+	data: LoginInput,
+	request: Request,
+	background_tasks: BackgroundTasks,
+	db: AsyncSession = Depends(get_db),
+) -> Token:
 	login_value = data.login.lower().strip()
-	# Пытаемся найти пользователя по email или username
-	stmt = select(User).where(
-		(User.email == login_value) | (User.username == login_value)
-	)
+	# До поиска пользователя и Argon2: отклонённая попытка не стоит хеширования
+	await auth_throttle.check("login", client_ip(request), login_value)
+	# В username не бывает "@", поэтому ищем по одному из функциональных индексов
+	# uq_users_email_ci / uq_users_username_ci
+	column = User.email if "@" in login_value else User.username
+	stmt = select(User).where(func.lower(column) == login_value)
 	user = await db.scalar(stmt)
-	if not user or not verify_password(data.password, user.hashed_password):
+	if not user or not await verify_password(data.password, user.hashed_password):
 		raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Неверный логин или пароль")
+	await auth_throttle.succeeded("login", login_value)
+	if password_needs_rehash(user.hashed_password):
+		background_tasks.add_task(rehash_password, user.id, data.password, user.hashed_password)
 
 	access = create_access_token(user.id)
-	refresh = await create_refresh_token(db, user.id)
+	refresh = await create_refresh_token(user.id)
 	return Token(access_token=access, refresh_token=refresh)
 
 
@@ -94,23 +148,33 @@ async def refresh(data: RefreshInput, db: AsyncSession = Depends(get_db)) -> Tok
 	except RefreshTokenError as exc:
 		raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=exc.detail)
 
-	user = await db.get(User, token_record.user_id)
+	user = await load_user(db, token_record.user_id)
 	if not user or not user.is_active:
 		raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found or inactive")
 
-	token_record.revoked = True
-	token_record.revoked_at = datetime.now(timezone.utc)
-
+	# Отзыв старого токена и вставка нового — одной транзакцией в пакетном писателе
+	try:
+		refresh_token = await create_refresh_token(user.id, replaces=token_record)
+	except RefreshTokenError as exc:
+		raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=exc.detail)
 	access = create_access_token(user.id)
-	refresh_token = await create_refresh_token(db, user.id)
 	return Token(access_token=access, refresh_token=refresh_token)
 
 
 @router.get("/me", response_model=UserOut)
-async def me(current_user: User = Depends(get_current_user)) -> UserOut:
+async def me(current_user: UserOut = Depends(get_current_user)) -> UserOut:
 	return current_user
 
 
+@router.get("/.well-known/jwks.json")
+async def jwks(response: Response) -> dict:
+	"""Открытые ключи проверки access-токенов; пустой набор — токены подписываются jwt_secret."""
+	response.headers["Cache-Control"] = "public, max-age=60"
+	if signing_key_ring is None:
+		return {"keys": []}
+	return signing_key_ring.jwks()
+
+
 @router.get("/users/{user_id}", response_model=UserOut)
 async def get_user_by_id(user_id: int, db: AsyncSession = Depends(get_db)) -> UserOut:
 	user = await db.get(User, user_id)
@@ -7,26 +7,79 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from common import make_internal_token_verifier
 
 from .config import get_settings
-from .database import get_db
+from .database import SessionLocal, get_db
+from .hashing import PasswordHashPoolBusy, password_hash_pool
 from .models import RefreshToken, User
+from .schemas import UserOut
+from .signing_keys import ALGORITHM as SIGNING_ALGORITHM, signing_key_ring
+from .token_writer import RefreshTokenAlreadyRevoked, refresh_token_writer
+from .user_cache import load_user, user_cache
 
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+def _argon2_options() -> dict[str, int]:
+	settings = get_settings()
+	options = {
+		"argon2__time_cost": settings.argon2_time_cost,
+		"argon2__memory_cost": settings.argon2_memory_cost,
+		"argon2__parallelism": settings.argon2_parallelism,
+	}
+	return {key: value for key, value in options.items() if value is not None}
+
+
+pwd_context = CryptContext(schemes=["argon2"], deprecated="auto", **_argon2_options())
 bearer_scheme = HTTPBearer(auto_error=True)
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-	return pwd_context.verify(plain_password, hashed_password)
+def _hashing_unavailable() -> HTTPException:
+	return HTTPException(
+		status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+		detail="Сервис перегружен, повторите попытку позже",
+		headers={"Retry-After": "1"},
+	)
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+	try:
+		return await password_hash_pool.run("verify", pwd_context.verify, plain_password, hashed_password)
+	except PasswordHashPoolBusy:
+		raise _hashing_unavailable()
+
+
+async def get_password_hash(password: str) -> str:
+	try:
+		return await password_hash_pool.run("hash", pwd_context.hash, password)
+	except PasswordHashPoolBusy:
+		raise _hashing_unavailable()
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+	"""Хеш посчитан с другим профилем Argon2 (проверка по заголовку, без хеширования)."""
+	return pwd_context.needs_update(hashed_password)
 
 
-def get_password_hash(password: str) -> str:
-	return pwd_context.hash(password)
+async def rehash_password(user_id: int, plain_password: str, old_hash: str) -> None:
+	"""Фоновая задача после входа: пересчитывает хеш под текущий профиль."""
+	try:
+		new_hash = await password_hash_pool.run("rehash", pwd_context.hash, plain_password)
+	except PasswordHashPoolBusy:
+		# Пул занят входящими запросами — перехешируем при следующем входе
+		return
+	async with SessionLocal() as db:
+		# Сравнение со старым хешем: параллельная смена пароля не будет перезаписана
+		await db.execute(
+			update(User)
+			.where(User.id == user_id, User.hashed_password == old_hash)
+			.values(hashed_password=new_hash)
+		)
+		await db.commit()
+	# updated_at изменился
+	user_cache.invalidate(user_id)
 
 
 def _now() -> datetime:
@@ -38,13 +91,21 @@ def _hash_token(token: str) -> str:
 
 
 def _create_token(
-	*, subject: str, token_type: str, expires_delta: timedelta, extra_claims: dict | None = None
+	*,
+	subject: str,
+	token_type: str,
+	expires_delta: timedelta,
+	extra_claims: dict | None = None,
+	asymmetric: bool = False,
 ) -> str:
 	settings = get_settings()
 	expire = _now() + expires_delta
 	payload = {"sub": subject, "type": token_type, "exp": int(expire.timestamp())}
 	if extra_claims:
 		payload |= extra_claims
+	if asymmetric and signing_key_ring is not None:
+		key = signing_key_ring.signing_key()
+		return jwt.encode(payload, key.private_pem, algorithm=SIGNING_ALGORITHM, headers={"kid": key.kid})
 	return jwt.encode(payload, settings.jwt_secret, algorithm=settings.jwt_algorithm)
 
 
@@ -54,6 +115,7 @@ def create_access_token(user_id: int) -> str:
 		subject=str(user_id),
 		token_type="access",
 		expires_delta=timedelta(minutes=settings.access_token_expire_minutes),
+		asymmetric=True,
 	)
 
 
@@ -63,7 +125,15 @@ class RefreshTokenError(Exception):
 		super().__init__(detail)
 
 
-async def create_refresh_token(db: AsyncSession, user_id: int) -> str:
+async def create_refresh_token(
+	user_id: int, *, family_id: UUID | None = None, replaces: RefreshToken | None = None
+) -> str:
+	"""
+	Выпускает refresh-токен; запись уходит через пакетный писатель (token_writer).
+
+	При ротации передаётся replaces — старый токен отзывается в той же транзакции,
+	что и вставка нового, а family_id наследуется от него.
+	"""
 	settings = get_settings()
 	expires_delta = timedelta(days=settings.refresh_token_expire_days)
 	token_uuid = uuid4()
@@ -73,15 +143,31 @@ async def create_refresh_token(db: AsyncSession, user_id: int) -> str:
 		expires_delta=expires_delta,
 		extra_claims={"jti": str(token_uuid)},
 	)
-	record = RefreshToken(
-		token_id=token_uuid,
-		user_id=user_id,
-		token_hash=_hash_token(token),
-		expires_at=_now() + expires_delta,
+	if replaces is not None:
+		family_id = replaces.family_id
+	row = {
+		"token_id": token_uuid,
+		"family_id": family_id or token_uuid,
+		"user_id": user_id,
+		"token_hash": _hash_token(token),
+		"expires_at": _now() + expires_delta,
+		"revoked": False,
+	}
+	try:
+		await refresh_token_writer.write(row, revoke_id=replaces.id if replaces is not None else None)
+	except RefreshTokenAlreadyRevoked as exc:
+		# Тот же токен только что ротировал параллельный запрос
+		raise RefreshTokenError("Refresh-токен уже использован") from exc
+	return token
+
+
+async def revoke_token_family(db: AsyncSession, family_id: UUID) -> None:
+	await db.execute(
+		update(RefreshToken)
+		.where(RefreshToken.family_id == family_id, RefreshToken.revoked.is_(False))
+		.values(revoked=True, revoked_at=_now())
 	)
-	db.add(record)
 	await db.commit()
-	return token
 
 
 def decode_token(token: str) -> dict:
@@ -89,6 +175,16 @@ def decode_token(token: str) -> dict:
 	return jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm])
 
 
+def decode_access_token(token: str) -> dict:
+	"""Access-токен подписан ключом из signing_key_ring (по kid), если ключи настроены."""
+	if signing_key_ring is None:
+		return decode_token(token)
+	key = signing_key_ring.public_key(jwt.get_unverified_header(token).get("kid"))
+	if key is None:
+		raise JWTError("Unknown signing key")
+	return jwt.decode(token, key, algorithms=[SIGNING_ALGORITHM])
+
+
 async def validate_refresh_token(db: AsyncSession, token: str) -> RefreshToken:
 	try:
 		payload = decode_token(token)
@@ -107,13 +203,16 @@ async def validate_refresh_token(db: AsyncSession, token: str) -> RefreshToken:
 	except ValueError as exc:
 		raise RefreshTokenError("Повреждённый идентификатор токена") from exc
 
+	# token_id уникален: одна строка по уникальному индексу, живая или отозванная
 	stmt = select(RefreshToken).where(RefreshToken.token_id == token_uuid)
-	result = await db.execute(stmt)
-	record = result.scalars().first()
+	record = (await db.execute(stmt)).scalars().first()
 	if not record:
 		raise RefreshTokenError("Refresh-токен не найден")
-
 	if record.revoked:
+		if _hash_token(token) == record.token_hash:
+			# Повторное использование уже сменённого токена: токен мог утечь,
+			# поэтому отзываем всю цепочку ротаций этого входа
+			await revoke_token_family(db, record.family_id)
 		raise RefreshTokenError("Refresh-токен уже использован")
 
 	if record.expires_at <= _now():
@@ -132,10 +231,10 @@ async def validate_refresh_token(db: AsyncSession, token: str) -> RefreshToken:
 async def get_current_user(
 	credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
 	db: AsyncSession = Depends(get_db),
-) -> User:
+) -> UserOut:
 	token = credentials.credentials
 	try:
-		payload = decode_token(token)
+		payload = decode_access_token(token)
 	except JWTError:
 		raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
@@ -146,7 +245,7 @@ async def get_current_user(
 	if not user_id:
 		raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token payload")
 
-	user: Optional[User] = await db.get(User, int(user_id))
+	user: Optional[UserOut] = await load_user(db, int(user_id))
 	if not user or not user.is_active:
 		raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found or inactive")
 
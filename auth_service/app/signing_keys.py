@@ -0,0 +1,135 @@
+"""
+Ключи ES256 для подписи access-токенов.
+
+Ключи лежат в каталоге jwt_signing_keys_dir, по одному PEM на файл; имя файла
+без .pem — kid (удобно называть файлы датой: 2026-10-19.pem). В JWKS сразу
+публикуются открытые части всех ключей, а подписывает последний по имени
+закрытый ключ, файл которого старше jwt_signing_key_activation_seconds: к этому
+моменту его kid уже перечитали все реплики auth_service и кэши JWKS остальных
+сервисов. Каталог перечитывается раз в jwt_signing_keys_reload_seconds, поэтому
+ротация не требует перезапуска:
+
+1. положить новый ключ — он публикуется в JWKS, а подписывать начинает через
+   jwt_signing_key_activation_seconds после появления файла (по mtime);
+2. старый ключ оставить (можно только открытую часть) на срок жизни access-токена
+   после активации нового;
+3. удалить старый ключ.
+
+Если выдержанных ключей нет (первый запуск), подписывает самый старый по имени.
+
+Refresh-токены проверяет только auth_service, они по-прежнему подписываются jwt_secret.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from jose import jwk
+
+from .config import get_settings
+
+LOGGER = logging.getLogger(__name__)
+
+ALGORITHM = "ES256"
+# Внеочередное перечитывание каталога по неизвестному kid — не чаще раза в секунду
+FORCED_RELOAD_INTERVAL_SECONDS = 1.0
+
+
+@dataclass(frozen=True)
+class SigningKey:
+	kid: str
+	private_pem: str
+
+
+class SigningKeyRing:
+	def __init__(self, directory: Path, *, reload_seconds: float, activation_seconds: float) -> None:
+		self._directory = directory
+		self._reload_seconds = reload_seconds
+		self._activation_seconds = activation_seconds
+		self._lock = threading.Lock()
+		self._loaded_at = float("-inf")
+		self._signing: SigningKey | None = None
+		self._public: dict[str, dict] = {}
+
+	def _load(self) -> None:
+		signing: SigningKey | None = None
+		fallback: SigningKey | None = None
+		public: dict[str, dict] = {}
+		now = time.time()
+		for path in sorted(self._directory.glob("*.pem")):
+			pem = path.read_text(encoding="utf-8")
+			try:
+				key = jwk.construct(pem, ALGORITHM)
+			except Exception:
+				LOGGER.exception("Cannot load JWT signing key %s", path.name)
+				continue
+			kid = path.stem
+			public_key = key if key.is_public() else key.public_key()
+			public[kid] = {**public_key.to_dict(), "kid": kid, "use": "sig", "alg": ALGORITHM}
+			if key.is_public():
+				continue
+			candidate = SigningKey(kid=kid, private_pem=pem)
+			fallback = fallback or candidate
+			if now - path.stat().st_mtime >= self._activation_seconds:
+				signing = candidate
+		if signing is None:
+			if fallback is None:
+				raise RuntimeError(f"No private ES256 key in {self._directory}")
+			LOGGER.warning("No JWT signing key is older than activation delay, using %s", fallback.kid)
+			signing = fallback
+		if self._signing is not None and signing.kid != self._signing.kid:
+			LOGGER.info("JWT signing key switched from %s to %s", self._signing.kid, signing.kid)
+		self._signing, self._public = signing, public
+
+	def _refresh(self, *, force: bool = False) -> None:
+		interval = FORCED_RELOAD_INTERVAL_SECONDS if force else self._reload_seconds
+		if time.monotonic() - self._loaded_at < interval:
+			return
+		with self._lock:
+			if time.monotonic() - self._loaded_at < interval:
+				return
+			try:
+				self._load()
+			except Exception:
+				# Битый каталог не должен ронять выпуск токенов, если ключи уже загружены
+				if self._signing is None:
+					raise
+				LOGGER.exception("Failed to reload JWT signing keys, keeping previous set")
+			self._loaded_at = time.monotonic()
+
+	def signing_key(self) -> SigningKey:
+		self._refresh()
+		return self._signing
+
+	def public_key(self, kid: str | None) -> dict | None:
+		self._refresh()
+		if not kid:
+			return None
+		if kid not in self._public:
+			# Ключ мог появиться на другой реплике раньше, чем здесь прошёл период перечитывания
+			self._refresh(force=True)
+		return self._public.get(kid)
+
+	def jwks(self) -> dict:
+		self._refresh()
+		return {"keys": list(self._public.values())}
+
+
+def _key_ring_from_settings() -> SigningKeyRing | None:
+	settings = get_settings()
+	if not settings.jwt_signing_keys_dir:
+		return None
+	activation_seconds = settings.jwt_signing_key_activation_seconds
+	if activation_seconds is None:
+		activation_seconds = settings.jwt_signing_keys_reload_seconds + settings.jwt_jwks_refresh_seconds
+	return SigningKeyRing(
+		Path(settings.jwt_signing_keys_dir),
+		reload_seconds=settings.jwt_signing_keys_reload_seconds,
+		activation_seconds=activation_seconds,
+	)
+
+
+signing_key_ring = _key_ring_from_settings()
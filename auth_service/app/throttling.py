@@ -0,0 +1,270 @@
+"""
+Ограничение частоты входа и регистрации.
+
+Каждая попытка учитывается в двух скользящих окнах: по IP клиента и по
+идентификатору (логин или email). Окно считается приближённо по двум соседним
+фиксированным окнам: previous * (доля прошлого окна, ещё попадающая в скользящее)
++ current. Превышение лимита блокирует ключ, и каждая следующая блокировка
+подряд вдвое длиннее предыдущей (до throttle_lockout_max_seconds). Проверка
+выполняется до поиска пользователя и Argon2, поэтому отклонённая попытка почти
+ничего не стоит.
+
+Состояние хранится в памяти процесса либо (AUTH_THROTTLE_STORE=postgres)
+в таблице auth_throttle, общей для всех реплик.
+"""
+from __future__ import annotations
+
+import logging
+import math
+import time
+from dataclasses import astuple, dataclass
+
+from fastapi import HTTPException, Request, status
+from prometheus_client import Counter
+from sqlalchemy import text
+
+from .config import get_settings
+from .database import async_engine
+
+LOGGER = logging.getLogger(__name__)
+
+THROTTLE_REQUESTS = Counter(
+	"auth_throttle_requests_total",
+	"Login and registration attempts checked by the throttle",
+	["scope", "result"],
+)
+THROTTLE_LOCKOUTS = Counter(
+	"auth_throttle_lockouts_total",
+	"Throttle keys locked out after exceeding their limit",
+	["scope", "kind"],
+)
+
+
+@dataclass(frozen=True)
+class ThrottleRule:
+	limit: int
+	window_seconds: float
+
+
+@dataclass
+class ThrottleState:
+	window_start: float = 0.0
+	current: int = 0
+	previous: int = 0
+	strikes: int = 0
+	locked_until: float = 0.0
+
+	def _roll(self, window: float, now: float) -> None:
+		start = math.floor(now / window) * window
+		if start == self.window_start:
+			return
+		self.previous = self.current if start - self.window_start == window else 0
+		self.current = 0
+		self.window_start = start
+
+	def estimate(self, window: float, now: float) -> float:
+		self._roll(window, now)
+		return self.previous * (1 - (now - self.window_start) / window) + self.current
+
+	def hit(self, rule: ThrottleRule, now: float, *, lockout_base: float, lockout_max: float) -> float:
+		"""Учитывает попытку; возвращает 0, если она разрешена, иначе сколько секунд ждать."""
+		if now < self.locked_until:
+			return self.locked_until - now
+		# После спокойного периода длиной в максимальную блокировку счёт блокировок начинается заново
+		if self.strikes and now - self.locked_until >= lockout_max:
+			self.strikes = 0
+		if self.estimate(rule.window_seconds, now) + 1 > rule.limit:
+			self.strikes += 1
+			lockout = min(lockout_base * 2 ** (self.strikes - 1), lockout_max)
+			self.locked_until = now + lockout
+			return lockout
+		self.current += 1
+		return 0.0
+
+	def is_idle(self, now: float, *, window: float, lockout_max: float) -> bool:
+		return now - self.window_start >= 2 * window and now - self.locked_until >= lockout_max
+
+
+class MemoryThrottleStore:
+	PRUNE_EVERY = 1024
+
+	def __init__(self) -> None:
+		# Ключ -> (состояние, окно его правила, максимальная блокировка): у входа и регистрации
+		# окна разные, поэтому простой ключа проверяется по его собственным параметрам
+		self._states: dict[str, tuple[ThrottleState, float, float]] = {}
+		self._calls = 0
+
+	async def hit(self, key: str, rule: ThrottleRule, now: float, *, lockout_base: float, lockout_max: float) -> float:
+		self._calls += 1
+		if self._calls % self.PRUNE_EVERY == 0:
+			self._prune(now)
+		entry = self._states.get(key)
+		if entry is None:
+			entry = self._states[key] = (ThrottleState(), rule.window_seconds, lockout_max)
+		return entry[0].hit(rule, now, lockout_base=lockout_base, lockout_max=lockout_max)
+
+	async def reset(self, key: str) -> None:
+		self._states.pop(key, None)
+
+	def _prune(self, now: float) -> None:
+		idle = [
+			key
+			for key, (state, window, lockout_max) in self._states.items()
+			if state.is_idle(now, window=window, lockout_max=lockout_max)
+		]
+		for key in idle:
+			del self._states[key]
+
+
+class PostgresThrottleStore:
+	"""Состояние в auth_throttle; строка ключа блокируется на время пересчёта."""
+
+	PRUNE_EVERY = 1024
+
+	LOCK_STATE = text(
+		"""
+		INSERT INTO auth_throttle (key) VALUES (:key)
+		ON CONFLICT (key) DO UPDATE SET key = EXCLUDED.key
+		RETURNING window_start, current_count, previous_count, strikes, locked_until
+		"""
+	)
+	SAVE_STATE = text(
+		"""
+		UPDATE auth_throttle
+		SET window_start = :window_start, current_count = :current, previous_count = :previous,
+			strikes = :strikes, locked_until = :locked_until, updated_at = now()
+		WHERE key = :key
+		"""
+	)
+	DELETE_STATE = text("DELETE FROM auth_throttle WHERE key = :key")
+	PRUNE_STATES = text(
+		"DELETE FROM auth_throttle WHERE updated_at < now() - make_interval(secs => :idle_seconds)"
+	)
+
+	def __init__(self, *, idle_seconds: float) -> None:
+		# Окно ключа в таблице не хранится, поэтому простой считается по самому длинному
+		# окну среди правил: строки с коротким окном просто живут чуть дольше
+		self._idle_seconds = idle_seconds
+		self._calls = 0
+
+	async def hit(self, key: str, rule: ThrottleRule, now: float, *, lockout_base: float, lockout_max: float) -> float:
+		self._calls += 1
+		async with async_engine.begin() as conn:
+			if self._calls % self.PRUNE_EVERY == 0:
+				await conn.execute(self.PRUNE_STATES, {"idle_seconds": self._idle_seconds})
+			state = ThrottleState(*(await conn.execute(self.LOCK_STATE, {"key": key})).one())
+			retry_after = state.hit(rule, now, lockout_base=lockout_base, lockout_max=lockout_max)
+			window_start, current, previous, strikes, locked_until = astuple(state)
+			await conn.execute(
+				self.SAVE_STATE,
+				{
+					"key": key,
+					"window_start": window_start,
+					"current": current,
+					"previous": previous,
+					"strikes": strikes,
+					"locked_until": locked_until,
+				},
+			)
+		return retry_after
+
+	async def reset(self, key: str) -> None:
+		async with async_engine.begin() as conn:
+			await conn.execute(self.DELETE_STATE, {"key": key})
+
+
+class AuthThrottle:
+	def __init__(
+		self,
+		store: MemoryThrottleStore | PostgresThrottleStore,
+		rules: dict[str, tuple[ThrottleRule, ThrottleRule]],
+		*,
+		lockout_base: float,
+		lockout_max: float,
+		enabled: bool = True,
+	) -> None:
+		self._enabled = enabled
+		self._store = store
+		self._rules = rules
+		self._lockout_base = lockout_base
+		self._lockout_max = lockout_max
+
+	async def check(self, scope: str, ip: str | None, identifier: str) -> None:
+		"""Учитывает попытку; при превышении лимита — 429 с Retry-After."""
+		if not self._enabled:
+			return
+		ip_rule, identifier_rule = self._rules[scope]
+		now = time.time()
+		keys = [("identifier", f"{scope}:id:{identifier}", identifier_rule)]
+		if ip:
+			keys.insert(0, ("ip", f"{scope}:ip:{ip}", ip_rule))
+		retry_after = 0.0
+		for kind, key, rule in keys:
+			try:
+				wait = await self._store.hit(
+					key, rule, now, lockout_base=self._lockout_base, lockout_max=self._lockout_max
+				)
+			except Exception:
+				# Недоступное общее хранилище не должно блокировать вход
+				LOGGER.exception("Throttle store failed for %s", kind)
+				continue
+			if wait:
+				THROTTLE_LOCKOUTS.labels(scope, kind).inc()
+				retry_after = max(retry_after, wait)
+				break
+		if retry_after:
+			THROTTLE_REQUESTS.labels(scope, "rejected").inc()
+			raise HTTPException(
+				status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+				detail="Слишком много попыток, повторите позже",
+				headers={"Retry-After": str(math.ceil(retry_after))},
+			)
+		THROTTLE_REQUESTS.labels(scope, "allowed").inc()
+
+	async def succeeded(self, scope: str, identifier: str) -> None:
+		"""Успешный вход снимает счётчик по идентификатору (по IP — нет)."""
+		if not self._enabled:
+			return
+		try:
+			await self._store.reset(f"{scope}:id:{identifier}")
+		except Exception:
+			LOGGER.exception("Throttle store reset failed")
+
+
+def client_ip(request: Request) -> str | None:
+	forwarded = request.headers.get("x-real-ip")
+	if forwarded:
+		return forwarded
+	return request.client.host if request.client else None
+
+
+def _throttle_from_settings() -> AuthThrottle:
+	settings = get_settings()
+	rules = {
+		"login": (
+			ThrottleRule(settings.login_ip_limit, settings.login_window_seconds),
+			ThrottleRule(settings.login_identifier_limit, settings.login_window_seconds),
+		),
+		"register": (
+			ThrottleRule(settings.register_ip_limit, settings.register_window_seconds),
+			ThrottleRule(settings.register_identifier_limit, settings.register_window_seconds),
+		),
+	}
+	store: MemoryThrottleStore | PostgresThrottleStore
+	if settings.auth_throttle_store == "postgres":
+		longest_window = max(rule.window_seconds for pair in rules.values() for rule in pair)
+		store = PostgresThrottleStore(
+			idle_seconds=2 * longest_window + settings.throttle_lockout_max_seconds
+		)
+	else:
+		store = MemoryThrottleStore()
+	return AuthThrottle(
+		store,
+		rules,
+		lockout_base=settings.throttle_lockout_base_seconds,
+		lockout_max=settings.throttle_lockout_max_seconds,
+		enabled=settings.auth_throttle_enabled,
+	)
+
+
+auth_throttle = _throttle_from_settings()
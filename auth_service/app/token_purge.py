@@ -0,0 +1,105 @@
+"""
+Очистка refresh_tokens от истёкших и давно отозванных строк.
+
+Выполняется на процессе-лидере кусками по refresh_token_purge_chunk строк,
+каждый кусок — отдельная короткая транзакция, поэтому очистка не держит
+длинных блокировок и не раздувает WAL одним огромным DELETE. Отозванные
+токены хранятся refresh_token_revoked_retention_days: в это время их
+повторное использование распознаётся и отзывает всё семейство.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+
+from sqlalchemy import text
+
+from common import LeaderElection
+
+from .config import get_settings
+from .database import async_engine
+
+LOGGER = logging.getLogger(__name__)
+
+PURGE_EXPIRED = text(
+	"""
+	DELETE FROM refresh_tokens WHERE id IN (
+		SELECT id FROM refresh_tokens
+		WHERE expires_at < now()
+		LIMIT :chunk
+		FOR UPDATE SKIP LOCKED
+	)
+	"""
+)
+PURGE_REVOKED = text(
+	"""
+	DELETE FROM refresh_tokens WHERE id IN (
+		SELECT id FROM refresh_tokens
+		WHERE revoked AND revoked_at < now() - make_interval(days => :retention_days)
+		LIMIT :chunk
+		FOR UPDATE SKIP LOCKED
+	)
+	"""
+)
+CHUNK_PAUSE_SECONDS = 0.05
+
+
+async def purge_refresh_tokens(*, chunk: int, retention_days: int) -> int:
+	"""Удаляет строки кусками, пока они находятся; возвращает число удалённых."""
+	deleted = 0
+	for statement, params in (
+		(PURGE_EXPIRED, {"chunk": chunk}),
+		(PURGE_REVOKED, {"chunk": chunk, "retention_days": retention_days}),
+	):
+		while True:
+			async with async_engine.begin() as conn:
+				count = (await conn.execute(statement, params)).rowcount
+			deleted += count
+			if count < chunk:
+				break
+			await asyncio.sleep(CHUNK_PAUSE_SECONDS)
+	return deleted
+
+
+class RefreshTokenPurger:
+	def __init__(self, leader: LeaderElection) -> None:
+		self._task: asyncio.Task | None = None
+		self._leader = leader
+
+	def start(self) -> None:
+		if self._task and not self._task.done():
+			return
+		self._leader.start()
+		self._task = asyncio.create_task(self._run(), name="refresh-token-purge")
+
+	async def stop(self) -> None:
+		if self._task:
+			self._task.cancel()
+			with contextlib.suppress(asyncio.CancelledError):
+				await self._task
+			self._task = None
+		await self._leader.stop()
+
+	async def _run(self) -> None:
+		settings = get_settings()
+		while True:
+			await asyncio.sleep(settings.refresh_token_purge_interval_seconds)
+			if not self._leader.is_leader:
+				continue
+			try:
+				deleted = await purge_refresh_tokens(
+					chunk=settings.refresh_token_purge_chunk,
+					retention_days=settings.refresh_token_revoked_retention_days,
+				)
+				if deleted:
+					LOGGER.info("Purged %d refresh token(s)", deleted)
+			except asyncio.CancelledError:
+				raise
+			except Exception:  # pragma: no cover - defensive logging
+				LOGGER.exception("Refresh token purge failed")
+
+
+refresh_token_purger = RefreshTokenPurger(
+	LeaderElection(async_engine, "auth_service:refresh-token-purge", retry_interval=30)
+)
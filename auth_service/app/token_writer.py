@@ -0,0 +1,186 @@
+"""
+Пакетная запись refresh-токенов.
+
+login и refresh не коммитят собственную транзакцию: новая строка токена (и отзыв
+старого при ротации) ставится в очередь, а фоновая задача пишет всё, что
+накопилось, одной транзакцией. Пока идёт коммит одной пачки, копится
+следующая, поэтому под нагрузкой один коммит обслуживает много входов, а в
+тишине запись уходит сразу. Отзыв старого токена и вставка нового для одной
+ротации всегда попадают в одну пачку; отзыв выполняется с условием NOT revoked,
+и если токен уже отозван (параллельная ротация тем же токеном), новый не
+вставляется.
+
+Вызывающий ждёт коммита своей пачки, так что выданный токен уже виден всем
+репликам. С refresh_token_synchronous_commit=false транзакция не ждёт fsync
+WAL: при падении Postgres могут потеряться токены последних долей секунды
+(пользователю придётся войти заново), зато задержка ответа не зависит от диска.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any
+
+from prometheus_client import Histogram
+from sqlalchemy import any_, insert, text, update
+
+from .config import get_settings
+from .database import async_engine
+from .models import RefreshToken
+
+LOGGER = logging.getLogger(__name__)
+
+WRITE_BATCH_SIZE = Histogram(
+	"auth_refresh_token_write_batch_size",
+	"Refresh token writes committed in one transaction",
+	buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500),
+)
+WRITE_SECONDS = Histogram(
+	"auth_refresh_token_write_seconds",
+	"Time to commit one batch of refresh token writes",
+	buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5),
+)
+
+
+class RefreshTokenAlreadyRevoked(Exception):
+	pass
+
+
+@dataclass
+class _PendingWrite:
+	row: dict[str, Any]
+	revoke_id: int | None
+	future: asyncio.Future = field(repr=False)
+
+
+def _resolve(future: asyncio.Future, exc: BaseException | None = None) -> None:
+	# Запрос мог быть отменён, пока его запись ждала в очереди
+	if future.done():
+		return
+	if exc is None:
+		future.set_result(None)
+	else:
+		future.set_exception(exc)
+
+
+class RefreshTokenWriter:
+	def __init__(self, *, max_batch: int, linger_seconds: float, synchronous_commit: bool) -> None:
+		self._max_batch = max(max_batch, 1)
+		self._linger = max(linger_seconds, 0.0)
+		self._synchronous_commit = synchronous_commit
+		self._queue: asyncio.Queue[_PendingWrite] | None = None
+		self._task: asyncio.Task | None = None
+
+	def start(self) -> None:
+		if self._task and not self._task.done():
+			return
+		self._queue = asyncio.Queue()
+		self._task = asyncio.create_task(self._run(), name="refresh-token-writer")
+
+	async def stop(self) -> None:
+		if self._task:
+			self._task.cancel()
+			with contextlib.suppress(asyncio.CancelledError):
+				await self._task
+			self._task = None
+		# Дописываем то, что успели поставить в очередь до остановки
+		if self._queue is not None:
+			pending = self._drain([])
+			if pending:
+				await self._flush(pending)
+			self._queue = None
+
+	async def write(self, row: dict[str, Any], *, revoke_id: int | None = None) -> None:
+		"""
+		Вставляет строку refresh_tokens (и отзывает revoke_id) в ближайшей пачке.
+
+		Raises:
+			RefreshTokenAlreadyRevoked: revoke_id уже отозван, строка не вставлена
+		"""
+		pending = _PendingWrite(row, revoke_id, asyncio.get_running_loop().create_future())
+		if self._queue is None or self._task is None or self._task.done():
+			# Писатель не запущен (скрипты, тесты) — пишем сразу
+			await self._flush([pending])
+		else:
+			self._queue.put_nowait(pending)
+		await pending.future
+
+	def _drain(self, batch: list[_PendingWrite]) -> list[_PendingWrite]:
+		while len(batch) < self._max_batch:
+			try:
+				batch.append(self._queue.get_nowait())
+			except asyncio.QueueEmpty:
+				break
+		return batch
+
+	async def _run(self) -> None:
+		while True:
+			batch = [await self._queue.get()]
+			if self._linger:
+				await asyncio.sleep(self._linger)
+			try:
+				await self._flush(self._drain(batch))
+			except asyncio.CancelledError:
+				for pending in batch:
+					_resolve(pending.future, RuntimeError("Refresh token writer stopped"))
+				raise
+
+	async def _flush(self, batch: list[_PendingWrite]) -> None:
+		started = time.perf_counter()
+		accepted: list[_PendingWrite] = []
+		rejected: list[_PendingWrite] = []
+		try:
+			async with async_engine.begin() as conn:
+				if not self._synchronous_commit:
+					await conn.execute(text("SET LOCAL synchronous_commit = off"))
+				revoke_ids = [pending.revoke_id for pending in batch if pending.revoke_id is not None]
+				revoked: set[int] = set()
+				if revoke_ids:
+					revoked = set(
+						(
+							await conn.execute(
+								update(RefreshToken)
+								.where(RefreshToken.id == any_(revoke_ids), RefreshToken.revoked.is_(False))
+								.values(revoked=True, revoked_at=datetime.now(timezone.utc))
+								.returning(RefreshToken.id)
+							)
+						).scalars()
+					)
+				for pending in batch:
+					if pending.revoke_id is None:
+						accepted.append(pending)
+					elif pending.revoke_id in revoked:
+						# Одним токеном ротируется только одна запись пачки
+						revoked.discard(pending.revoke_id)
+						accepted.append(pending)
+					else:
+						rejected.append(pending)
+				if accepted:
+					await conn.execute(insert(RefreshToken), [pending.row for pending in accepted])
+		except Exception as exc:
+			LOGGER.exception("Failed to write %d refresh token(s)", len(batch))
+			for pending in batch:
+				_resolve(pending.future, exc)
+			return
+		WRITE_BATCH_SIZE.observe(len(batch))
+		WRITE_SECONDS.observe(time.perf_counter() - started)
+		for pending in accepted:
+			_resolve(pending.future)
+		for pending in rejected:
+			_resolve(pending.future, RefreshTokenAlreadyRevoked())
+
+
+def _writer_from_settings() -> RefreshTokenWriter:
+	settings = get_settings()
+	return RefreshTokenWriter(
+		max_batch=settings.refresh_token_write_batch,
+		linger_seconds=settings.refresh_token_write_linger_ms / 1000,
+		synchronous_commit=settings.refresh_token_synchronous_commit,
+	)
+
+
+refresh_token_writer = _writer_from_settings()
@@ -0,0 +1,74 @@
+"""
+Кэш профилей пользователей для get_current_user и /refresh.
+
+/api/auth/me вызывается на каждой загрузке страницы, а профиль меняется редко,
+поэтому снимок (is_active и поля UserOut) хранится ttl_seconds. Изменения из
+этого процесса сбрасывают запись сразу; изменения из других процессов
+видны не позже, чем через TTL.
+"""
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+
+from prometheus_client import Counter
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .config import get_settings
+from .models import User
+from .schemas import UserOut
+
+USER_CACHE_REQUESTS = Counter(
+	"auth_user_cache_requests_total",
+	"Lookups in the current-user profile cache",
+	["result"],
+)
+
+
+class UserCache:
+	def __init__(self, *, ttl_seconds: float, max_entries: int) -> None:
+		self._ttl = ttl_seconds
+		self._max_entries = max_entries
+		self._entries: OrderedDict[int, tuple[float, UserOut]] = OrderedDict()
+
+	def __len__(self) -> int:
+		return len(self._entries)
+
+	def get(self, user_id: int) -> UserOut | None:
+		entry = self._entries.get(user_id)
+		if entry is not None and entry[0] <= time.monotonic():
+			del self._entries[user_id]
+			entry = None
+		USER_CACHE_REQUESTS.labels("hit" if entry is not None else "miss").inc()
+		return entry[1] if entry is not None else None
+
+	def put(self, user: UserOut) -> None:
+		if self._ttl <= 0 or self._max_entries <= 0:
+			return
+		# Запись переставляется в конец: TTL одинаковый, порядок совпадает с порядком истечения
+		self._entries.pop(user.id, None)
+		self._entries[user.id] = (time.monotonic() + self._ttl, user)
+		while len(self._entries) > self._max_entries:
+			self._entries.popitem(last=False)
+
+	def invalidate(self, user_id: int) -> None:
+		self._entries.pop(user_id, None)
+
+
+user_cache = UserCache(
+	ttl_seconds=get_settings().user_cache_ttl_seconds,
+	max_entries=get_settings().user_cache_max_entries,
+)
+
+
+async def load_user(db: AsyncSession, user_id: int) -> UserOut | None:
+	"""Профиль пользователя из кэша или БД; отсутствующие пользователи не кэшируются."""
+	cached = user_cache.get(user_id)
+	if cached is not None:
+		return cached
+	user = await db.get(User, user_id)
+	if user is None:
+		return None
+	profile = UserOut.model_validate(user)
+	user_cache.put(profile)
+	return profile
@@ -1,54 +1,32 @@
-from dataclasses import dataclass
-from datetime import datetime, timezone
-
-from fastapi import Depends, HTTPException, status
-from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from jose import JWTError, jwt
-
-from common import make_internal_token_verifier
+from common import (
+	CurrentUser,
+	bearer_scheme,
+	make_get_current_user,
+	make_get_current_user_id,
+	make_internal_token_verifier,
+)
+from common import decode_access_token as _decode_access_token
 
 from .config import get_settings
 
 
-bearer_scheme = HTTPBearer(auto_error=True)
-
-
-@dataclass
-class CurrentUser:
-	id: int
-	token: str
-
-
 def decode_access_token(token: str) -> CurrentUser:
 	settings = get_settings()
-	try:
-		payload = jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm])
-	except JWTError:
-		raise HTTPException(status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-
-	if payload.get("type") != "access":
-		raise HTTPException(status.HTTP_401_UNAUTHORIZED, detail="Invalid token type")
-
-	exp = payload.get("exp")
-	if exp and datetime.fromtimestamp(exp, tz=timezone.utc) < datetime.now(timezone.utc):
-		raise HTTPException(status.HTTP_401_UNAUTHORIZED, detail="Token expired")
-
-	sub = payload.get("sub")
-	if not sub:
-		raise HTTPException(status.HTTP_401_UNAUTHORIZED, detail="Invalid token payload")
-
-	return CurrentUser(id=int(sub), token=token)
-
-
-async def get_current_user(
-	credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
-) -> CurrentUser:
-	return decode_access_token(credentials.credentials)
+	return _decode_access_token(token, settings.jwt_secret, settings.jwt_algorithm)
 
 
-async def get_current_user_id(current_user: CurrentUser = Depends(get_current_user)) -> int:
-	return current_user.id
+# Проверенные токены кэшируются общим для процесса кэшем из common.security
+get_current_user = make_get_current_user(get_settings)
+get_current_user_id = make_get_current_user_id(get_current_user)
 
 
 verify_internal_token = make_internal_token_verifier(lambda: get_settings().api_internal_token)
 
+__all__ = [
+	"CurrentUser",
+	"bearer_scheme",
+	"decode_access_token",
+	"get_current_user",
+	"get_current_user_id",
+	"verify_internal_token",
+]
@@ -8,6 +8,7 @@
     selectedGame: null,
     moves: [],
     ws: null,
+    wsShard: null,
     wsStatusEl: null,
     lastStateTimestamp: null,
     clockTimer: null,
@@ -609,16 +610,34 @@
     updateWsIndicator('offline');
     const token = getAccessToken();
     const protocol = window.location.protocol === 'https:' ? 'wss' : 'ws';
-    const url = `${protocol}://${window.location.host}/ws/games/${gameId}${token ? `?token=${encodeURIComponent(token)}` : ''}`;
+    const params = new URLSearchParams();
+    if (token) params.set('token', token);
+    if (state.wsShard) params.set('shard', state.wsShard);
+    const query = params.toString();
+    const url = `${protocol}://${window.location.host}/ws/games/${gameId}${query ? `?${query}` : ''}`;
     const ws = new WebSocket(url);
     state.ws = ws;
 
     ws.onopen = () => updateWsIndicator('online');
-    ws.onclose = () => updateWsIndicator('offline');
+    ws.onclose = (event) => {
+      updateWsIndicator('offline');
+      // 4307: партия обслуживается другим шардом, переподключаемся к нему
+      if (event.code === 4307 && state.wsShard && state.ws === ws) {
+        connectWebSocket(gameId);
+      }
+    };
     ws.onerror = () => updateWsIndicator('offline');
     ws.onmessage = async (event) => {
       try {
         const payload = JSON.parse(event.data);
+        if (payload && payload.type === 'ping') {
+          ws.send(JSON.stringify({ type: 'pong' }));
+          return;
+        }
+        if (payload && payload.type === 'shard_redirect') {
+          state.wsShard = payload.shard;
+          return;
+        }
         await handleWsPayload(payload);
       } catch (err) {
         console.error('WS parse error', err);
@@ -56,6 +56,8 @@
   const WS_MAX_DELAY_MS = 30_000;
   const WS_MAX_RETRY_ATTEMPTS = 6;
   const AUTH_CLOSE_CODES = new Set([4401, 4403, 4402]);
+  const WRONG_SHARD_CLOSE_CODE = 4307;
+  let wsShard = null;
 
 
   function showToast(message, type = 'info') {
@@ -246,6 +248,11 @@
     setState({ ws: null }, 'handleWsClose');
     if (!shouldAttemptWsReconnect(event)) return;
 
+    if (event?.code === WRONG_SHARD_CLOSE_CODE && wsShard) {
+      connectWebSocket(state.matchId, { isReconnect: true });
+      return;
+    }
+
     if (AUTH_CLOSE_CODES.has(event?.code)) {
       const refreshed = await refreshAccessToken();
       if (!refreshed) {
@@ -1299,7 +1306,11 @@
     updateWsIndicator('offline');
     const token = getAccessToken();
     const protocol = window.location.protocol === 'https:' ? 'wss' : 'ws';
-    const url = `${protocol}://${window.location.host}/ws/games/${gameId}${token ? `?token=${encodeURIComponent(token)}` : ''}`;
+    const params = new URLSearchParams();
+    if (token) params.set('token', token);
+    if (wsShard) params.set('shard', wsShard);
+    const query = params.toString();
+    const url = `${protocol}://${window.location.host}/ws/games/${gameId}${query ? `?${query}` : ''}`;
     try {
       const ws = new WebSocket(url);
       setState({ ws }, 'connectWebSocket:init');
@@ -1314,6 +1325,14 @@
       ws.onmessage = (event) => {
         try {
           const payload = JSON.parse(event.data);
+          if (payload && payload.type === 'ping') {
+            ws.send(JSON.stringify({ type: 'pong' }));
+            return;
+          }
+          if (payload && payload.type === 'shard_redirect') {
+            wsShard = payload.shard;
+            return;
+          }
           handleWsPayload(payload);
         } catch (err) {
           console.error('WS parse error', err);
@@ -9,12 +9,18 @@ from .kafka import (
 from .database import Base, create_database_engines, make_get_db, resolve_async_url
 from .security import (
     CurrentUser,
+    JwksKeyStore,
+    VerifiedTokenCache,
     bearer_scheme,
     decode_access_token,
+    get_jwks_store,
     make_get_current_user,
     make_get_current_user_id,
+    verified_token_cache,
+    verify_access_token,
 )
 from .config import BaseServiceSettings, make_get_settings
+from .leader import LeaderElection, advisory_lock_key
 
 __all__ = [
     "configure_observability",
@@ -30,10 +36,15 @@ __all__ = [
     "resolve_async_url",
     # Security
     "CurrentUser",
+    "JwksKeyStore",
+    "VerifiedTokenCache",
     "bearer_scheme",
     "decode_access_token",
+    "get_jwks_store",
     "make_get_current_user",
     "make_get_current_user_id",
+    "verified_token_cache",
+    "verify_access_token",
     # Config
     "BaseServiceSettings",
     "make_get_settings",
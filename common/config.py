@@ -11,8 +11,13 @@ class BaseServiceSettings(BaseSettings):
 	app_name: str
 	database_url: str
 	database_url_async: str | None = None
-	jwt_secret: str
+	# Общий секрет HS-подписи; не нужен сервисам, которые проверяют токены по JWKS
+	jwt_secret: str | None = None
 	jwt_algorithm: str = "HS256"
+	# JWKS auth_service (например http://auth:8000/api/auth/.well-known/jwks.json):
+	# access токены проверяются открытыми ключами, которые обновляются в фоне
+	jwt_jwks_url: str | None = None
+	jwt_jwks_refresh_seconds: float = 300.0
 	metrics_enabled: bool = True
 	
 	# Настройки пула соединений с базой данных
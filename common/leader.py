@@ -0,0 +1,116 @@
+"""Выбор лидера для фоновых задач через advisory-блокировки Postgres."""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import hashlib
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+LOGGER = logging.getLogger(__name__)
+
+
+def advisory_lock_key(name: str) -> int:
+	"""
+	Преобразует имя задачи в 64-битный ключ для pg_advisory_lock.
+
+	Args:
+		name: Уникальное в кластере имя задачи (например, "games:timeout-watchdog")
+
+	Returns:
+		Знаковое 64-битное целое (тип bigint в Postgres)
+	"""
+	digest = hashlib.sha1(name.encode("utf-8")).digest()
+	return int.from_bytes(digest[:8], "big", signed=True)
+
+
+class LeaderElection:
+	"""
+	Лидер среди процессов всех реплик, захвативший pg_try_advisory_lock.
+
+	Лидер держит отдельное соединение с блокировкой и периодически проверяет его.
+	Если процесс лидера падает или соединение рвётся, Postgres снимает блокировку
+	и её захватывает следующий кандидат при очередной попытке (failover занимает
+	не больше retry_interval). Периодические задачи проверяют `is_leader` перед
+	каждой итерацией, поэтому выполняются один раз на кластер.
+	"""
+
+	def __init__(self, engine: AsyncEngine, name: str, *, retry_interval: float = 5.0) -> None:
+		self.name = name
+		self.lock_key = advisory_lock_key(name)
+		self._engine = engine
+		self._retry_interval = retry_interval
+		self._connection: AsyncConnection | None = None
+		self._task: asyncio.Task | None = None
+
+	@property
+	def is_leader(self) -> bool:
+		return self._connection is not None
+
+	def start(self) -> None:
+		if self._task and not self._task.done():
+			return
+		self._task = asyncio.create_task(self._run(), name=f"leader-election:{self.name}")
+
+	async def stop(self) -> None:
+		if self._task:
+			self._task.cancel()
+			with contextlib.suppress(asyncio.CancelledError):
+				await self._task
+			self._task = None
+		await self._release()
+
+	async def _run(self) -> None:
+		while True:
+			try:
+				if self.is_leader:
+					await self._check()
+				else:
+					await self._try_acquire()
+			except asyncio.CancelledError:
+				raise
+			except Exception:  # pragma: no cover - defensive logging
+				LOGGER.exception("Leader election %s iteration failed", self.name)
+				await self._release()
+			await asyncio.sleep(self._retry_interval)
+
+	async def _try_acquire(self) -> None:
+		connection = await self._engine.connect()
+		try:
+			# AUTOCOMMIT: соединение лидера не должно висеть в открытой транзакции
+			await connection.execution_options(isolation_level="AUTOCOMMIT")
+			acquired = await connection.scalar(
+				text("SELECT pg_try_advisory_lock(:key)"), {"key": self.lock_key}
+			)
+		except Exception:
+			await connection.close()
+			raise
+		if not acquired:
+			await connection.close()
+			return
+		self._connection = connection
+		LOGGER.info("Became leader for %s", self.name)
+
+	async def _check(self) -> None:
+		assert self._connection is not None
+		try:
+			await self._connection.execute(text("SELECT 1"))
+		except Exception:
+			LOGGER.warning("Lost leadership for %s: lock connection is broken", self.name)
+			await self._release(invalidate=True)
+
+	async def _release(self, *, invalidate: bool = False) -> None:
+		connection, self._connection = self._connection, None
+		if connection is None:
+			return
+		with contextlib.suppress(Exception):
+			if invalidate:
+				await connection.invalidate()
+			else:
+				await connection.execute(
+					text("SELECT pg_advisory_unlock(:key)"), {"key": self.lock_key}
+				)
+		with contextlib.suppress(Exception):
+			await connection.close()
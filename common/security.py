@@ -1,15 +1,35 @@
 """Общие функции безопасности для всех сервисов."""
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
 from dataclasses import dataclass
-from datetime import datetime, timezone
 from typing import Callable
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError, jwt
+from prometheus_client import Counter
 
 
+LOGGER = logging.getLogger(__name__)
+
 bearer_scheme = HTTPBearer(auto_error=True)
 
+JWKS_REFRESHES = Counter(
+	"jwt_jwks_refresh_total",
+	"Attempts to fetch the auth_service JWKS",
+	["result"],
+)
+TOKEN_CACHE_REQUESTS = Counter(
+	"jwt_verify_cache_requests_total",
+	"Lookups in the verified access token cache",
+	["result"],
+)
+
 
 @dataclass
 class CurrentUser:
@@ -18,18 +38,72 @@ class CurrentUser:
 	token: str
 
 
+class VerifiedTokenCache:
+	"""
+	LRU уже проверенных access токенов.
+	
+	Ключ — SHA-256 от токена вместе с секретом и алгоритмом, значение — id
+	пользователя и exp. Запись живёт не дольше срока действия токена, поэтому
+	повторный запрос с тем же токеном пропускает проверку подписи и разбор claims.
+	Невалидные токены не кэшируются.
+	"""
+
+	def __init__(self, max_entries: int = 10_000) -> None:
+		self.max_entries = max_entries
+		self._entries: OrderedDict[bytes, tuple[int, float]] = OrderedDict()
+		self._lock = threading.Lock()
+
+	def __len__(self) -> int:
+		return len(self._entries)
+
+	@staticmethod
+	def key(token: str, jwt_secret: str, jwt_algorithm: str) -> bytes:
+		return hashlib.sha256(f"{jwt_algorithm}\0{jwt_secret}\0{token}".encode("utf-8")).digest()
+
+	def get(self, key: bytes) -> int | None:
+		now = time.time()
+		with self._lock:
+			entry = self._entries.get(key)
+			if entry is not None and entry[1] <= now:
+				del self._entries[key]
+				entry = None
+			if entry is not None:
+				self._entries.move_to_end(key)
+		TOKEN_CACHE_REQUESTS.labels("hit" if entry is not None else "miss").inc()
+		return entry[0] if entry is not None else None
+
+	def put(self, key: bytes, user_id: int, expires_at: float) -> None:
+		if self.max_entries <= 0:
+			return
+		with self._lock:
+			self._entries[key] = (user_id, expires_at)
+			self._entries.move_to_end(key)
+			while len(self._entries) > self.max_entries:
+				self._entries.popitem(last=False)
+
+	def clear(self) -> None:
+		with self._lock:
+			self._entries.clear()
+
+
+verified_token_cache = VerifiedTokenCache()
+
+
 def decode_access_token(
 	token: str,
-	jwt_secret: str,
+	jwt_secret: str | dict | None,
 	jwt_algorithm: str = "HS256",
+	*,
+	cache: VerifiedTokenCache | None = verified_token_cache,
 ) -> CurrentUser:
 	"""
 	Декодирует и валидирует access токен.
 	
 	Args:
 		token: JWT токен
-		jwt_secret: Секретный ключ для подписи токена
+		jwt_secret: Секретный ключ HS-подписи или открытый ключ (JWK) из JWKS
 		jwt_algorithm: Алгоритм подписи (по умолчанию HS256)
+		cache: Кэш проверенных токенов (None — проверять каждый раз)
 	
 	Returns:
 		CurrentUser: Объект с id пользователя и токеном
@@ -37,6 +111,16 @@ def decode_access_token(
 	Raises:
 		HTTPException: Если токен невалиден, истек или имеет неверный тип
 	"""
+	if not jwt_secret:
+		raise HTTPException(status.HTTP_401_UNAUTHORIZED, detail="Token verification is not configured")
+	cache_key = None
+	if cache is not None:
+		key_material = jwt_secret if isinstance(jwt_secret, str) else json.dumps(jwt_secret, sort_keys=True)
+		cache_key = cache.key(token, key_material, jwt_algorithm)
+		user_id = cache.get(cache_key)
+		if user_id is not None:
+			return CurrentUser(id=user_id, token=token)
+
 	try:
 		payload = jwt.decode(token, jwt_secret, algorithms=[jwt_algorithm])
 	except JWTError:
@@ -46,25 +130,152 @@ def decode_access_token(
 		raise HTTPException(status.HTTP_401_UNAUTHORIZED, detail="Invalid token type")
 
 	exp = payload.get("exp")
-	if exp and datetime.fromtimestamp(exp, tz=timezone.utc) < datetime.now(timezone.utc):
+	if exp and exp < time.time():
 		raise HTTPException(status.HTTP_401_UNAUTHORIZED, detail="Token expired")
 
 	sub = payload.get("sub")
 	if not sub:
 		raise HTTPException(status.HTTP_401_UNAUTHORIZED, detail="Invalid token payload")
 
-	return CurrentUser(id=int(sub), token=token)
+	user_id = int(sub)
+	# Токены без exp не кэшируем: запись жила бы бесконечно
+	if cache_key is not None and exp:
+		cache.put(cache_key, user_id, float(exp))
+	return CurrentUser(id=user_id, token=token)
+
+
+class JwksKeyStore:
+	"""
+	Открытые ключи auth_service (JWKS) для локальной проверки access токенов.
+	
+	Ключи обновляются фоновой задачей раз в refresh_interval. Токен с неизвестным
+	kid (auth_service только что перешёл на новый ключ) вызывает внеочередное
+	обновление, но не чаще раза в min_refresh_interval. Если обновиться не удалось,
+	продолжают действовать ранее полученные ключи. Кэш проверенных токенов
+	привязан к самому ключу, поэтому смена ключа не сбрасывает записи старых токенов.
+	"""
+
+	def __init__(
+		self,
+		url: str,
+		*,
+		refresh_interval: float = 300.0,
+		min_refresh_interval: float = 10.0,
+		timeout: float = 5.0,
+	) -> None:
+		self.url = url
+		self._refresh_interval = refresh_interval
+		self._min_refresh_interval = min_refresh_interval
+		self._timeout = timeout
+		self._keys: dict[str, dict] = {}
+		self._last_attempt = float("-inf")
+		self._lock: asyncio.Lock | None = None
+		self._task: asyncio.Task | None = None
+
+	def __len__(self) -> int:
+		return len(self._keys)
+
+	async def get(self, kid: str | None) -> dict | None:
+		self._ensure_refresher()
+		if not kid:
+			return None
+		key = self._keys.get(kid)
+		if key is None and time.monotonic() - self._last_attempt >= self._min_refresh_interval:
+			await self.refresh()
+			key = self._keys.get(kid)
+		return key
+
+	async def refresh(self, *, force: bool = False) -> None:
+		if self._lock is None:
+			self._lock = asyncio.Lock()
+		async with self._lock:
+			# Пока ждали блокировку, ключи мог обновить параллельный запрос
+			if not force and time.monotonic() - self._last_attempt < self._min_refresh_interval:
+				return
+			self._last_attempt = time.monotonic()
+			try:
+				import httpx
+
+				async with httpx.AsyncClient(timeout=self._timeout) as client:
+					response = await client.get(self.url)
+					response.raise_for_status()
+					keys = {key["kid"]: key for key in response.json().get("keys", []) if key.get("kid")}
+			except Exception as exc:
+				JWKS_REFRESHES.labels("error").inc()
+				LOGGER.warning("Failed to fetch JWKS from %s: %s", self.url, exc)
+				return
+			self._keys = keys
+			JWKS_REFRESHES.labels("ok").inc()
+
+	def _ensure_refresher(self) -> None:
+		if self._task is None or self._task.done():
+			self._task = asyncio.get_running_loop().create_task(self._run(), name="jwks-refresh")
+
+	async def _run(self) -> None:
+		while True:
+			if self._keys:
+				await asyncio.sleep(self._refresh_interval)
+			else:
+				await asyncio.sleep(self._min_refresh_interval)
+			await self.refresh(force=True)
+
+
+_jwks_stores: dict[str, JwksKeyStore] = {}
+
+
+def get_jwks_store(url: str, *, refresh_interval: float = 300.0) -> JwksKeyStore:
+	"""Один JwksKeyStore на URL на процесс."""
+	store = _jwks_stores.get(url)
+	if store is None:
+		store = _jwks_stores[url] = JwksKeyStore(url, refresh_interval=refresh_interval)
+	return store
+
+
+async def verify_access_token(
+	token: str,
+	settings,
+	*,
+	cache: VerifiedTokenCache | None = verified_token_cache,
+) -> CurrentUser:
+	"""
+	Проверяет access токен по настройкам сервиса.
+	
+	Если задан jwt_jwks_url, подпись проверяется открытым ключом из JWKS
+	auth_service (по kid из заголовка токена), иначе — общим jwt_secret.
+	
+	Raises:
+		HTTPException: Если токен невалиден, истек или подписан неизвестным ключом
+	"""
+	jwks_url = getattr(settings, "jwt_jwks_url", None)
+	if not jwks_url:
+		return decode_access_token(token, settings.jwt_secret, settings.jwt_algorithm, cache=cache)
+
+	try:
+		header = jwt.get_unverified_header(token)
+	except JWTError:
+		raise HTTPException(status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+	store = get_jwks_store(
+		jwks_url, refresh_interval=getattr(settings, "jwt_jwks_refresh_seconds", 300.0)
+	)
+	key = await store.get(header.get("kid"))
+	if key is None:
+		raise HTTPException(status.HTTP_401_UNAUTHORIZED, detail="Unknown signing key")
+	# Алгоритм берётся из ключа, а не из заголовка токена
+	return decode_access_token(token, key, key.get("alg", "ES256"), cache=cache)
 
 
 def make_get_current_user(
 	get_settings: Callable,
+	*,
+	cache: VerifiedTokenCache | None = verified_token_cache,
 ) -> Callable:
 	"""
 	Создает функцию get_current_user для использования в FastAPI зависимостях.
 	
 	Args:
 		get_settings: Функция для получения настроек (должна возвращать объект с атрибутами:
-			jwt_secret, jwt_algorithm)
+			jwt_secret, jwt_algorithm и, для проверки по JWKS, jwt_jwks_url)
+		cache: Кэш проверенных токенов; по умолчанию общий для процесса
 	
 	Returns:
 		Функция get_current_user для использования в Depends()
@@ -72,12 +283,7 @@ def make_get_current_user(
 	async def get_current_user(
 		credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
 	) -> CurrentUser:
-		settings = get_settings()
-		return decode_access_token(
-			credentials.credentials,
-			settings.jwt_secret,
-			settings.jwt_algorithm,
-		)
+		return await verify_access_token(credentials.credentials, get_settings(), cache=cache)
 	
 	return get_current_user
 
@@ -0,0 +1,90 @@
+"""
+Заполнение индекса позиций для уже завершённых партий:
+python -m app.backfill_positions [--batch-size N]
+
+Идёт по партиям keyset-пагинацией по id и пропускает уже проиндексированные,
+поэтому команду можно прервать и перезапустить.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from itertools import groupby
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from .config import get_settings
+from .database import sync_engine
+from .main import apply_sql_migrations
+from .models import GamePosition
+from .positions import position_rows
+
+PENDING_GAMES_SQL = text(
+	"""
+	SELECT g.id, g.initial_pos, g.result
+	FROM games g
+	WHERE g.status = 'FINISHED'
+		AND g.white_id IS DISTINCT FROM :bot_id
+		AND g.black_id IS DISTINCT FROM :bot_id
+		AND (CAST(:after AS UUID) IS NULL OR g.id > CAST(:after AS UUID))
+		AND NOT EXISTS (SELECT 1 FROM game_positions p WHERE p.game_id = g.id)
+	ORDER BY g.id
+	LIMIT :limit
+	"""
+)
+
+MOVES_SQL = text(
+	"""
+	SELECT game_id, uci
+	FROM moves
+	WHERE game_id = ANY(CAST(:game_ids AS UUID[]))
+	ORDER BY game_id, move_index
+	"""
+)
+
+
+def backfill(batch_size: int) -> int:
+	# Партии с ботом в индекс позиций не попадают (см. GameService._finish_game)
+	bot_id = get_settings().bot_user_id
+	indexed = 0
+	after = None
+	while True:
+		with sync_engine.begin() as conn:
+			games = conn.execute(
+				PENDING_GAMES_SQL, {"after": after, "limit": batch_size, "bot_id": bot_id}
+			).all()
+			if not games:
+				return indexed
+			game_ids = [str(row.id) for row in games]
+			moves = {
+				str(game_id): [row.uci for row in group]
+				for game_id, group in groupby(
+					conn.execute(MOVES_SQL, {"game_ids": game_ids}), key=lambda row: row.game_id
+				)
+			}
+			rows = []
+			for game in games:
+				game_id = str(game.id)
+				rows.extend(
+					position_rows(UUID(game_id), game.initial_pos, moves.get(game_id, []), game.result)
+				)
+			conn.execute(pg_insert(GamePosition.__table__).on_conflict_do_nothing(), rows)
+		indexed += len(games)
+		after = game_ids[-1]
+		print(f"indexed {indexed} games", file=sys.stderr, flush=True)
+
+
+def main(argv: list[str] | None = None) -> int:
+	parser = argparse.ArgumentParser(description="Backfill the position index for finished games")
+	parser.add_argument("--batch-size", type=int, default=500)
+	args = parser.parse_args(argv)
+
+	apply_sql_migrations()
+	print(f"Indexed {backfill(args.batch_size)} games")
+	return 0
+
+
+if __name__ == "__main__":
+	raise SystemExit(main())
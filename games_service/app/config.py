@@ -4,6 +4,80 @@ from common import BaseServiceSettings, make_get_settings
 class Settings(BaseServiceSettings):
 	app_name: str = "Games Service"
 
+	# WebSocket: heartbeat и лимиты соединений (0 — без ограничения)
+	ws_heartbeat_interval_seconds: int = 20
+	ws_idle_timeout_seconds: int = 60
+	ws_max_connections_per_user: int = 20
+	ws_max_connections_per_ip: int = 100
+	ws_max_connections_per_game: int = 500
 
-get_settings = make_get_settings(Settings)
+	# Token bucket на входящие WS-кадры: на соединение и на пользователя
+	ws_frame_rate_per_second: float = 5.0
+	ws_frame_burst: int = 10
+	ws_user_frame_rate_per_second: float = 10.0
+	ws_user_frame_burst: int = 20
+
+	# Дедупликация повторных make_move по client_move_id
+	move_dedupe_ttl_seconds: int = 120
+	move_dedupe_max_entries: int = 50000
+
+	# Opt-in, только вместе с шардированием: команды партии выстраиваются в очередь
+	# asyncio-актора на реплике-владельце (блокировка строки при этом сохраняется)
+	games_actor_mode: bool = False
+	games_actor_idle_seconds: int = 300
+
+	# Консистентное хеширование партий по процессам (None — шардирование выключено)
+	games_shard_member: str | None = None
+	games_shard_members: str | None = None
+	games_shard_vnodes: int = 128
+	games_shard_heartbeat_seconds: int = 5
+	games_shard_member_ttl_seconds: int = 20
+	games_shard_port: int = 8000
+	games_shard_forward_timeout_seconds: float = 10.0
+	# Общий секрет реплик: без него пометку X-Games-Shard-Hop мог бы подделать клиент
+	games_shard_internal_token: str | None = None
+
+	# Массовый импорт PGN через API: процессов разбора немного, чтобы не отнимать ядра
+	# у ходов, ботов и разбора партий (крупные загрузки — python -m app.import_pgn);
+	# без pgn_import_token эндпоинт выключен
+	pgn_import_workers: int = 2
+	pgn_import_token: str | None = None
+	pgn_import_chunk_games: int = 200
+	pgn_import_max_bytes: int = 512 * 1024 * 1024
+
+	# Рейтинги Glicko-2: длительность рейтингового периода и системная константа tau
+	rating_period_seconds: int = 3600
+	glicko_tau: float = 0.5
 
+	# Подбор соперника /ws/seek: окно разницы рейтингов расширяется со временем ожидания
+	seek_initial_window: float = 100.0
+	seek_window_growth_per_second: float = 25.0
+	seek_max_window: float = 600.0
+	seek_sweep_interval_seconds: float = 1.0
+
+	# Турниры: такт директора, частота сохранения таблицы, срок на первый ход и после
+	# скольких неявок подряд игрок снимается с турнира (0 — не снимать)
+	tournament_tick_seconds: float = 2.0
+	tournament_checkpoint_seconds: int = 10
+	tournament_first_move_seconds: int = 60
+	tournament_max_no_shows: int = 2
+
+	# Компьютерный соперник: зарезервированный user_id, размер пула процессов поиска
+	# (ограничивает число ядер под ботов) и верхние пределы глубины и узлов на ход
+	bot_user_id: int = -1
+	bot_workers: int = 2
+	bot_max_depth: int = 5
+	bot_max_nodes: int = 300_000
+	bot_tt_entries: int = 200_000
+
+	# Разбор партий: пачка партий за проход лидера, пул процессов, глубина и бюджет на позицию;
+	# партия, забранная в работу дольше analysis_lease_seconds назад, считается брошенной
+	analysis_interval_seconds: float = 10.0
+	analysis_batch_games: int = 20
+	analysis_workers: int = 2
+	analysis_depth: int = 3
+	analysis_node_budget: int = 30_000
+	analysis_lease_seconds: float = 600.0
+
+
+get_settings = make_get_settings(Settings)
@@ -0,0 +1,292 @@
+"""
+Компьютерный соперник: альфа-бета поиск на чистом Python поверх python-chess.
+
+Модуль не зависит от приложения и выполняется в процессах пула (services/bot.py).
+Таблица транспозиций живёт на уровне модуля и переиспользуется всеми поисками
+процесса-воркера: ответ на следующий ход той же партии начинается с уже
+просчитанных позиций.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import chess
+import chess.polyglot
+
+MATE_SCORE = 100_000
+MATE_THRESHOLD = MATE_SCORE - 1_000
+INFINITY = MATE_SCORE + 1
+
+EXACT, LOWER, UPPER = 0, 1, 2
+
+PIECE_VALUES = {
+	chess.PAWN: 100,
+	chess.KNIGHT: 320,
+	chess.BISHOP: 330,
+	chess.ROOK: 500,
+	chess.QUEEN: 900,
+	chess.KING: 0,
+}
+
+# Таблицы «фигура-поле» для белых, первая строка — восьмая горизонталь
+PIECE_SQUARE_TABLES = {
+	chess.PAWN: (
+		0, 0, 0, 0, 0, 0, 0, 0,
+		50, 50, 50, 50, 50, 50, 50, 50,
+		10, 10, 20, 30, 30, 20, 10, 10,
+		5, 5, 10, 25, 25, 10, 5, 5,
+		0, 0, 0, 20, 20, 0, 0, 0,
+		5, -5, -10, 0, 0, -10, -5, 5,
+		5, 10, 10, -20, -20, 10, 10, 5,
+		0, 0, 0, 0, 0, 0, 0, 0,
+	),
+	chess.KNIGHT: (
+		-50, -40, -30, -30, -30, -30, -40, -50,
+		-40, -20, 0, 0, 0, 0, -20, -40,
+		-30, 0, 10, 15, 15, 10, 0, -30,
+		-30, 5, 15, 20, 20, 15, 5, -30,
+		-30, 0, 15, 20, 20, 15, 0, -30,
+		-30, 5, 10, 15, 15, 10, 5, -30,
+		-40, -20, 0, 5, 5, 0, -20, -40,
+		-50, -40, -30, -30, -30, -30, -40, -50,
+	),
+	chess.BISHOP: (
+		-20, -10, -10, -10, -10, -10, -10, -20,
+		-10, 0, 0, 0, 0, 0, 0, -10,
+		-10, 0, 5, 10, 10, 5, 0, -10,
+		-10, 5, 5, 10, 10, 5, 5, -10,
+		-10, 0, 10, 10, 10, 10, 0, -10,
+		-10, 10, 10, 10, 10, 10, 10, -10,
+		-10, 5, 0, 0, 0, 0, 5, -10,
+		-20, -10, -10, -10, -10, -10, -10, -20,
+	),
+	chess.ROOK: (
+		0, 0, 0, 0, 0, 0, 0, 0,
+		5, 10, 10, 10, 10, 10, 10, 5,
+		-5, 0, 0, 0, 0, 0, 0, -5,
+		-5, 0, 0, 0, 0, 0, 0, -5,
+		-5, 0, 0, 0, 0, 0, 0, -5,
+		-5, 0, 0, 0, 0, 0, 0, -5,
+		-5, 0, 0, 0, 0, 0, 0, -5,
+		0, 0, 0, 5, 5, 0, 0, 0,
+	),
+	chess.QUEEN: (
+		-20, -10, -10, -5, -5, -10, -10, -20,
+		-10, 0, 0, 0, 0, 0, 0, -10,
+		-10, 0, 5, 5, 5, 5, 0, -10,
+		-5, 0, 5, 5, 5, 5, 0, -5,
+		0, 0, 5, 5, 5, 5, 0, -5,
+		-10, 5, 5, 5, 5, 5, 0, -10,
+		-10, 0, 5, 0, 0, 0, 0, -10,
+		-20, -10, -10, -5, -5, -10, -10, -20,
+	),
+	chess.KING: (
+		-30, -40, -40, -50, -50, -40, -40, -30,
+		-30, -40, -40, -50, -50, -40, -40, -30,
+		-30, -40, -40, -50, -50, -40, -40, -30,
+		-30, -40, -40, -50, -50, -40, -40, -30,
+		-20, -30, -30, -40, -40, -30, -30, -20,
+		-10, -20, -20, -20, -20, -20, -20, -10,
+		20, 20, 0, 0, 0, 0, 20, 20,
+		20, 30, 10, 0, 0, 10, 30, 20,
+	),
+}
+
+_TABLE: dict[int, tuple[int, int, int, chess.Move | None]] = {}
+
+
+class _BudgetExhausted(Exception):
+	pass
+
+
+@dataclass(frozen=True)
+class SearchResult:
+	uci: str | None
+	score: int
+	depth: int
+	nodes: int
+
+
+def evaluate(board: chess.Board) -> int:
+	"""Материал и положение фигур в сантипешках с точки зрения стороны, которая ходит."""
+	score = 0
+	for piece_type, table in PIECE_SQUARE_TABLES.items():
+		value = PIECE_VALUES[piece_type]
+		for square in chess.scan_forward(board.pieces_mask(piece_type, chess.WHITE)):
+			score += value + table[square ^ 56]
+		for square in chess.scan_forward(board.pieces_mask(piece_type, chess.BLACK)):
+			score -= value + table[square]
+	return score if board.turn == chess.WHITE else -score
+
+
+def _to_table(score: int, ply: int) -> int:
+	# Мат хранится как расстояние от узла, а не от корня
+	if score >= MATE_THRESHOLD:
+		return score + ply
+	if score <= -MATE_THRESHOLD:
+		return score - ply
+	return score
+
+
+def _from_table(score: int, ply: int) -> int:
+	if score >= MATE_THRESHOLD:
+		return score - ply
+	if score <= -MATE_THRESHOLD:
+		return score + ply
+	return score
+
+
+class _Search:
+	def __init__(self, board: chess.Board, node_budget: int, table: dict) -> None:
+		self.board = board
+		self.node_budget = node_budget
+		self.table = table
+		self.nodes = 0
+
+	def _visit(self) -> None:
+		self.nodes += 1
+		if self.nodes > self.node_budget:
+			raise _BudgetExhausted
+
+	def ordered(self, moves, tt_move: chess.Move | None) -> list[chess.Move]:
+		board = self.board
+
+		def priority(move: chess.Move) -> int:
+			if move == tt_move:
+				return 1_000_000
+			score = PIECE_VALUES[move.promotion] if move.promotion else 0
+			if board.is_capture(move):
+				victim = board.piece_type_at(move.to_square) or chess.PAWN
+				attacker = board.piece_type_at(move.from_square) or chess.PAWN
+				score += 10_000 + 10 * PIECE_VALUES[victim] - PIECE_VALUES[attacker]
+			return score
+
+		return sorted(moves, key=priority, reverse=True)
+
+	def negamax(self, depth: int, alpha: int, beta: int, ply: int) -> int:
+		self._visit()
+		board = self.board
+		if ply and (
+			board.halfmove_clock >= 100 or board.is_repetition(2) or board.is_insufficient_material()
+		):
+			return 0
+
+		key = chess.polyglot.zobrist_hash(board)
+		entry = self.table.get(key)
+		tt_move = None
+		if entry is not None:
+			entry_depth, entry_score, flag, tt_move = entry
+			if ply and entry_depth >= depth:
+				score = _from_table(entry_score, ply)
+				if flag == EXACT:
+					return score
+				if flag == LOWER and score >= beta:
+					return score
+				if flag == UPPER and score <= alpha:
+					return score
+
+		in_check = board.is_check()
+		if in_check:
+			depth += 1
+		if depth <= 0:
+			return self.quiesce(alpha, beta, ply)
+
+		moves = self.ordered(board.legal_moves, tt_move)
+		if not moves:
+			return -(MATE_SCORE - ply) if in_check else 0
+
+		original_alpha = alpha
+		best_score, best_move = -INFINITY, None
+		for move in moves:
+			board.push(move)
+			try:
+				score = -self.negamax(depth - 1, -beta, -alpha, ply + 1)
+			finally:
+				board.pop()
+			if score > best_score:
+				best_score, best_move = score, move
+			if score > alpha:
+				alpha = score
+			if alpha >= beta:
+				break
+
+		if best_score <= original_alpha:
+			flag = UPPER
+		elif best_score >= beta:
+			flag = LOWER
+		else:
+			flag = EXACT
+		self.table[key] = (depth, _to_table(best_score, ply), flag, best_move)
+		return best_score
+
+	def quiesce(self, alpha: int, beta: int, ply: int) -> int:
+		"""Досчитывает взятия, чтобы оценка не обрывалась посреди размена."""
+		self._visit()
+		board = self.board
+		if board.is_check():
+			moves = self.ordered(board.legal_moves, None)
+			if not moves:
+				return -(MATE_SCORE - ply)
+			best = -INFINITY
+		else:
+			best = evaluate(board)
+			if best >= beta:
+				return best
+			alpha = max(alpha, best)
+			moves = self.ordered(board.generate_legal_captures(), None)
+
+		for move in moves:
+			board.push(move)
+			try:
+				score = -self.quiesce(-beta, -alpha, ply + 1)
+			finally:
+				board.pop()
+			if score > best:
+				best = score
+			if score >= beta:
+				return score
+			alpha = max(alpha, score)
+		return best
+
+
+def search(fen: str, *, max_depth: int, node_budget: int, table_entries: int = 200_000) -> SearchResult:
+	"""
+	Итеративное углубление до max_depth, пока не исчерпан бюджет узлов.
+
+	Returns:
+		Лучший ход последней полностью просчитанной глубины и оценка с точки
+		зрения стороны, которая ходит; uci=None — ходов нет (мат или пат)
+	"""
+	board = chess.Board(fen)
+	legal = list(board.legal_moves)
+	if not legal:
+		return SearchResult(uci=None, score=-MATE_SCORE if board.is_check() else 0, depth=0, nodes=0)
+	if len(_TABLE) > table_entries:
+		_TABLE.clear()
+
+	searcher = _Search(board, node_budget, _TABLE)
+	root_key = chess.polyglot.zobrist_hash(board)
+	best = SearchResult(
+		uci=searcher.ordered(legal, None)[0].uci(), score=evaluate(board), depth=0, nodes=0
+	)
+	for depth in range(1, max_depth + 1):
+		try:
+			score = searcher.negamax(depth, -INFINITY, INFINITY, 0)
+		except _BudgetExhausted:
+			break
+		entry = _TABLE.get(root_key)
+		if entry is not None and entry[3] is not None:
+			best = SearchResult(uci=entry[3].uci(), score=score, depth=depth, nodes=searcher.nodes)
+		if abs(score) >= MATE_THRESHOLD:
+			break
+	return SearchResult(uci=best.uci, score=best.score, depth=best.depth, nodes=searcher.nodes)
+
+
+def analyse_positions(
+	fens: list[str], *, max_depth: int, node_budget: int, table_entries: int = 200_000
+) -> list[SearchResult]:
+	"""Оценивает пачку позиций за один вызов воркера (меньше накладных расходов на IPC)."""
+	return [
+		search(fen, max_depth=max_depth, node_budget=node_budget, table_entries=table_entries)
+		for fen in fens
+	]
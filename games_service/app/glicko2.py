@@ -0,0 +1,136 @@
+"""
+Glicko-2 (Glickman, 2012), векторизованный на NumPy.
+
+Все партии рейтингового периода обрабатываются одним пакетом: ожидания и
+суммы по игрокам считаются операциями над массивами и np.bincount, а итерация
+Illinois для волатильности идёт одновременно для всех игроков по маске.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+SCALE = 173.7178
+DEFAULT_RATING = 1500.0
+DEFAULT_RD = 350.0
+DEFAULT_VOLATILITY = 0.06
+MIN_RD = 30.0
+CONVERGENCE_EPSILON = 1e-6
+MAX_ITERATIONS = 100
+
+
+@dataclass
+class RatingBatch:
+	rating: np.ndarray
+	rd: np.ndarray
+	volatility: np.ndarray
+
+
+def _g(phi: np.ndarray) -> np.ndarray:
+	return 1.0 / np.sqrt(1.0 + 3.0 * phi**2 / np.pi**2)
+
+
+def inflate_rd(rd: np.ndarray, volatility: np.ndarray, idle_periods: np.ndarray) -> np.ndarray:
+	"""RD после idle_periods периодов без партий (шаг 6 алгоритма для неактивных)."""
+	phi = rd / SCALE
+	phi = np.sqrt(phi**2 + idle_periods * volatility**2)
+	return np.minimum(phi * SCALE, DEFAULT_RD)
+
+
+def _new_volatility(
+	sigma: np.ndarray,
+	phi: np.ndarray,
+	v: np.ndarray,
+	delta: np.ndarray,
+	tau: float,
+) -> np.ndarray:
+	a = np.log(sigma**2)
+	delta2 = delta**2
+	phi2 = phi**2
+
+	def f(x: np.ndarray) -> np.ndarray:
+		ex = np.exp(x)
+		return ex * (delta2 - phi2 - v - ex) / (2.0 * (phi2 + v + ex) ** 2) - (x - a) / tau**2
+
+	big = delta2 > phi2 + v
+	A = a.copy()
+	B = np.where(big, np.log(np.where(big, delta2 - phi2 - v, 1.0)), a - tau)
+	# Для остальных подбираем B = a - k*tau, пока f(B) < 0
+	searching = ~big & (f(B) < 0)
+	k = 1
+	while searching.any() and k < MAX_ITERATIONS:
+		k += 1
+		B = np.where(searching, a - k * tau, B)
+		searching &= f(B) < 0
+
+	fA = f(A)
+	fB = f(B)
+	active = np.abs(B - A) > CONVERGENCE_EPSILON
+	for _ in range(MAX_ITERATIONS):
+		if not active.any():
+			break
+		C = A + (A - B) * fA / (fB - fA)
+		fC = f(C)
+		swap = fC * fB <= 0
+		A = np.where(active & swap, B, A)
+		fA = np.where(active & swap, fB, np.where(active, fA / 2.0, fA))
+		B = np.where(active, C, B)
+		fB = np.where(active, fC, fB)
+		active &= np.abs(B - A) > CONVERGENCE_EPSILON
+	return np.exp(A / 2.0)
+
+
+def rate_period(
+	ratings: RatingBatch,
+	white: np.ndarray,
+	black: np.ndarray,
+	white_score: np.ndarray,
+	*,
+	tau: float = 0.5,
+) -> RatingBatch:
+	"""
+	Пересчитывает рейтинги игроков по партиям одного периода.
+
+	Args:
+		ratings: Рейтинги игроков до периода (индексы — позиции в массивах)
+		white, black: Индексы игроков каждой партии
+		white_score: Очки белых (1, 0.5, 0)
+		tau: Системная константа, ограничивающая изменение волатильности
+
+	Returns:
+		Новые рейтинги; у игроков без партий в периоде растёт только RD
+	"""
+	n = ratings.rating.shape[0]
+	mu = (ratings.rating - DEFAULT_RATING) / SCALE
+	phi = ratings.rd / SCALE
+	sigma = ratings.volatility
+
+	# Каждая партия — два наблюдения: с точки зрения белых и чёрных
+	player = np.concatenate([white, black])
+	opponent = np.concatenate([black, white])
+	score = np.concatenate([white_score, 1.0 - white_score])
+
+	g_opp = _g(phi[opponent])
+	expected = 1.0 / (1.0 + np.exp(-g_opp * (mu[player] - mu[opponent])))
+
+	info = np.bincount(player, weights=g_opp**2 * expected * (1.0 - expected), minlength=n)
+	improvement = np.bincount(player, weights=g_opp * (score - expected), minlength=n)
+	played = info > 0
+
+	v = np.divide(1.0, info, out=np.full(n, np.inf), where=played)
+	delta = np.where(played, v * improvement, 0.0)
+
+	new_sigma = sigma.copy()
+	if played.any():
+		new_sigma[played] = _new_volatility(sigma[played], phi[played], v[played], delta[played], tau)
+
+	phi_star = np.sqrt(phi**2 + new_sigma**2)
+	new_phi = np.where(played, 1.0 / np.sqrt(1.0 / phi_star**2 + np.where(played, info, 0.0)), phi_star)
+	new_mu = mu + np.where(played, new_phi**2 * improvement, 0.0)
+
+	return RatingBatch(
+		rating=new_mu * SCALE + DEFAULT_RATING,
+		rd=np.clip(new_phi * SCALE, MIN_RD, DEFAULT_RD),
+		volatility=new_sigma,
+	)
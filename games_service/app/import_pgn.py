@@ -0,0 +1,52 @@
+"""
+Консольный импорт PGN: python -m app.import_pgn games.pgn [--workers N] [--chunk-games N]
+
+Использует тот же конвейер, что и POST /api/games/import, но без лимита на размер файла.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+
+from .main import apply_sql_migrations
+from .services.pgn_import import ImportProgress, import_pgn
+
+
+def _print_progress(progress: ImportProgress) -> None:
+	print(
+		f"\rchunks={progress.chunks} games={progress.games_imported} "
+		f"skipped={progress.games_skipped} moves={progress.moves_imported} "
+		f"rate={progress.games_per_second:.0f} games/s",
+		end="",
+		file=sys.stderr,
+		flush=True,
+	)
+
+
+def main(argv: list[str] | None = None) -> int:
+	parser = argparse.ArgumentParser(description="Bulk import games from a PGN file")
+	parser.add_argument("path", help="PGN file, '-' for stdin")
+	parser.add_argument("--workers", type=int, default=None)
+	parser.add_argument("--chunk-games", type=int, default=None)
+	args = parser.parse_args(argv)
+
+	apply_sql_migrations()
+	if args.path == "-":
+		progress = import_pgn(
+			sys.stdin, workers=args.workers, games_per_chunk=args.chunk_games, on_progress=_print_progress
+		)
+	else:
+		with open(args.path, "r", encoding="utf-8", errors="replace") as source:
+			progress = import_pgn(
+				source, workers=args.workers, games_per_chunk=args.chunk_games, on_progress=_print_progress
+			)
+	print(file=sys.stderr)
+	print(
+		f"Imported {progress.games_imported} games ({progress.moves_imported} moves), "
+		f"skipped {progress.games_skipped} in {progress.elapsed_seconds:.1f}s"
+	)
+	return 0
+
+
+if __name__ == "__main__":
+	raise SystemExit(main())
@@ -6,7 +6,23 @@ from common import configure_observability
 
 from .config import get_settings
 from .database import get_db, sync_engine
-from .routers import games_router, games_ws_router
+from .realtime import heartbeat_reaper, stream_fanout
+from .services import (
+	analysis_scheduler,
+	bot_players,
+	game_actors,
+	matchmaker,
+	rating_period_scheduler,
+	tournament_director,
+)
+from .routers import (
+	games_router,
+	games_ws_router,
+	seek_ws_router,
+	stream_ws_router,
+	tournaments_router,
+)
+from .sharding import ShardRoutingMiddleware, shard_coordinator
 from .watchdog import timeout_watchdog
 
 
@@ -31,13 +47,34 @@ def apply_sql_migrations() -> None:
 
 @app.on_event("startup")
 async def run_startup_tasks() -> None:
+	if settings.games_actor_mode and not shard_coordinator.enabled:
+		# Без шардирования команды одной партии приходят на любую реплику, и акторы
+		# разных процессов всё равно упираются в блокировку строки — выигрыша нет
+		raise RuntimeError("GAMES_ACTOR_MODE requires sharding (GAMES_SHARD_MEMBER)")
 	apply_sql_migrations()
+	shard_coordinator.start()
 	timeout_watchdog.start()
+	heartbeat_reaper.start()
+	stream_fanout.start()
+	rating_period_scheduler.start()
+	matchmaker.start()
+	tournament_director.start()
+	bot_players.start()
+	analysis_scheduler.start()
 
 
 @app.on_event("shutdown")
 async def stop_watchdog() -> None:
 	await timeout_watchdog.stop()
+	await heartbeat_reaper.stop()
+	await stream_fanout.stop()
+	await rating_period_scheduler.stop()
+	await matchmaker.stop()
+	await tournament_director.stop()
+	await bot_players.stop()
+	await analysis_scheduler.stop()
+	await game_actors.stop_all()
+	await shard_coordinator.stop()
 
 
 configure_observability(
@@ -47,6 +84,12 @@ configure_observability(
 	extra_checks={},
 )
 
+app.add_middleware(ShardRoutingMiddleware, coordinator=shard_coordinator)
+
+# Турниры — до games_router, иначе /api/games/{game_id} перехватит путь
+app.include_router(tournaments_router)
 app.include_router(games_router)
 app.include_router(games_ws_router)
+app.include_router(stream_ws_router)
+app.include_router(seek_ws_router)
 
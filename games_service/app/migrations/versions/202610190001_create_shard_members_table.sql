@@ -0,0 +1,6 @@
+CREATE TABLE IF NOT EXISTS games_shard_members (
+	member TEXT PRIMARY KEY,
+	heartbeat_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS ix_games_shard_members_heartbeat_at ON games_shard_members (heartbeat_at);
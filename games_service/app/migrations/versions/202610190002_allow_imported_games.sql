@@ -0,0 +1,17 @@
+ALTER TABLE games ADD COLUMN IF NOT EXISTS source TEXT NOT NULL DEFAULT 'live';
+
+-- Импортированные из PGN партии не привязаны к пользователям платформы
+DO $$
+BEGIN
+	IF NOT EXISTS (
+		SELECT 1 FROM pg_constraint WHERE conname = 'chk_games_has_creator_or_imported'
+	) THEN
+		ALTER TABLE games DROP CONSTRAINT IF EXISTS chk_games_has_creator;
+		ALTER TABLE games ADD CONSTRAINT chk_games_has_creator_or_imported
+			CHECK (white_id IS NOT NULL OR black_id IS NOT NULL OR source = 'import');
+	END IF;
+END $$;
+
+CREATE INDEX IF NOT EXISTS ix_games_live_status_created_at
+	ON games (status, created_at)
+	WHERE source = 'live';
@@ -0,0 +1,12 @@
+-- Индекс позиций завершённых партий для обозревателя дебютов
+CREATE TABLE IF NOT EXISTS game_positions (
+	zobrist BIGINT NOT NULL,
+	game_id UUID NOT NULL,
+	ply INTEGER NOT NULL,
+	next_move VARCHAR(12),
+	result TEXT,
+	CONSTRAINT pk_game_positions PRIMARY KEY (zobrist, game_id, ply),
+	CONSTRAINT fk_game_positions_game FOREIGN KEY (game_id) REFERENCES games (id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS ix_game_positions_game_id ON game_positions (game_id);
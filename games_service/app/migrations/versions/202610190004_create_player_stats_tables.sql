@@ -0,0 +1,29 @@
+-- Агрегаты по игрокам, обновляются в транзакции завершения партии
+CREATE TABLE IF NOT EXISTS player_stats (
+	user_id INTEGER NOT NULL,
+	color TEXT NOT NULL,
+	time_control TEXT NOT NULL,
+	games INTEGER NOT NULL DEFAULT 0,
+	wins INTEGER NOT NULL DEFAULT 0,
+	losses INTEGER NOT NULL DEFAULT 0,
+	draws INTEGER NOT NULL DEFAULT 0,
+	CONSTRAINT pk_player_stats PRIMARY KEY (user_id, color, time_control),
+	CONSTRAINT chk_player_stats_color CHECK (color IN ('white', 'black'))
+);
+
+CREATE TABLE IF NOT EXISTS player_streaks (
+	user_id INTEGER PRIMARY KEY,
+	current_streak INTEGER NOT NULL DEFAULT 0,
+	best_win_streak INTEGER NOT NULL DEFAULT 0,
+	last_game_at TIMESTAMPTZ
+);
+
+CREATE TABLE IF NOT EXISTS player_head_to_head (
+	user_id INTEGER NOT NULL,
+	opponent_id INTEGER NOT NULL,
+	games INTEGER NOT NULL DEFAULT 0,
+	wins INTEGER NOT NULL DEFAULT 0,
+	losses INTEGER NOT NULL DEFAULT 0,
+	draws INTEGER NOT NULL DEFAULT 0,
+	CONSTRAINT pk_player_head_to_head PRIMARY KEY (user_id, opponent_id)
+);
@@ -0,0 +1,44 @@
+-- Рейтинги Glicko-2: очередь партий, рейтинговые периоды, текущие рейтинги и история
+CREATE TABLE IF NOT EXISTS rating_periods (
+	id BIGSERIAL PRIMARY KEY,
+	closed_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+	games INTEGER NOT NULL DEFAULT 0,
+	players INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS rated_games (
+	game_id UUID PRIMARY KEY,
+	white_id INTEGER NOT NULL,
+	black_id INTEGER NOT NULL,
+	white_score DOUBLE PRECISION NOT NULL,
+	finished_at TIMESTAMPTZ NOT NULL,
+	period_id BIGINT,
+	CONSTRAINT fk_rated_games_game FOREIGN KEY (game_id) REFERENCES games (id) ON DELETE CASCADE,
+	CONSTRAINT fk_rated_games_period FOREIGN KEY (period_id) REFERENCES rating_periods (id),
+	CONSTRAINT chk_rated_games_score CHECK (white_score IN (0, 0.5, 1))
+);
+
+CREATE INDEX IF NOT EXISTS ix_rated_games_pending ON rated_games (finished_at) WHERE period_id IS NULL;
+
+CREATE TABLE IF NOT EXISTS player_ratings (
+	user_id INTEGER PRIMARY KEY,
+	rating DOUBLE PRECISION NOT NULL,
+	rd DOUBLE PRECISION NOT NULL,
+	volatility DOUBLE PRECISION NOT NULL,
+	games INTEGER NOT NULL DEFAULT 0,
+	last_period_id BIGINT,
+	updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS rating_history (
+	id BIGSERIAL PRIMARY KEY,
+	user_id INTEGER NOT NULL,
+	period_id BIGINT NOT NULL,
+	rating DOUBLE PRECISION NOT NULL,
+	rd DOUBLE PRECISION NOT NULL,
+	volatility DOUBLE PRECISION NOT NULL,
+	created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+	CONSTRAINT fk_rating_history_period FOREIGN KEY (period_id) REFERENCES rating_periods (id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_rating_history_user_period ON rating_history (user_id, period_id);
@@ -0,0 +1,44 @@
+-- Турниры (арена и швейцарка); таблица положения периодически сохраняется из памяти
+CREATE TABLE IF NOT EXISTS tournaments (
+	id UUID PRIMARY KEY,
+	name TEXT NOT NULL,
+	kind TEXT NOT NULL,
+	status TEXT NOT NULL DEFAULT 'CREATED',
+	created_by INTEGER NOT NULL,
+	time_control JSONB,
+	rounds INTEGER,
+	duration_seconds INTEGER,
+	current_round INTEGER NOT NULL DEFAULT 0,
+	standings JSONB,
+	checkpointed_at TIMESTAMPTZ,
+	starts_at TIMESTAMPTZ,
+	started_at TIMESTAMPTZ,
+	finished_at TIMESTAMPTZ,
+	created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+	CONSTRAINT chk_tournaments_kind CHECK (kind IN ('arena', 'swiss')),
+	CONSTRAINT chk_tournaments_status CHECK (status IN ('CREATED', 'RUNNING', 'FINISHED'))
+);
+
+CREATE INDEX IF NOT EXISTS ix_tournaments_status_starts_at ON tournaments (status, starts_at);
+
+CREATE TABLE IF NOT EXISTS tournament_players (
+	tournament_id UUID NOT NULL,
+	user_id INTEGER NOT NULL,
+	rating DOUBLE PRECISION NOT NULL,
+	joined_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+	CONSTRAINT pk_tournament_players PRIMARY KEY (tournament_id, user_id),
+	CONSTRAINT fk_tournament_players_tournament FOREIGN KEY (tournament_id) REFERENCES tournaments (id) ON DELETE CASCADE
+);
+
+-- Без внешнего ключа на games: партия может быть удалена, а запись о туре остаётся
+CREATE TABLE IF NOT EXISTS tournament_games (
+	game_id UUID PRIMARY KEY,
+	tournament_id UUID NOT NULL,
+	round INTEGER NOT NULL,
+	white_id INTEGER NOT NULL,
+	black_id INTEGER NOT NULL,
+	result TEXT,
+	CONSTRAINT fk_tournament_games_tournament FOREIGN KEY (tournament_id) REFERENCES tournaments (id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS ix_tournament_games_tournament_round ON tournament_games (tournament_id, round);
@@ -0,0 +1,22 @@
+-- Разбор партий: кэш оценок позиций по Zobrist-хешу и очередь/результаты анализа
+CREATE TABLE IF NOT EXISTS position_evals (
+	zobrist BIGINT PRIMARY KEY,
+	depth SMALLINT NOT NULL,
+	score INTEGER NOT NULL,
+	best_move TEXT,
+	updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS game_analyses (
+	game_id UUID PRIMARY KEY,
+	status TEXT NOT NULL DEFAULT 'PENDING',
+	depth SMALLINT,
+	moves JSONB,
+	error TEXT,
+	requested_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+	finished_at TIMESTAMPTZ,
+	CONSTRAINT fk_game_analyses_game FOREIGN KEY (game_id) REFERENCES games (id) ON DELETE CASCADE,
+	CONSTRAINT chk_game_analyses_status CHECK (status IN ('PENDING', 'DONE', 'FAILED'))
+);
+
+CREATE INDEX IF NOT EXISTS ix_game_analyses_pending ON game_analyses (requested_at) WHERE status = 'PENDING';
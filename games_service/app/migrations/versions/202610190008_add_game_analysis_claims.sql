@@ -0,0 +1,17 @@
+-- Партия забирается в работу коротким UPDATE, а разбор идёт вне транзакции
+ALTER TABLE game_analyses ADD COLUMN IF NOT EXISTS claimed_at TIMESTAMPTZ;
+
+DO $$
+BEGIN
+	IF NOT EXISTS (
+		SELECT 1 FROM pg_constraint WHERE conname = 'chk_game_analyses_status_claims'
+	) THEN
+		ALTER TABLE game_analyses DROP CONSTRAINT IF EXISTS chk_game_analyses_status;
+		ALTER TABLE game_analyses ADD CONSTRAINT chk_game_analyses_status_claims
+			CHECK (status IN ('PENDING', 'RUNNING', 'DONE', 'FAILED'));
+	END IF;
+END $$;
+
+CREATE INDEX IF NOT EXISTS ix_game_analyses_running
+	ON game_analyses (claimed_at)
+	WHERE status = 'RUNNING';
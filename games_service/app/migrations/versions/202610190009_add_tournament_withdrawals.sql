@@ -0,0 +1,2 @@
+-- Снявшийся игрок остаётся в таблице, но в жеребьёвку больше не попадает
+ALTER TABLE tournament_players ADD COLUMN IF NOT EXISTS withdrawn BOOLEAN NOT NULL DEFAULT FALSE;
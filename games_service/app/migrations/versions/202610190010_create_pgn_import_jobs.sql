@@ -0,0 +1,16 @@
+-- Задания импорта PGN через API: прогресс доступен с любой реплики
+CREATE TABLE IF NOT EXISTS pgn_import_jobs (
+	id UUID PRIMARY KEY,
+	user_id INTEGER NOT NULL,
+	status TEXT NOT NULL DEFAULT 'queued',
+	chunks INTEGER NOT NULL DEFAULT 0,
+	games_imported INTEGER NOT NULL DEFAULT 0,
+	games_skipped INTEGER NOT NULL DEFAULT 0,
+	moves_imported INTEGER NOT NULL DEFAULT 0,
+	error TEXT,
+	created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+	started_at TIMESTAMPTZ,
+	finished_at TIMESTAMPTZ,
+	updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+	CONSTRAINT chk_pgn_import_jobs_status CHECK (status IN ('queued', 'running', 'finished', 'failed'))
+);
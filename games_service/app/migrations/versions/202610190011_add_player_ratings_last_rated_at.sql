@@ -0,0 +1,7 @@
+-- Время последнего рейтингового периода игрока: неактивность считается по времени, а не по разрыву id
+ALTER TABLE player_ratings ADD COLUMN IF NOT EXISTS last_rated_at TIMESTAMPTZ;
+
+UPDATE player_ratings AS pr
+SET last_rated_at = rp.closed_at
+FROM rating_periods AS rp
+WHERE pr.last_rated_at IS NULL AND rp.id = pr.last_period_id;
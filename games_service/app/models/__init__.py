@@ -1,3 +1,4 @@
+from .analysis import AnalysisStatus, GameAnalysis, PositionEval
 from .game import (
 	Game,
 	GameResult,
@@ -7,14 +8,42 @@ from .game import (
 	TerminationReason,
 )
 from .move import Move
+from .pgn_import import PgnImportJob
+from .position import GamePosition
+from .rating import PlayerRating, RatedGame, RatingHistory, RatingPeriod
+from .stats import PlayerHeadToHead, PlayerStats, PlayerStreak
+from .tournament import (
+	Tournament,
+	TournamentGame,
+	TournamentKind,
+	TournamentPlayer,
+	TournamentStatus,
+)
 
 __all__ = [
+	"AnalysisStatus",
 	"Game",
+	"GameAnalysis",
+	"GamePosition",
 	"GameResult",
 	"GameSnapshot",
 	"GameStatus",
+	"PgnImportJob",
+	"PlayerHeadToHead",
+	"PlayerRating",
+	"PlayerStats",
+	"PlayerStreak",
+	"PositionEval",
+	"RatedGame",
+	"RatingHistory",
+	"RatingPeriod",
 	"SideToMove",
 	"TerminationReason",
+	"Tournament",
+	"TournamentGame",
+	"TournamentKind",
+	"TournamentPlayer",
+	"TournamentStatus",
 	"Move",
 ]
 
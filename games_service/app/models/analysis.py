@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from datetime import datetime
+from enum import Enum
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import JSON, BigInteger, DateTime, ForeignKey, Index, Integer, SmallInteger, Text, text
+from sqlalchemy.dialects.postgresql import UUID as PGUUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..database import Base
+
+
+class AnalysisStatus(str, Enum):
+	PENDING = "PENDING"
+	RUNNING = "RUNNING"
+	DONE = "DONE"
+	FAILED = "FAILED"
+
+
+class PositionEval(Base):
+	"""Кэш оценок позиций по Zobrist-хешу, общий для всех партий."""
+
+	__tablename__ = "position_evals"
+
+	zobrist: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+	depth: Mapped[int] = mapped_column(SmallInteger, nullable=False)
+	# Оценка с точки зрения белых, в сантипешках
+	score: Mapped[int] = mapped_column(Integer, nullable=False)
+	best_move: Mapped[str | None] = mapped_column(Text, nullable=True)
+	updated_at: Mapped[datetime] = mapped_column(
+		DateTime(timezone=True), nullable=False, server_default="now()"
+	)
+
+
+class GameAnalysis(Base):
+	__tablename__ = "game_analyses"
+
+	game_id: Mapped[UUID] = mapped_column(
+		PGUUID(as_uuid=True), ForeignKey("games.id", ondelete="CASCADE"), primary_key=True
+	)
+	status: Mapped[str] = mapped_column(Text, nullable=False, default=AnalysisStatus.PENDING.value)
+	depth: Mapped[int | None] = mapped_column(SmallInteger, nullable=True)
+	moves: Mapped[list[dict[str, Any]] | None] = mapped_column(JSON, nullable=True)
+	error: Mapped[str | None] = mapped_column(Text, nullable=True)
+	requested_at: Mapped[datetime] = mapped_column(
+		DateTime(timezone=True), nullable=False, server_default="now()"
+	)
+	finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+	# Когда лидер забрал партию в работу; просроченный RUNNING забирается заново
+	claimed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+	__table_args__ = (
+		Index(
+			"ix_game_analyses_pending",
+			"requested_at",
+			postgresql_where=text("status = 'PENDING'"),
+		),
+		Index(
+			"ix_game_analyses_running",
+			"claimed_at",
+			postgresql_where=text("status = 'RUNNING'"),
+		),
+	)
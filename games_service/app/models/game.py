@@ -88,6 +88,10 @@ class Game(Base):
 	metadata_json: Mapped[dict[str, Any] | None] = mapped_column(
 		"metadata", JSON, nullable=True, default=None
 	)
+	# live — сыграна на платформе, import — загружена из PGN
+	source: Mapped[str] = mapped_column(
+		Text, nullable=False, default="live", server_default="live"
+	)
 	created_at: Mapped[datetime] = mapped_column(
 		DateTime(timezone=True), nullable=False, server_default="now()"
 	)
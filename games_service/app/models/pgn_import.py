@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import DateTime, Integer, Text
+from sqlalchemy.dialects.postgresql import UUID as PGUUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..database import Base
+
+
+class PgnImportJob(Base):
+	"""Задание импорта через API: состояние в БД, чтобы прогресс отдавала любая реплика."""
+
+	__tablename__ = "pgn_import_jobs"
+
+	id: Mapped[UUID] = mapped_column(PGUUID(as_uuid=True), primary_key=True)
+	user_id: Mapped[int] = mapped_column(Integer, nullable=False)
+	status: Mapped[str] = mapped_column(Text, nullable=False, default="queued")
+	chunks: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+	games_imported: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+	games_skipped: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+	moves_imported: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+	error: Mapped[str | None] = mapped_column(Text, nullable=True)
+	created_at: Mapped[datetime] = mapped_column(
+		DateTime(timezone=True), nullable=False, server_default="now()"
+	)
+	started_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+	finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+	updated_at: Mapped[datetime] = mapped_column(
+		DateTime(timezone=True), nullable=False, server_default="now()"
+	)
@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from uuid import UUID
+
+from sqlalchemy import BigInteger, ForeignKey, Index, Integer, String, Text
+from sqlalchemy.dialects.postgresql import UUID as PGUUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..database import Base
+
+
+class GamePosition(Base):
+	"""Позиция завершённой партии: Zobrist-хеш -> (партия, полуход, результат)."""
+
+	__tablename__ = "game_positions"
+
+	zobrist: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+	game_id: Mapped[UUID] = mapped_column(
+		PGUUID(as_uuid=True),
+		ForeignKey("games.id", ondelete="CASCADE"),
+		primary_key=True,
+	)
+	ply: Mapped[int] = mapped_column(Integer, primary_key=True)
+	next_move: Mapped[str | None] = mapped_column(String(12), nullable=True)
+	result: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+	__table_args__ = (Index("ix_game_positions_game_id", "game_id"),)
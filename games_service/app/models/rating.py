@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import BigInteger, DateTime, Float, ForeignKey, Index, Integer, text
+from sqlalchemy.dialects.postgresql import UUID as PGUUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..database import Base
+
+
+class RatingPeriod(Base):
+	__tablename__ = "rating_periods"
+
+	id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+	closed_at: Mapped[datetime] = mapped_column(
+		DateTime(timezone=True), nullable=False, server_default="now()"
+	)
+	games: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+	players: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class RatedGame(Base):
+	"""Завершённая партия, ожидающая (period_id IS NULL) или учтённая в рейтинговом периоде."""
+
+	__tablename__ = "rated_games"
+
+	game_id: Mapped[UUID] = mapped_column(
+		PGUUID(as_uuid=True), ForeignKey("games.id", ondelete="CASCADE"), primary_key=True
+	)
+	white_id: Mapped[int] = mapped_column(Integer, nullable=False)
+	black_id: Mapped[int] = mapped_column(Integer, nullable=False)
+	white_score: Mapped[float] = mapped_column(Float, nullable=False)
+	finished_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+	period_id: Mapped[int | None] = mapped_column(
+		BigInteger, ForeignKey("rating_periods.id"), nullable=True
+	)
+
+	__table_args__ = (
+		Index(
+			"ix_rated_games_pending",
+			"finished_at",
+			postgresql_where=text("period_id IS NULL"),
+		),
+	)
+
+
+class PlayerRating(Base):
+	__tablename__ = "player_ratings"
+
+	user_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+	rating: Mapped[float] = mapped_column(Float, nullable=False)
+	rd: Mapped[float] = mapped_column(Float, nullable=False)
+	volatility: Mapped[float] = mapped_column(Float, nullable=False)
+	games: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+	last_period_id: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+	last_rated_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+	updated_at: Mapped[datetime] = mapped_column(
+		DateTime(timezone=True), nullable=False, server_default="now()"
+	)
+
+
+class RatingHistory(Base):
+	__tablename__ = "rating_history"
+
+	id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+	user_id: Mapped[int] = mapped_column(Integer, nullable=False)
+	period_id: Mapped[int] = mapped_column(
+		BigInteger, ForeignKey("rating_periods.id"), nullable=False
+	)
+	rating: Mapped[float] = mapped_column(Float, nullable=False)
+	rd: Mapped[float] = mapped_column(Float, nullable=False)
+	volatility: Mapped[float] = mapped_column(Float, nullable=False)
+	created_at: Mapped[datetime] = mapped_column(
+		DateTime(timezone=True), nullable=False, server_default="now()"
+	)
+
+	__table_args__ = (Index("ix_rating_history_user_period", "user_id", "period_id"),)
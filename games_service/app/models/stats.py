@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, Integer, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..database import Base
+
+
+class PlayerStats(Base):
+	"""Счётчики партий игрока в разрезе цвета и контроля времени."""
+
+	__tablename__ = "player_stats"
+
+	user_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+	color: Mapped[str] = mapped_column(Text, primary_key=True)
+	time_control: Mapped[str] = mapped_column(Text, primary_key=True)
+	games: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+	wins: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+	losses: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+	draws: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class PlayerStreak(Base):
+	"""Текущая серия (>0 — победы подряд, <0 — поражения) и лучшая серия побед."""
+
+	__tablename__ = "player_streaks"
+
+	user_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+	current_streak: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+	best_win_streak: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+	last_game_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+class PlayerHeadToHead(Base):
+	"""Личные встречи: результаты user_id против opponent_id."""
+
+	__tablename__ = "player_head_to_head"
+
+	user_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+	opponent_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+	games: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+	wins: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+	losses: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+	draws: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
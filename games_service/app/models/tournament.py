@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from datetime import datetime
+from enum import Enum
+from typing import Any
+from uuid import UUID, uuid4
+
+from sqlalchemy import JSON, Boolean, DateTime, Float, ForeignKey, Index, Integer, Text
+from sqlalchemy.dialects.postgresql import UUID as PGUUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..database import Base
+
+
+class TournamentKind(str, Enum):
+	ARENA = "arena"
+	SWISS = "swiss"
+
+
+class TournamentStatus(str, Enum):
+	CREATED = "CREATED"
+	RUNNING = "RUNNING"
+	FINISHED = "FINISHED"
+
+
+class Tournament(Base):
+	__tablename__ = "tournaments"
+
+	id: Mapped[UUID] = mapped_column(PGUUID(as_uuid=True), primary_key=True, default=uuid4)
+	name: Mapped[str] = mapped_column(Text, nullable=False)
+	kind: Mapped[str] = mapped_column(Text, nullable=False)
+	status: Mapped[str] = mapped_column(Text, nullable=False, default=TournamentStatus.CREATED.value)
+	created_by: Mapped[int] = mapped_column(Integer, nullable=False)
+	time_control: Mapped[dict[str, Any] | None] = mapped_column(JSON, nullable=True)
+	rounds: Mapped[int | None] = mapped_column(Integer, nullable=True)
+	duration_seconds: Mapped[int | None] = mapped_column(Integer, nullable=True)
+	current_round: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+	# Снимок таблицы из памяти директора турниров
+	standings: Mapped[list[dict[str, Any]] | None] = mapped_column(JSON, nullable=True)
+	checkpointed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+	starts_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+	started_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+	finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+	created_at: Mapped[datetime] = mapped_column(
+		DateTime(timezone=True), nullable=False, server_default="now()"
+	)
+
+	__table_args__ = (Index("ix_tournaments_status_starts_at", "status", "starts_at"),)
+
+
+class TournamentPlayer(Base):
+	__tablename__ = "tournament_players"
+
+	tournament_id: Mapped[UUID] = mapped_column(
+		PGUUID(as_uuid=True), ForeignKey("tournaments.id", ondelete="CASCADE"), primary_key=True
+	)
+	user_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+	rating: Mapped[float] = mapped_column(Float, nullable=False)
+	# Игрок снялся сам (POST .../withdraw) или после tournament_max_no_shows неявок подряд
+	withdrawn: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+	joined_at: Mapped[datetime] = mapped_column(
+		DateTime(timezone=True), nullable=False, server_default="now()"
+	)
+
+
+class TournamentGame(Base):
+	__tablename__ = "tournament_games"
+
+	game_id: Mapped[UUID] = mapped_column(PGUUID(as_uuid=True), primary_key=True)
+	tournament_id: Mapped[UUID] = mapped_column(
+		PGUUID(as_uuid=True), ForeignKey("tournaments.id", ondelete="CASCADE"), nullable=False
+	)
+	round: Mapped[int] = mapped_column(Integer, nullable=False)
+	white_id: Mapped[int] = mapped_column(Integer, nullable=False)
+	black_id: Mapped[int] = mapped_column(Integer, nullable=False)
+	result: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+	__table_args__ = (Index("ix_tournament_games_tournament_round", "tournament_id", "round"),)
@@ -0,0 +1,168 @@
+"""
+Разбор PGN для массового импорта партий.
+
+Модуль намеренно зависит только от python-chess: функции выполняются в
+процессах ProcessPoolExecutor и не должны тянуть за собой движки БД.
+"""
+from __future__ import annotations
+
+import io
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Iterable, Iterator
+from uuid import uuid4
+
+import chess
+import chess.pgn
+
+from .positions import zobrist_key
+
+SNAPSHOT_INTERVAL = 50
+VALID_RESULTS = {"1-0", "0-1", "1/2-1/2"}
+IMPORT_SOURCE = "import"
+
+
+@dataclass
+class ParsedChunk:
+	games: list[dict[str, Any]] = field(default_factory=list)
+	moves: list[dict[str, Any]] = field(default_factory=list)
+	snapshots: list[dict[str, Any]] = field(default_factory=list)
+	positions: list[dict[str, Any]] = field(default_factory=list)
+	skipped: int = 0
+
+
+def iter_pgn_chunks(lines: Iterable[str], games_per_chunk: int) -> Iterator[str]:
+	"""Режет поток строк PGN на куски по games_per_chunk партий, не читая файл целиком."""
+	buffer: list[str] = []
+	games_in_buffer = 0
+	in_movetext = False
+	for line in lines:
+		stripped = line.strip()
+		if stripped.startswith("[") and in_movetext:
+			# Заголовок после ходов — началась следующая партия
+			games_in_buffer += 1
+			in_movetext = False
+			if games_in_buffer >= games_per_chunk:
+				yield "".join(buffer)
+				buffer = []
+				games_in_buffer = 0
+		elif stripped and not stripped.startswith("["):
+			in_movetext = True
+		buffer.append(line if line.endswith("\n") else line + "\n")
+	if any(chunk.strip() for chunk in buffer):
+		yield "".join(buffer)
+
+
+def _parse_date(raw: str | None) -> datetime | None:
+	if not raw or "?" in raw:
+		return None
+	try:
+		return datetime.strptime(raw, "%Y.%m.%d").replace(tzinfo=timezone.utc)
+	except ValueError:
+		return None
+
+
+def _parse_game(
+	game: chess.pgn.Game, *, imported_by: int | None
+) -> tuple[dict, list[dict], list[dict], list[dict]] | None:
+	headers = dict(game.headers)
+	result = headers.get("Result")
+	if game.errors or result not in VALID_RESULTS:
+		return None
+
+	board = game.board()
+	initial_pos = "startpos" if "FEN" not in headers else board.fen()
+	game_id = uuid4()
+	moves: list[dict] = []
+	snapshots: list[dict] = []
+	positions: list[dict] = []
+	for index, move in enumerate(game.mainline_moves(), start=1):
+		if move not in board.legal_moves:
+			return None
+		positions.append(
+			{
+				"zobrist": zobrist_key(board),
+				"game_id": game_id,
+				"ply": index - 1,
+				"next_move": move.uci(),
+				"result": result,
+			}
+		)
+		san = board.san(move)
+		is_capture = board.is_capture(move)
+		board.push(move)
+		fen = board.fen()
+		moves.append(
+			{
+				"game_id": game_id,
+				"move_index": index,
+				"uci": move.uci(),
+				"san": san,
+				"fen_after": fen,
+				"player_id": None,
+				"clocks_after": None,
+				"is_capture": is_capture,
+				"promotion": chess.piece_symbol(move.promotion) if move.promotion else None,
+			}
+		)
+		if index % SNAPSHOT_INTERVAL == 0:
+			snapshots.append({"game_id": game_id, "snapshot_move_index": index, "fen": fen})
+
+	positions.append(
+		{"zobrist": zobrist_key(board), "game_id": game_id, "ply": len(moves), "next_move": None, "result": result}
+	)
+
+	played_at = _parse_date(headers.get("Date")) or datetime.now(timezone.utc)
+	metadata: dict[str, Any] = {"source": IMPORT_SOURCE, "headers": headers}
+	if imported_by is not None:
+		metadata["imported_by"] = imported_by
+	row = {
+		"id": game_id,
+		"white_id": None,
+		"black_id": None,
+		"initial_pos": initial_pos,
+		"current_pos": board.fen(),
+		"next_turn": "w" if board.turn == chess.WHITE else "b",
+		"time_control": None,
+		"move_count": len(moves),
+		"status": "FINISHED",
+		"white_clock_ms": 0,
+		"black_clock_ms": 0,
+		"result": result,
+		"termination_reason": None,
+		"ended_by": None,
+		"pgn": str(game),
+		"metadata": metadata,
+		"source": IMPORT_SOURCE,
+		"created_at": played_at,
+		"started_at": played_at,
+		"finished_at": played_at,
+	}
+	return row, moves, snapshots, positions
+
+
+def parse_pgn_chunk(text: str, imported_by: int | None = None) -> ParsedChunk:
+	"""Разбирает и валидирует кусок PGN; выполняется в процессе пула."""
+	chunk = ParsedChunk()
+	stream = io.StringIO(text)
+	while True:
+		try:
+			game = chess.pgn.read_game(stream)
+		except Exception:
+			chunk.skipped += 1
+			continue
+		if game is None:
+			break
+		try:
+			parsed = _parse_game(game, imported_by=imported_by)
+		except Exception:
+			parsed = None
+		if parsed is None:
+			chunk.skipped += 1
+			continue
+		row, moves, snapshots, positions = parsed
+		chunk.games.append(row)
+		chunk.moves.extend(moves)
+		chunk.snapshots.extend(snapshots)
+		chunk.positions.extend(positions)
+	return chunk
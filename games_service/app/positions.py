@@ -0,0 +1,47 @@
+"""
+Индекс позиций: 64-битный Zobrist-хеш (polyglot) каждой позиции завершённой партии.
+
+Как и pgn_parsing, модуль зависит только от python-chess и используется в пуле процессов.
+"""
+from __future__ import annotations
+
+from typing import Any, Iterable
+from uuid import UUID
+
+import chess
+import chess.polyglot
+
+
+def zobrist_key(board: chess.Board) -> int:
+	"""Polyglot-хеш позиции как знаковое 64-битное целое (тип bigint в Postgres)."""
+	value = chess.polyglot.zobrist_hash(board)
+	return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def board_from_initial(initial_pos: str | None) -> chess.Board:
+	if not initial_pos or initial_pos.lower() == "startpos":
+		return chess.Board()
+	return chess.Board(initial_pos)
+
+
+def position_rows(
+	game_id: UUID,
+	initial_pos: str | None,
+	ucis: Iterable[str],
+	result: str | None,
+) -> list[dict[str, Any]]:
+	"""
+	Строки индекса для партии: позиция перед каждым ходом (ply 0 — начальная)
+	и сыгранный из неё ход; у финальной позиции next_move пустой.
+	"""
+	board = board_from_initial(initial_pos)
+	rows: list[dict[str, Any]] = []
+	ply = 0
+	for uci in ucis:
+		rows.append(
+			{"zobrist": zobrist_key(board), "game_id": game_id, "ply": ply, "next_move": uci, "result": result}
+		)
+		board.push_uci(uci)
+		ply += 1
+	rows.append({"zobrist": zobrist_key(board), "game_id": game_id, "ply": ply, "next_move": None, "result": result})
+	return rows
@@ -1,4 +1,44 @@
-from .manager import ConnectionInfo, GameConnectionManager, game_ws_manager
-
-__all__ = ["ConnectionInfo", "GameConnectionManager", "game_ws_manager"]
+from .manager import (
+	CLOSE_IDLE_TIMEOUT,
+	CLOSE_TOO_MANY_CONNECTIONS,
+	LOBBY_CHANNEL,
+	TOURNAMENT_CHANNEL_PREFIX,
+	ConnectionInfo,
+	ConnectionLimits,
+	ConnectionRejected,
+	GameConnectionManager,
+	StreamConnection,
+	client_ip,
+	game_channel,
+	game_ws_manager,
+	parse_channel,
+	tournament_channel,
+	ws_frame_limiter,
+)
+from .ratelimit import FrameRateLimiter, TokenBucket
+from .heartbeat import HeartbeatReaper, heartbeat_reaper
+from .fanout import StreamFanout, stream_fanout
 
+__all__ = [
+	"CLOSE_IDLE_TIMEOUT",
+	"CLOSE_TOO_MANY_CONNECTIONS",
+	"LOBBY_CHANNEL",
+	"TOURNAMENT_CHANNEL_PREFIX",
+	"ConnectionInfo",
+	"ConnectionLimits",
+	"ConnectionRejected",
+	"FrameRateLimiter",
+	"GameConnectionManager",
+	"HeartbeatReaper",
+	"StreamConnection",
+	"StreamFanout",
+	"TokenBucket",
+	"client_ip",
+	"game_channel",
+	"game_ws_manager",
+	"heartbeat_reaper",
+	"parse_channel",
+	"stream_fanout",
+	"tournament_channel",
+	"ws_frame_limiter",
+]
@@ -0,0 +1,113 @@
+"""
+Рассылка событий /ws/stream между репликами games через Postgres LISTEN/NOTIFY.
+
+При шардировании событие партии возникает только у её владельца, а события лобби
+и турниров — на реплике, которая их опубликовала, тогда как подписчик /ws/stream
+может быть подключён к любой реплике. Каждое событие канала уходит в NOTIFY
+games_stream, остальные реплики раздают его своим подписчикам. NOTIFY принимает
+не больше ~8 КБ: слишком крупное событие заменяется на {"type": "resync"}, по
+которому клиент переподписывается на канал и получает свежий снапшот.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import logging
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from ..database import async_engine
+from ..sharding import shard_coordinator
+from .manager import GameConnectionManager, game_ws_manager
+
+LOGGER = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = "games_stream"
+MAX_PAYLOAD_BYTES = 7900
+QUEUE_SIZE = 10_000
+KEEPALIVE_SECONDS = 30.0
+RECONNECT_SECONDS = 2.0
+
+
+class StreamFanout:
+	"""Одно выделенное соединение на реплику: слушает games_stream и отправляет свои события."""
+
+	def __init__(self, manager: GameConnectionManager, engine: AsyncEngine) -> None:
+		self._manager = manager
+		self._engine = engine
+		self._queue: asyncio.Queue[str] = asyncio.Queue(maxsize=QUEUE_SIZE)
+		self._task: asyncio.Task | None = None
+		self._deliveries: set[asyncio.Task] = set()
+
+	def start(self) -> None:
+		if not shard_coordinator.enabled:
+			return
+		if self._task and not self._task.done():
+			return
+		self._manager.set_relay(self._enqueue)
+		self._task = asyncio.create_task(self._run(), name="stream-fanout")
+
+	async def stop(self) -> None:
+		self._manager.set_relay(None)
+		if not self._task:
+			return
+		self._task.cancel()
+		with contextlib.suppress(asyncio.CancelledError):
+			await self._task
+		self._task = None
+
+	def _enqueue(self, channel: str, message: dict) -> None:
+		origin = shard_coordinator.member
+		payload = json.dumps({"origin": origin, "channel": channel, "data": message}, default=str)
+		if len(payload.encode()) > MAX_PAYLOAD_BYTES:
+			payload = json.dumps({"origin": origin, "channel": channel, "data": {"type": "resync"}})
+		try:
+			self._queue.put_nowait(payload)
+		except asyncio.QueueFull:
+			# Подписчики соседей увидят пропуск seq и переподпишутся
+			LOGGER.warning("Stream fan-out queue is full, dropping event for %s", channel)
+
+	async def _run(self) -> None:
+		while True:
+			try:
+				await self._serve()
+			except asyncio.CancelledError:
+				raise
+			except Exception:  # pragma: no cover - defensive logging
+				LOGGER.exception("Stream fan-out connection failed")
+			await asyncio.sleep(RECONNECT_SECONDS)
+
+	async def _serve(self) -> None:
+		async with self._engine.connect() as conn:
+			raw = await conn.get_raw_connection()
+			driver = raw.driver_connection
+			await driver.add_listener(NOTIFY_CHANNEL, self._on_notify)
+			try:
+				while True:
+					try:
+						payload = await asyncio.wait_for(self._queue.get(), KEEPALIVE_SECONDS)
+					except asyncio.TimeoutError:
+						# Без исходящих событий обрыв соединения иначе не заметить
+						await driver.execute("SELECT 1")
+						continue
+					await driver.execute("SELECT pg_notify($1, $2)", NOTIFY_CHANNEL, payload)
+			finally:
+				with contextlib.suppress(Exception):
+					await driver.remove_listener(NOTIFY_CHANNEL, self._on_notify)
+
+	def _on_notify(self, connection, pid: int, channel: str, payload: str) -> None:
+		try:
+			event = json.loads(payload)
+		except ValueError:
+			return
+		if event.get("origin") == shard_coordinator.member:
+			return
+		task = asyncio.get_running_loop().create_task(
+			self._manager.deliver_relayed(event["channel"], event["data"])
+		)
+		self._deliveries.add(task)
+		task.add_done_callback(self._deliveries.discard)
+
+
+stream_fanout = StreamFanout(game_ws_manager, async_engine)
@@ -0,0 +1,45 @@
+import asyncio
+import contextlib
+import logging
+
+from ..config import get_settings
+from .manager import game_ws_manager
+
+LOGGER = logging.getLogger(__name__)
+
+
+class HeartbeatReaper:
+	"""Периодически пингует WebSocket-клиентов и закрывает молчащие соединения."""
+
+	def __init__(self) -> None:
+		self._task: asyncio.Task | None = None
+
+	def start(self) -> None:
+		if self._task and not self._task.done():
+			return
+		self._task = asyncio.create_task(self._run(), name="ws-heartbeat")
+
+	async def stop(self) -> None:
+		if not self._task:
+			return
+		self._task.cancel()
+		with contextlib.suppress(asyncio.CancelledError):
+			await self._task
+		self._task = None
+
+	async def _run(self) -> None:
+		settings = get_settings()
+		while True:
+			await asyncio.sleep(settings.ws_heartbeat_interval_seconds)
+			try:
+				_, reaped = await game_ws_manager.heartbeat(settings.ws_idle_timeout_seconds)
+			except asyncio.CancelledError:
+				raise
+			except Exception:  # pragma: no cover - defensive logging
+				LOGGER.exception("WebSocket heartbeat iteration failed")
+				continue
+			if reaped:
+				LOGGER.info("Heartbeat reaped %d idle WebSocket connection(s)", reaped)
+
+
+heartbeat_reaper = HeartbeatReaper()
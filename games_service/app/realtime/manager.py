@@ -1,40 +1,281 @@
 from __future__ import annotations
 
 import asyncio
-from dataclasses import dataclass
-from typing import Literal
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Callable, Literal
 from uuid import UUID
 
 from fastapi import WebSocket
 
+from ..config import get_settings
+from .ratelimit import FrameRateLimiter
+
 Role = Literal["white", "black", "viewer"]
 
+CLOSE_IDLE_TIMEOUT = 4408
+CLOSE_TOO_MANY_CONNECTIONS = 4429
+
+LOBBY_CHANNEL = "lobby"
+GAME_CHANNEL_PREFIX = "game:"
+TOURNAMENT_CHANNEL_PREFIX = "tournament:"
+
+
+def game_channel(game_id: UUID) -> str:
+	return f"{GAME_CHANNEL_PREFIX}{game_id}"
+
+
+def tournament_channel(tournament_id: UUID) -> str:
+	return f"{TOURNAMENT_CHANNEL_PREFIX}{tournament_id}"
+
+
+def parse_channel(channel: str) -> UUID | None:
+	"""
+	Возвращает id партии или турнира для их каналов, None для лобби;
+	ValueError для неизвестных каналов.
+	"""
+	if channel == LOBBY_CHANNEL:
+		return None
+	for prefix in (GAME_CHANNEL_PREFIX, TOURNAMENT_CHANNEL_PREFIX):
+		if channel.startswith(prefix):
+			return UUID(channel[len(prefix):])
+	raise ValueError(f"Unknown channel: {channel}")
+
+
+def client_ip(websocket: WebSocket) -> str | None:
+	forwarded = websocket.headers.get("x-real-ip")
+	if forwarded:
+		return forwarded
+	return websocket.client.host if websocket.client else None
+
+
+class ConnectionRejected(Exception):
+	def __init__(self, reason: str):
+		super().__init__(reason)
+		self.reason = reason
+
+
+@dataclass
+class ConnectionLimits:
+	per_user: int = 0
+	per_ip: int = 0
+	per_game: int = 0
+
 
 @dataclass
 class ConnectionInfo:
 	websocket: WebSocket
 	user_id: int | None
 	role: Role
+	ip: str | None = None
+
+
+@dataclass
+class StreamConnection:
+	websocket: WebSocket
+	user_id: int | None
+	channels: set[str] = field(default_factory=set)
+	ip: str | None = None
+	# Каналы, по которым клиент ещё не получил снапшот: их события копятся здесь
+	pending: dict[str, list[dict]] = field(default_factory=dict)
 
 
 class GameConnectionManager:
-	def __init__(self) -> None:
+	def __init__(self, limits: ConnectionLimits | None = None) -> None:
+		self._limits = limits or ConnectionLimits()
 		self._connections: dict[UUID, dict[WebSocket, ConnectionInfo]] = {}
+		# Мультиплексированные подписчики /ws/stream: канал -> сокеты
+		self._subscribers: dict[str, dict[WebSocket, StreamConnection]] = {}
+		self._streams: dict[WebSocket, StreamConnection] = {}
+		self._sequences: dict[str, int] = {}
+		# Учёт соединений для лимитов и reaper'а простаивающих сокетов
+		self._owners: dict[WebSocket, tuple[int | None, str | None]] = {}
+		self._per_user: Counter[int] = Counter()
+		self._per_ip: Counter[str] = Counter()
+		self._last_seen: dict[WebSocket, float] = {}
 		self._lock = asyncio.Lock()
+		# Пересылка событий каналов соседним репликам (StreamFanout при шардировании)
+		self._relay: Callable[[str, dict], None] | None = None
+
+	def set_relay(self, relay: Callable[[str, dict], None] | None) -> None:
+		self._relay = relay
+
+	def _check_limits(self, user_id: int | None, ip: str | None, game_id: UUID | None) -> str | None:
+		limits = self._limits
+		if limits.per_user and user_id is not None and self._per_user[user_id] >= limits.per_user:
+			return "Too many connections for user"
+		if limits.per_ip and ip is not None and self._per_ip[ip] >= limits.per_ip:
+			return "Too many connections from address"
+		if (
+			limits.per_game
+			and game_id is not None
+			and len(self._connections.get(game_id, {})) >= limits.per_game
+		):
+			return "Too many connections for game"
+		return None
+
+	def _register(self, websocket: WebSocket, user_id: int | None, ip: str | None) -> None:
+		self._owners[websocket] = (user_id, ip)
+		if user_id is not None:
+			self._per_user[user_id] += 1
+		if ip is not None:
+			self._per_ip[ip] += 1
+		self._last_seen[websocket] = time.monotonic()
+
+	def _unregister(self, websocket: WebSocket) -> None:
+		self._last_seen.pop(websocket, None)
+		owner = self._owners.pop(websocket, None)
+		if owner is None:
+			return
+		user_id, ip = owner
+		if user_id is not None:
+			self._per_user[user_id] -= 1
+			if self._per_user[user_id] <= 0:
+				del self._per_user[user_id]
+		if ip is not None:
+			self._per_ip[ip] -= 1
+			if self._per_ip[ip] <= 0:
+				del self._per_ip[ip]
+
+	async def _reject(self, websocket: WebSocket, reason: str) -> None:
+		await websocket.close(code=CLOSE_TOO_MANY_CONNECTIONS, reason=reason)
+		raise ConnectionRejected(reason)
 
 	async def connect(self, game_id: UUID, connection: ConnectionInfo) -> None:
 		await connection.websocket.accept()
 		async with self._lock:
-			self._connections.setdefault(game_id, {})[connection.websocket] = connection
+			reason = self._check_limits(connection.user_id, connection.ip, game_id)
+			if reason is None:
+				self._connections.setdefault(game_id, {})[connection.websocket] = connection
+				self._register(connection.websocket, connection.user_id, connection.ip)
+		if reason is not None:
+			await self._reject(connection.websocket, reason)
 
 	async def disconnect(self, websocket: WebSocket) -> None:
 		async with self._lock:
+			self._unregister(websocket)
 			for game_id, bucket in list(self._connections.items()):
 				if websocket in bucket:
 					bucket.pop(websocket, None)
 					if not bucket:
 						self._connections.pop(game_id, None)
 					break
+			stream = self._streams.pop(websocket, None)
+			if stream:
+				for channel in stream.channels:
+					self._drop_subscriber(channel, websocket)
+
+	async def connect_stream(self, connection: StreamConnection) -> None:
+		await connection.websocket.accept()
+		async with self._lock:
+			reason = self._check_limits(connection.user_id, connection.ip, None)
+			if reason is None:
+				self._streams[connection.websocket] = connection
+				self._register(connection.websocket, connection.user_id, connection.ip)
+		if reason is not None:
+			await self._reject(connection.websocket, reason)
+
+	def touch(self, websocket: WebSocket) -> None:
+		"""Отмечает активность клиента (любой входящий кадр, включая pong)."""
+		if websocket in self._last_seen:
+			self._last_seen[websocket] = time.monotonic()
+
+	async def heartbeat(self, idle_timeout: float) -> tuple[int, int]:
+		"""Закрывает молчащие дольше idle_timeout сокеты и пингует остальные."""
+		now = time.monotonic()
+		async with self._lock:
+			snapshot = list(self._last_seen.items())
+		stale = [ws for ws, seen in snapshot if now - seen > idle_timeout]
+		alive = [ws for ws, seen in snapshot if now - seen <= idle_timeout]
+		for ws in stale:
+			await self.disconnect(ws)
+			try:
+				await ws.close(code=CLOSE_IDLE_TIMEOUT, reason="Idle timeout")
+			except Exception:
+				pass
+		ping = {"type": "ping", "ts": int(time.time() * 1000)}
+		for ws in alive:
+			await self.send_personal(ws, ping)
+		return len(alive), len(stale)
+
+	async def subscribe(self, websocket: WebSocket, channel: str) -> int:
+		"""
+		Подписывает stream-сокет на канал и возвращает текущий seq канала.
+
+		До release() события канала не отправляются, а копятся: клиент должен
+		получить ack и снапшот раньше событий с бо́льшим seq.
+		"""
+		async with self._lock:
+			stream = self._streams.get(websocket)
+			if stream is None:
+				raise KeyError("Unknown stream connection")
+			stream.channels.add(channel)
+			stream.pending[channel] = []
+			self._subscribers.setdefault(channel, {})[websocket] = stream
+			return self._sequences.get(channel, 0)
+
+	async def release(self, websocket: WebSocket, channel: str) -> None:
+		"""Отправляет события, накопленные после subscribe(), и дальше шлёт их напрямую."""
+		while True:
+			async with self._lock:
+				stream = self._streams.get(websocket)
+				if stream is None:
+					return
+				buffered = stream.pending.get(channel)
+				if buffered is None:
+					return
+				if not buffered:
+					# Буфер снимается только пустым, иначе свежее событие обгонит накопленные
+					del stream.pending[channel]
+					return
+				stream.pending[channel] = []
+			for envelope in buffered:
+				try:
+					await websocket.send_json(envelope)
+				except Exception:
+					await self.disconnect(websocket)
+					return
+
+	async def unsubscribe(self, websocket: WebSocket, channel: str) -> None:
+		async with self._lock:
+			stream = self._streams.get(websocket)
+			if stream is not None:
+				stream.channels.discard(channel)
+				stream.pending.pop(channel, None)
+			self._drop_subscriber(channel, websocket)
+
+	def _drop_subscriber(self, channel: str, websocket: WebSocket) -> None:
+		bucket = self._subscribers.get(channel)
+		if bucket is None:
+			return
+		bucket.pop(websocket, None)
+		if not bucket:
+			self._subscribers.pop(channel, None)
+			self._sequences.pop(channel, None)
+
+	async def _publish(self, channel: str, message: dict, *, relay: bool = True) -> None:
+		if relay and self._relay is not None:
+			self._relay(channel, message)
+		async with self._lock:
+			bucket = self._subscribers.get(channel)
+			if not bucket:
+				return
+			seq = self._sequences.get(channel, 0) + 1
+			self._sequences[channel] = seq
+			envelope = {"channel": channel, "seq": seq, "data": message}
+			subscribers = []
+			for ws, stream in bucket.items():
+				buffered = stream.pending.get(channel)
+				if buffered is None:
+					subscribers.append(ws)
+				else:
+					buffered.append(envelope)
+		for ws in subscribers:
+			try:
+				await ws.send_json(envelope)
+			except Exception:
+				await self.disconnect(ws)
 
 	async def broadcast(self, game_id: UUID, message: dict) -> None:
 		async with self._lock:
@@ -44,6 +285,18 @@ class GameConnectionManager:
 				await ws.send_json(message)
 			except Exception:
 				await self.disconnect(ws)
+		await self._publish(game_channel(game_id), message)
+
+	async def broadcast_lobby(self, message: dict) -> None:
+		await self._publish(LOBBY_CHANNEL, message)
+
+	async def publish(self, channel: str, message: dict) -> None:
+		"""Событие только для подписчиков /ws/stream (например, канала турнира)."""
+		await self._publish(channel, message)
+
+	async def deliver_relayed(self, channel: str, message: dict) -> None:
+		"""Событие, пришедшее от соседней реплики: только локальным подписчикам."""
+		await self._publish(channel, message, relay=False)
 
 	async def send_personal(self, websocket: WebSocket, message: dict) -> None:
 		try:
@@ -52,5 +305,26 @@ class GameConnectionManager:
 			await self.disconnect(websocket)
 
 
-game_ws_manager = GameConnectionManager()
+def _limits_from_settings() -> ConnectionLimits:
+	settings = get_settings()
+	return ConnectionLimits(
+		per_user=settings.ws_max_connections_per_user,
+		per_ip=settings.ws_max_connections_per_ip,
+		per_game=settings.ws_max_connections_per_game,
+	)
+
+
+game_ws_manager = GameConnectionManager(_limits_from_settings())
+
+
+def _frame_limiter_from_settings() -> FrameRateLimiter:
+	settings = get_settings()
+	return FrameRateLimiter(
+		rate=settings.ws_frame_rate_per_second,
+		burst=settings.ws_frame_burst,
+		user_rate=settings.ws_user_frame_rate_per_second,
+		user_burst=settings.ws_user_frame_burst,
+	)
+
 
+ws_frame_limiter = _frame_limiter_from_settings()
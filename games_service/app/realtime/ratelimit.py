@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import time
+
+from prometheus_client import Counter
+
+WS_FRAMES_THROTTLED = Counter(
+	"games_ws_frames_throttled_total",
+	"WebSocket frames rejected by the rate limiter",
+	["scope"],
+)
+
+
+class TokenBucket:
+	def __init__(self, *, rate: float, capacity: float) -> None:
+		self.rate = rate
+		self.capacity = capacity
+		self.tokens = capacity
+		self.updated = time.monotonic()
+
+	def consume(self, amount: float = 1.0) -> bool:
+		now = time.monotonic()
+		self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+		self.updated = now
+		if self.tokens < amount:
+			return False
+		self.tokens -= amount
+		return True
+
+	def is_idle(self, now: float) -> bool:
+		return self.tokens + (now - self.updated) * self.rate >= self.capacity
+
+
+class UserRateLimiter:
+	"""Общие для всех соединений пользователя token bucket'ы."""
+
+	PRUNE_EVERY = 1024
+
+	def __init__(self, *, rate: float, capacity: float) -> None:
+		self._rate = rate
+		self._capacity = capacity
+		self._buckets: dict[int, TokenBucket] = {}
+		self._calls = 0
+
+	def consume(self, user_id: int) -> bool:
+		self._calls += 1
+		if self._calls % self.PRUNE_EVERY == 0:
+			self._prune()
+		bucket = self._buckets.get(user_id)
+		if bucket is None:
+			bucket = self._buckets[user_id] = TokenBucket(rate=self._rate, capacity=self._capacity)
+		return bucket.consume()
+
+	def _prune(self) -> None:
+		# Полные бакеты ничем не отличаются от новых — их можно выбросить
+		now = time.monotonic()
+		for user_id in [uid for uid, bucket in self._buckets.items() if bucket.is_idle(now)]:
+			del self._buckets[user_id]
+
+
+class FrameRateLimiter:
+	"""Лимит входящих кадров: отдельный бакет на соединение плюс общий на пользователя."""
+
+	def __init__(self, *, rate: float, burst: float, user_rate: float, user_burst: float) -> None:
+		self._rate = rate
+		self._burst = burst
+		self._users = UserRateLimiter(rate=user_rate, capacity=user_burst)
+
+	def connection_bucket(self) -> TokenBucket:
+		return TokenBucket(rate=self._rate, capacity=self._burst)
+
+	def allow(self, bucket: TokenBucket, user_id: int | None) -> bool:
+		if not bucket.consume():
+			WS_FRAMES_THROTTLED.labels(scope="connection").inc()
+			return False
+		if user_id is not None and not self._users.consume(user_id):
+			WS_FRAMES_THROTTLED.labels(scope="user").inc()
+			return False
+		return True
@@ -0,0 +1,75 @@
+"""
+Пересчёт агрегатов игроков с нуля: python -m app.rebuild_stats
+
+Таблицы агрегатов блокируются на время пересчёта, поэтому завершающиеся в это
+время партии дождутся коммита и учтутся поверх пересчитанных значений.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+
+from sqlalchemy import insert, select, text
+
+from .config import get_settings
+from .database import sync_engine
+from .main import apply_sql_migrations
+from .models import Game, GameStatus, PlayerHeadToHead, PlayerStats, PlayerStreak
+from .services.stats import StatsAccumulator, game_outcomes
+
+STATS_TABLES = "player_stats, player_streaks, player_head_to_head"
+
+
+def rebuild(batch_size: int) -> int:
+	accumulator = StatsAccumulator()
+	bot_id = get_settings().bot_user_id
+	games = 0
+	with sync_engine.begin() as conn:
+		conn.execute(text(f"LOCK TABLE {STATS_TABLES} IN EXCLUSIVE MODE"))
+		stmt = (
+			select(Game.white_id, Game.black_id, Game.result, Game.time_control, Game.finished_at)
+			.where(
+				Game.status == GameStatus.FINISHED.value,
+				Game.source == "live",
+				Game.white_id.is_not(None),
+				Game.black_id.is_not(None),
+				# Тренировочные партии с ботом в статистику не входят
+				Game.white_id != bot_id,
+				Game.black_id != bot_id,
+			)
+			.order_by(Game.finished_at, Game.id)
+			.execution_options(yield_per=batch_size)
+		)
+		for row in conn.execute(stmt):
+			accumulator.add(
+				game_outcomes(row.white_id, row.black_id, row.result, row.time_control),
+				row.finished_at,
+			)
+			games += 1
+			if games % batch_size == 0:
+				print(f"scanned {games} games", file=sys.stderr, flush=True)
+
+		stats, head_to_head, streaks = accumulator.rows()
+		conn.execute(text(f"TRUNCATE {STATS_TABLES}"))
+		for table, rows in (
+			(PlayerStats.__table__, stats),
+			(PlayerHeadToHead.__table__, head_to_head),
+			(PlayerStreak.__table__, streaks),
+		):
+			if rows:
+				conn.execute(insert(table), rows)
+	return games
+
+
+def main(argv: list[str] | None = None) -> int:
+	parser = argparse.ArgumentParser(description="Rebuild player_stats aggregates from finished games")
+	parser.add_argument("--batch-size", type=int, default=5000)
+	args = parser.parse_args(argv)
+
+	apply_sql_migrations()
+	print(f"Rebuilt stats from {rebuild(args.batch_size)} games")
+	return 0
+
+
+if __name__ == "__main__":
+	raise SystemExit(main())
@@ -1,5 +1,7 @@
 from .games import router as games_router
 from .game_ws import router as games_ws_router
+from .seek_ws import router as seek_ws_router
+from .stream_ws import router as stream_ws_router
+from .tournaments import router as tournaments_router
 
-__all__ = ["games_router", "games_ws_router"]
-
+__all__ = ["games_router", "games_ws_router", "seek_ws_router", "stream_ws_router", "tournaments_router"]
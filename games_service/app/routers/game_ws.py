@@ -1,17 +1,24 @@
 from __future__ import annotations
 
+import asyncio
 from typing import Annotated
 from uuid import UUID
 
 from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect
 from pydantic import ValidationError
 
-from common import decode_access_token
+from common import verify_access_token
 
 from ..config import get_settings
 from ..database import SessionLocal
 from ..models import Game, GameStatus
-from ..realtime import ConnectionInfo, game_ws_manager
+from ..realtime import (
+	ConnectionInfo,
+	ConnectionRejected,
+	client_ip,
+	game_ws_manager,
+	ws_frame_limiter,
+)
 from ..schemas import (
 	MakeMovePayload,
 	WsErrorPayload,
@@ -22,14 +29,21 @@ from ..schemas import (
 from ..services import (
 	GameService,
 	GameServiceError,
+	MoveDedupeCache,
+	bot_players,
 	build_game_detail,
-	build_move_out,
+	run_game_command,
 )
 
 router = APIRouter()
 
 RECENT_MOVES_LIMIT = 60
 
+move_dedupe_cache = MoveDedupeCache(
+	ttl_seconds=get_settings().move_dedupe_ttl_seconds,
+	max_entries=get_settings().move_dedupe_max_entries,
+)
+
 
 def _resolve_role(game: Game, user_id: int | None) -> str:
 	if user_id is None:
@@ -41,6 +55,50 @@ def _resolve_role(game: Game, user_id: int | None) -> str:
 	return "viewer"
 
 
+async def _process_move(
+	service: GameService,
+	game_id: UUID,
+	user_id: int,
+	payload: MakeMovePayload,
+) -> tuple[dict, bool]:
+	"""Выполняет ход; возвращает (ответ, был ли он разослан всем подключённым)."""
+	try:
+		game_detail, move_out = await run_game_command(
+			service,
+			"make_move",
+			game_id,
+			player_id=user_id,
+			payload=payload,
+		)
+	except GameServiceError as exc:
+		return (
+			WsErrorPayload(
+				type="move_rejected",
+				message=exc.message,
+				client_move_id=payload.client_move_id,
+			).model_dump(mode="json"),
+			False,
+		)
+
+	move_made = WsMoveMadePayload(
+		type="move_made",
+		client_move_id=payload.client_move_id,
+		move=move_out,
+		game=game_detail,
+	).model_dump(mode="json")
+	await game_ws_manager.broadcast(game_id, move_made)
+
+	if game_detail.status == GameStatus.FINISHED.value:
+		await game_ws_manager.broadcast(
+			game_id,
+			WsGameFinishedPayload(
+				type="game_finished", game=game_detail
+			).model_dump(mode="json"),
+		)
+	bot_players.notify(game_detail)
+	return move_made, True
+
+
 @router.websocket("/ws/games/{game_id}")
 async def game_socket(
 	game_id: UUID,
@@ -50,10 +108,7 @@ async def game_socket(
 	user_id: int | None = None
 	if token:
 		try:
-			settings = get_settings()
-			current_user = decode_access_token(
-				token, settings.jwt_secret, settings.jwt_algorithm
-			)
+			current_user = await verify_access_token(token, get_settings())
 		except Exception:
 			await websocket.close(code=4401)
 			return
@@ -70,17 +125,44 @@ async def game_socket(
 		detail = build_game_detail(game, moves=moves)
 
 		role = _resolve_role(game, user_id)
-		await game_ws_manager.connect(
-			game_id,
-			ConnectionInfo(websocket=websocket, user_id=user_id, role=role),
-		)
+		try:
+			await game_ws_manager.connect(
+				game_id,
+				ConnectionInfo(
+					websocket=websocket,
+					user_id=user_id,
+					role=role,
+					ip=client_ip(websocket),
+				),
+			)
+		except ConnectionRejected:
+			return
 		await websocket.send_json(
 			WsStatePayload(type="state", game=detail).model_dump(mode="json")
 		)
 
+		frame_bucket = ws_frame_limiter.connection_bucket()
 		try:
 			while True:
 				data = await websocket.receive_json()
+				game_ws_manager.touch(websocket)
+				# pong отвечает на ping сервера и лимитом не считается; ping клиента тратит лимит,
+				# иначе поток ping-кадров проходил бы мимо него
+				if isinstance(data, dict) and data.get("type") == "pong":
+					continue
+				# Лимит проверяется до валидации и любых обращений к БД
+				if not ws_frame_limiter.allow(frame_bucket, user_id):
+					await websocket.send_json(
+						WsErrorPayload(
+							type="error",
+							message="Too many messages",
+							client_move_id=data.get("client_move_id") if isinstance(data, dict) else None,
+						).model_dump(mode="json")
+					)
+					continue
+				if isinstance(data, dict) and data.get("type") == "ping":
+					await websocket.send_json({"type": "pong"})
+					continue
 				try:
 					payload = MakeMovePayload.model_validate(data)
 				except ValidationError:
@@ -103,45 +185,36 @@ async def game_socket(
 					)
 					continue
 
-				# Используем ту же сессию db и service, что были созданы выше
-				try:
-					game, move = await service.make_move(
-						game_id,
-						player_id=user_id,
-						payload=payload,
-					)
-				except GameServiceError as exc:
-					await websocket.send_json(
-						WsErrorPayload(
-							type="move_rejected",
-							message=exc.message,
-							client_move_id=payload.client_move_id,
-						).model_dump()
-					)
-					continue
+				dedupe_key = None
+				if payload.client_move_id:
+					# Ретрай того же хода: отдаём исходный результат без обращения к БД
+					dedupe_key = (game_id, user_id, payload.client_move_id)
+					outcome, is_owner = move_dedupe_cache.claim(dedupe_key)
+					if not is_owner:
+						await websocket.send_json(await asyncio.shield(outcome))
+						continue
 
-				moves = await service.get_moves(game_id, limit=RECENT_MOVES_LIMIT)
-				game_detail = build_game_detail(game, moves=moves)
-
-				await game_ws_manager.broadcast(
-					game_id,
-					WsMoveMadePayload(
-						type="move_made",
-						client_move_id=payload.client_move_id,
-						move=build_move_out(move),
-						game=game_detail,
-					).model_dump(mode="json"),
-				)
-
-				if game.status == GameStatus.FINISHED.value:
-					await game_ws_manager.broadcast(
-						game_id,
-						WsGameFinishedPayload(
-							type="game_finished", game=game_detail
-						).model_dump(mode="json"),
-					)
+				try:
+					reply, broadcasted = await _process_move(service, game_id, user_id, payload)
+				except BaseException:
+					if dedupe_key:
+						move_dedupe_cache.discard(
+							dedupe_key,
+							WsErrorPayload(
+								type="error",
+								message="Move processing failed",
+								client_move_id=payload.client_move_id,
+							).model_dump(mode="json"),
+						)
+					raise
+				if dedupe_key:
+					move_dedupe_cache.resolve(dedupe_key, reply)
+				if not broadcasted:
+					await websocket.send_json(reply)
 
 		except WebSocketDisconnect:
+			pass
+		finally:
 			await game_ws_manager.disconnect(websocket)
 		# Сессия автоматически закроется здесь при выходе из async with
 
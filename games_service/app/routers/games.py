@@ -1,33 +1,54 @@
 from __future__ import annotations
 
+import hmac
+from datetime import datetime, timezone
 from typing import Annotated
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from ..config import get_settings
 from ..database import get_db
-from ..models import Game, GameStatus, SideToMove
+from ..models import Game, GameStatus, PgnImportJob, SideToMove
 from ..realtime import game_ws_manager
 from ..schemas import (
+	AddBotRequest,
 	CreateGameRequest,
+	ExplorerResponse,
+	GameAnalysisResponse,
 	GameDetail,
+	GameShardInfo,
 	GameSummary,
 	JoinGameResponse,
 	MoveListResponse,
+	PgnImportJobOut,
+	PlayerRatingResponse,
+	PlayerStatsResponse,
 	ResignRequest,
 	TimeoutRequest,
 	WsGameFinishedPayload,
 	WsStatePayload,
 )
 from ..security import get_current_user_id
+from ..services.pgn_import import JOB_STALE_SECONDS
+from ..sharding import shard_coordinator
 from ..services import (
 	GameService,
 	GameServiceError,
+	bot_players,
 	build_game_detail,
 	build_game_summary,
 	build_move_out,
+	explore_position,
+	get_game_analysis,
+	get_player_rating,
+	get_player_stats,
+	pgn_import_jobs,
+	request_analysis,
+	run_game_command,
 	schedule_auto_cancel,
+	with_auto_cancel_deadline,
 )
 
 router = APIRouter(prefix="/api/games", tags=["games"])
@@ -53,6 +74,11 @@ async def _broadcast_finished(game: GameDetail) -> None:
 	)
 
 
+async def _broadcast_lobby(event: str, game: GameDetail) -> None:
+	summary = GameSummary.model_validate(game.model_dump())
+	await game_ws_manager.broadcast_lobby({"type": event, "game": summary.model_dump(mode="json")})
+
+
 async def _build_detail(service: GameService, game: Game, *, limit: int = RECENT_MOVES_LIMIT) -> GameDetail:
 	moves = await service.get_moves(game.id, limit=limit)
 	return build_game_detail(game, moves=moves)
@@ -72,6 +98,7 @@ async def create_game(
 
 	game_detail = await _build_detail(service, game)
 	await _broadcast_state(game_detail)
+	await _broadcast_lobby("game_created", game_detail)
 	return game_detail
 
 
@@ -98,6 +125,122 @@ async def list_my_games(
 	return [build_game_summary(game) for game in games]
 
 
+@router.get("/explorer", response_model=ExplorerResponse)
+async def explore(
+	fen: Annotated[str, Query(min_length=1, max_length=120)],
+	player_id: Annotated[int | None, Query(ge=1)] = None,
+	db: AsyncSession = Depends(get_db),
+) -> ExplorerResponse:
+	"""Ходы, сыгранные из позиции во всех завершённых партиях (или партиях игрока)."""
+	try:
+		return await explore_position(db, fen, player_id=player_id)
+	except GameServiceError as exc:
+		raise _handle_error(exc)
+
+
+@router.get("/stats/{user_id}", response_model=PlayerStatsResponse)
+async def player_stats(
+	user_id: int,
+	db: AsyncSession = Depends(get_db),
+) -> PlayerStatsResponse:
+	return await get_player_stats(db, user_id)
+
+
+@router.get("/ratings/{user_id}", response_model=PlayerRatingResponse)
+async def player_rating(
+	user_id: int,
+	history_limit: Annotated[int, Query(ge=0, le=500)] = 50,
+	db: AsyncSession = Depends(get_db),
+) -> PlayerRatingResponse:
+	return await get_player_rating(db, user_id, history_limit=history_limit)
+
+
+def _import_job_out(job: PgnImportJob) -> PgnImportJobOut:
+	now = datetime.now(timezone.utc)
+	status_value, error = job.status, job.error
+	if status_value == "running" and (now - job.updated_at).total_seconds() > JOB_STALE_SECONDS:
+		# Процесс, который вёл импорт, перезапущен: задание уже не продолжится
+		status_value, error = "failed", error or "Import process stopped"
+	elapsed = 0.0
+	if job.started_at is not None:
+		elapsed = ((job.finished_at or now) - job.started_at).total_seconds()
+	return PgnImportJobOut(
+		job_id=job.id,
+		status=status_value,
+		chunks=job.chunks,
+		games_imported=job.games_imported,
+		games_skipped=job.games_skipped,
+		moves_imported=job.moves_imported,
+		elapsed_seconds=round(elapsed, 3),
+		games_per_second=round(job.games_imported / elapsed, 1) if elapsed > 0 else 0.0,
+		error=error,
+	)
+
+
+def require_pgn_import_token(
+	x_internal_token: Annotated[str | None, Header()] = None,
+) -> None:
+	"""Импорт через API доступен только со служебным токеном; без него — CLI."""
+	expected = get_settings().pgn_import_token
+	if not expected:
+		raise HTTPException(
+			status_code=status.HTTP_403_FORBIDDEN,
+			detail="PGN import via API is disabled; use python -m app.import_pgn",
+		)
+	if not x_internal_token or not hmac.compare_digest(x_internal_token.encode(), expected.encode()):
+		raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid internal token")
+
+
+async def _json_pgn_body(request: Request):
+	try:
+		payload = await request.json()
+	except ValueError:
+		raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid JSON body")
+	content = payload.get("pgn_content") if isinstance(payload, dict) else None
+	if not isinstance(content, str):
+		raise HTTPException(
+			status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="pgn_content is required"
+		)
+	yield content.encode("utf-8")
+
+
+@router.post(
+	"/import",
+	response_model=PgnImportJobOut,
+	status_code=status.HTTP_202_ACCEPTED,
+	dependencies=[Depends(require_pgn_import_token)],
+)
+async def import_games(
+	request: Request,
+	current_user_id: Annotated[int, Depends(get_current_user_id)],
+	db: AsyncSession = Depends(get_db),
+) -> PgnImportJobOut:
+	"""Принимает PGN (сырой текст или JSON с pgn_content) и импортирует его в фоне."""
+	settings = get_settings()
+	if request.headers.get("content-type", "").startswith("application/json"):
+		body = _json_pgn_body(request)
+	else:
+		body = request.stream()
+	try:
+		path = await pgn_import_jobs.spool(body, max_bytes=settings.pgn_import_max_bytes)
+	except ValueError as exc:
+		raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(exc))
+	job = await pgn_import_jobs.submit(db, path, user_id=current_user_id)
+	return _import_job_out(job)
+
+
+@router.get("/import/{job_id}", response_model=PgnImportJobOut)
+async def get_import_job(
+	job_id: UUID,
+	current_user_id: Annotated[int, Depends(get_current_user_id)],
+	db: AsyncSession = Depends(get_db),
+) -> PgnImportJobOut:
+	job = await pgn_import_jobs.get(db, job_id)
+	if job is None or job.user_id != current_user_id:
+		raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Import job not found")
+	return _import_job_out(job)
+
+
 @router.get("/{game_id}", response_model=GameDetail)
 async def get_game(
 	game_id: UUID,
@@ -123,6 +266,15 @@ async def list_moves(
 	return MoveListResponse(items=[build_move_out(move) for move in moves])
 
 
+@router.get("/{game_id}/shard", response_model=GameShardInfo)
+async def get_game_shard(game_id: UUID) -> GameShardInfo:
+	return GameShardInfo(
+		game_id=game_id,
+		shard=shard_coordinator.owner_of(game_id),
+		members=list(shard_coordinator.members),
+	)
+
+
 @router.post("/{game_id}/join", response_model=JoinGameResponse)
 async def join_game(
 	game_id: UUID,
@@ -131,13 +283,72 @@ async def join_game(
 ) -> JoinGameResponse:
 	service = GameService(db)
 	try:
-		game = await service.join_game(game_id, player_id=current_user_id)
+		game = await run_game_command(service, "join_game", game_id, player_id=current_user_id)
 	except GameServiceError as exc:
 		raise _handle_error(exc)
 
 	await schedule_auto_cancel(game)
-	game_detail = await _build_detail(service, game)
+	game_detail = with_auto_cancel_deadline(game)
 	await _broadcast_state(game_detail)
+	await _broadcast_lobby("game_updated", game_detail)
+	return game_detail
+
+
+@router.get("/{game_id}/analysis", response_model=GameAnalysisResponse)
+async def get_analysis(
+	game_id: UUID,
+	db: AsyncSession = Depends(get_db),
+) -> GameAnalysisResponse:
+	analysis = await get_game_analysis(db, game_id)
+	if analysis is None:
+		raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Analysis not requested")
+	return analysis
+
+
+@router.post("/{game_id}/analysis", response_model=GameAnalysisResponse, status_code=status.HTTP_202_ACCEPTED)
+async def queue_analysis(
+	game_id: UUID,
+	_: Annotated[int, Depends(get_current_user_id)],
+	db: AsyncSession = Depends(get_db),
+) -> GameAnalysisResponse:
+	service = GameService(db)
+	try:
+		game = await service.get_game(game_id)
+	except GameServiceError as exc:
+		raise _handle_error(exc)
+	if game.status != GameStatus.FINISHED.value or not game.move_count:
+		raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Only finished games can be analysed")
+
+	await request_analysis(db, game_id)
+	return await get_game_analysis(db, game_id)
+
+
+@router.post("/{game_id}/bot", response_model=GameDetail)
+async def add_bot(
+	game_id: UUID,
+	current_user_id: Annotated[int, Depends(get_current_user_id)],
+	payload: AddBotRequest | None = None,
+	db: AsyncSession = Depends(get_db),
+) -> GameDetail:
+	service = GameService(db)
+	try:
+		game = await run_game_command(
+			service,
+			"add_bot",
+			game_id,
+			player_id=current_user_id,
+			bot_id=bot_players.user_id,
+			level=(payload or AddBotRequest()).level,
+		)
+	except GameServiceError as exc:
+		raise _handle_error(exc)
+
+	await schedule_auto_cancel(game)
+	game_detail = with_auto_cancel_deadline(game)
+	await _broadcast_state(game_detail)
+	await _broadcast_lobby("game_updated", game_detail)
+	# Бот играет белыми — сразу делает первый ход
+	bot_players.notify(game)
 	return game_detail
 
 
@@ -150,11 +361,10 @@ async def resign_game(
 ) -> GameDetail:
 	service = GameService(db)
 	try:
-		game = await service.resign(game_id, player_id=current_user_id)
+		game_detail = await run_game_command(service, "resign", game_id, player_id=current_user_id)
 	except GameServiceError as exc:
 		raise _handle_error(exc)
 
-	game_detail = await _build_detail(service, game)
 	await _broadcast_finished(game_detail)
 	return game_detail
 
@@ -169,7 +379,9 @@ async def declare_timeout(
 	service = GameService(db)
 	loser = SideToMove.WHITE if request.loser_color == "white" else SideToMove.BLACK
 	try:
-		game = await service.timeout(
+		game_detail = await run_game_command(
+			service,
+			"timeout",
 			game_id,
 			loser_color=loser,
 			requested_by=current_user_id,
@@ -177,7 +389,6 @@ async def declare_timeout(
 	except GameServiceError as exc:
 		raise _handle_error(exc)
 
-	game_detail = await _build_detail(service, game)
 	await _broadcast_finished(game_detail)
 	return game_detail
 
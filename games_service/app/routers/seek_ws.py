@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+from typing import Annotated
+
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+
+from common import verify_access_token
+
+from ..config import get_settings
+from ..database import SessionLocal
+from ..realtime import (
+	ConnectionRejected,
+	StreamConnection,
+	client_ip,
+	game_ws_manager,
+	ws_frame_limiter,
+)
+from ..schemas import WsSeekCommand
+from ..services import Seeker, get_ratings, matchmaker
+from ..sharding import CLOSE_WRONG_SHARD, shard_coordinator
+
+router = APIRouter()
+
+# Очередь подбора живёт в одном процессе: владельце этого ключа на кольце шардов
+MATCHMAKING_SHARD_KEY = "matchmaking"
+
+
+async def _send_error(websocket: WebSocket, message: str) -> None:
+	await websocket.send_json({"type": "error", "message": message})
+
+
+@router.websocket("/ws/seek")
+async def seek_socket(
+	websocket: WebSocket,
+	token: Annotated[str | None, Query()] = None,
+) -> None:
+	if not token:
+		await websocket.close(code=4401)
+		return
+	try:
+		current_user = await verify_access_token(token, get_settings())
+	except Exception:
+		await websocket.close(code=4401)
+		return
+	user_id = current_user.id
+
+	if not shard_coordinator.is_owner(MATCHMAKING_SHARD_KEY):
+		await websocket.accept()
+		await websocket.send_json(
+			{"type": "shard_redirect", "shard": shard_coordinator.owner_of(MATCHMAKING_SHARD_KEY)}
+		)
+		await websocket.close(code=CLOSE_WRONG_SHARD, reason="Wrong shard")
+		return
+
+	connection = StreamConnection(websocket=websocket, user_id=user_id, ip=client_ip(websocket))
+	try:
+		await game_ws_manager.connect_stream(connection)
+	except ConnectionRejected:
+		return
+
+	frame_bucket = ws_frame_limiter.connection_bucket()
+	try:
+		while True:
+			data = await websocket.receive_json()
+			game_ws_manager.touch(websocket)
+			# pong отвечает на ping сервера и лимитом не считается; ping клиента тратит лимит,
+			# иначе поток ping-кадров проходил бы мимо него
+			if isinstance(data, dict) and data.get("type") == "pong":
+				continue
+			if not ws_frame_limiter.allow(frame_bucket, user_id):
+				await _send_error(websocket, "Too many messages")
+				continue
+			if isinstance(data, dict) and data.get("type") == "ping":
+				await websocket.send_json({"type": "pong"})
+				continue
+			try:
+				command = WsSeekCommand.model_validate(data)
+			except ValidationError:
+				await _send_error(websocket, "Invalid payload")
+				continue
+
+			if command.type == "cancel":
+				await matchmaker.cancel(websocket, user_id)
+				await websocket.send_json({"type": "seek_cancelled"})
+				continue
+
+			async with SessionLocal() as db:
+				rating = (await get_ratings(db, [user_id]))[user_id]
+			seeker = Seeker(
+				user_id=user_id,
+				websocket=websocket,
+				rating=rating,
+				time_control=command.time_control,
+			)
+			await websocket.send_json(
+				{"type": "seeking", "bucket": seeker.bucket_label, "rating": round(rating)}
+			)
+			replaced = await matchmaker.seek(seeker)
+			if replaced is not None and replaced.websocket is not websocket:
+				await game_ws_manager.send_personal(
+					replaced.websocket, {"type": "seek_cancelled", "reason": "Replaced by a newer seek"}
+				)
+	except WebSocketDisconnect:
+		pass
+	finally:
+		await matchmaker.cancel(websocket, user_id)
+		await game_ws_manager.disconnect(websocket)
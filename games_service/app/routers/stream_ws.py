@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+from typing import Annotated
+
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+
+from common import verify_access_token
+
+from ..config import get_settings
+from ..database import SessionLocal
+from ..models import GameStatus
+from ..realtime import (
+	TOURNAMENT_CHANNEL_PREFIX,
+	ConnectionRejected,
+	StreamConnection,
+	client_ip,
+	game_ws_manager,
+	parse_channel,
+	ws_frame_limiter,
+)
+from ..schemas import (
+	WsStatePayload,
+	WsStreamAck,
+	WsStreamCommand,
+	WsStreamEnvelope,
+	WsStreamError,
+)
+from ..services import (
+	GameService,
+	GameServiceError,
+	build_game_detail,
+	build_game_summary,
+	get_tournament_detail,
+)
+
+router = APIRouter()
+
+RECENT_MOVES_LIMIT = 60
+LOBBY_SNAPSHOT_LIMIT = 25
+MAX_CHANNELS_PER_CONNECTION = 50
+
+
+async def _channel_snapshot(channel: str) -> dict:
+	entity_id = parse_channel(channel)
+	# Короткая сессия на снапшот: stream-соединение не держит соединение пула
+	async with SessionLocal() as db:
+		if channel.startswith(TOURNAMENT_CHANNEL_PREFIX):
+			detail = await get_tournament_detail(db, entity_id)
+			return {"type": "tournament_state", "tournament": detail.model_dump(mode="json")}
+		service = GameService(db)
+		if entity_id is None:
+			games = await service.list_games(
+				statuses=[GameStatus.CREATED], limit=LOBBY_SNAPSHOT_LIMIT
+			)
+			return {
+				"type": "lobby_state",
+				"games": [build_game_summary(game).model_dump(mode="json") for game in games],
+			}
+		game, moves = await service.get_game_with_moves(entity_id, limit=RECENT_MOVES_LIMIT)
+		return WsStatePayload(type="state", game=build_game_detail(game, moves=moves)).model_dump(
+			mode="json"
+		)
+
+
+async def _send_error(websocket: WebSocket, message: str, channel: str | None = None) -> None:
+	await websocket.send_json(WsStreamError(message=message, channel=channel).model_dump(mode="json"))
+
+
+@router.websocket("/ws/stream")
+async def stream_socket(
+	websocket: WebSocket,
+	token: Annotated[str | None, Query()] = None,
+) -> None:
+	user_id: int | None = None
+	if token:
+		try:
+			current_user = await verify_access_token(token, get_settings())
+		except Exception:
+			await websocket.close(code=4401)
+			return
+		user_id = current_user.id
+
+	connection = StreamConnection(websocket=websocket, user_id=user_id, ip=client_ip(websocket))
+	try:
+		await game_ws_manager.connect_stream(connection)
+	except ConnectionRejected:
+		return
+
+	frame_bucket = ws_frame_limiter.connection_bucket()
+	try:
+		while True:
+			data = await websocket.receive_json()
+			game_ws_manager.touch(websocket)
+			# pong отвечает на ping сервера и лимитом не считается; ping клиента тратит лимит,
+			# иначе поток ping-кадров проходил бы мимо него
+			if isinstance(data, dict) and data.get("type") == "pong":
+				continue
+			if not ws_frame_limiter.allow(frame_bucket, user_id):
+				await _send_error(websocket, "Too many messages")
+				continue
+			if isinstance(data, dict) and data.get("type") == "ping":
+				await websocket.send_json({"type": "pong"})
+				continue
+			try:
+				command = WsStreamCommand.model_validate(data)
+			except ValidationError:
+				await _send_error(websocket, "Invalid payload")
+				continue
+
+			channel = command.channel
+			try:
+				parse_channel(channel)
+			except ValueError:
+				await _send_error(websocket, "Unknown channel", channel)
+				continue
+
+			if command.type == "unsubscribe":
+				await game_ws_manager.unsubscribe(websocket, channel)
+				await websocket.send_json(
+					WsStreamAck(type="unsubscribed", channel=channel).model_dump(mode="json")
+				)
+				continue
+
+			if channel not in connection.channels and len(connection.channels) >= MAX_CHANNELS_PER_CONNECTION:
+				await _send_error(websocket, "Too many subscriptions", channel)
+				continue
+
+			# Сначала подписываемся, затем читаем снапшот: события после seq не потеряются,
+			# а до release() копятся в менеджере и приходят после ack и снапшота
+			seq = await game_ws_manager.subscribe(websocket, channel)
+			try:
+				snapshot = await _channel_snapshot(channel)
+			except GameServiceError as exc:
+				await game_ws_manager.unsubscribe(websocket, channel)
+				await _send_error(websocket, exc.message, channel)
+				continue
+
+			await websocket.send_json(
+				WsStreamAck(type="subscribed", channel=channel, seq=seq).model_dump(mode="json")
+			)
+			await websocket.send_json(
+				WsStreamEnvelope(channel=channel, seq=seq, data=snapshot).model_dump(mode="json")
+			)
+			await game_ws_manager.release(websocket, channel)
+	except WebSocketDisconnect:
+		pass
+	finally:
+		await game_ws_manager.disconnect(websocket)
+
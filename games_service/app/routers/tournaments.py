@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+from typing import Annotated
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database import get_db
+from ..schemas import CreateTournamentRequest, TournamentDetail, TournamentOut
+from ..security import get_current_user_id
+from ..services import (
+	GameServiceError,
+	create_tournament,
+	get_tournament_detail,
+	join_tournament,
+	list_tournaments,
+	start_tournament,
+	withdraw_from_tournament,
+)
+
+router = APIRouter(prefix="/api/games/tournaments", tags=["tournaments"])
+
+
+def _handle_error(exc: GameServiceError) -> HTTPException:
+	return HTTPException(status_code=exc.status_code, detail=exc.message)
+
+
+@router.post("/", response_model=TournamentOut, status_code=status.HTTP_201_CREATED)
+async def create_tournament_endpoint(
+	payload: CreateTournamentRequest,
+	db: Annotated[AsyncSession, Depends(get_db)],
+	current_user_id: Annotated[int, Depends(get_current_user_id)],
+) -> TournamentOut:
+	try:
+		return await create_tournament(db, creator_id=current_user_id, payload=payload)
+	except GameServiceError as exc:
+		raise _handle_error(exc) from exc
+
+
+@router.get("/", response_model=list[TournamentOut])
+async def list_tournaments_endpoint(
+	db: Annotated[AsyncSession, Depends(get_db)],
+	limit: int = Query(50, ge=1, le=200),
+) -> list[TournamentOut]:
+	return await list_tournaments(db, limit=limit)
+
+
+@router.get("/{tournament_id}", response_model=TournamentDetail)
+async def get_tournament_endpoint(
+	tournament_id: UUID,
+	db: Annotated[AsyncSession, Depends(get_db)],
+) -> TournamentDetail:
+	try:
+		return await get_tournament_detail(db, tournament_id)
+	except GameServiceError as exc:
+		raise _handle_error(exc) from exc
+
+
+@router.post("/{tournament_id}/join", status_code=status.HTTP_204_NO_CONTENT)
+async def join_tournament_endpoint(
+	tournament_id: UUID,
+	db: Annotated[AsyncSession, Depends(get_db)],
+	current_user_id: Annotated[int, Depends(get_current_user_id)],
+) -> None:
+	try:
+		await join_tournament(db, tournament_id, user_id=current_user_id)
+	except GameServiceError as exc:
+		raise _handle_error(exc) from exc
+
+
+@router.post("/{tournament_id}/start", response_model=TournamentDetail)
+async def start_tournament_endpoint(
+	tournament_id: UUID,
+	db: Annotated[AsyncSession, Depends(get_db)],
+	current_user_id: Annotated[int, Depends(get_current_user_id)],
+) -> TournamentDetail:
+	try:
+		return await start_tournament(db, tournament_id, user_id=current_user_id)
+	except GameServiceError as exc:
+		raise _handle_error(exc) from exc
+
+
+@router.post("/{tournament_id}/withdraw", status_code=status.HTTP_204_NO_CONTENT)
+async def withdraw_from_tournament_endpoint(
+	tournament_id: UUID,
+	db: Annotated[AsyncSession, Depends(get_db)],
+	current_user_id: Annotated[int, Depends(get_current_user_id)],
+) -> None:
+	try:
+		await withdraw_from_tournament(db, tournament_id, user_id=current_user_id)
+	except GameServiceError as exc:
+		raise _handle_error(exc) from exc
@@ -1,6 +1,9 @@
+from .analysis import GameAnalysisResponse, MoveAnalysisOut, SideAnalysisSummary
 from .game import (
+	AddBotRequest,
 	CreateGameRequest,
 	GameDetail,
+	GameShardInfo,
 	GameSummary,
 	JoinGameResponse,
 	MakeMovePayload,
@@ -14,21 +17,56 @@ from .game import (
 	WsMoveMadePayload,
 	WsStatePayload,
 )
+from .explorer import ExplorerMove, ExplorerResponse
+from .pgn_import import PgnImportJobOut
+from .rating import PlayerRatingResponse, RatingHistoryPoint
+from .stats import HeadToHeadOut, PlayerStatsResponse, ResultCounters
+from .tournament import (
+	CreateTournamentRequest,
+	StandingOut,
+	TournamentDetail,
+	TournamentOut,
+	TournamentPairingOut,
+)
+from .stream import WsSeekCommand, WsStreamAck, WsStreamCommand, WsStreamEnvelope, WsStreamError
 
 __all__ = [
+	"AddBotRequest",
 	"CreateGameRequest",
+	"CreateTournamentRequest",
+	"ExplorerMove",
+	"ExplorerResponse",
+	"GameAnalysisResponse",
 	"GameDetail",
+	"GameShardInfo",
 	"GameSummary",
+	"HeadToHeadOut",
 	"JoinGameResponse",
 	"MakeMovePayload",
+	"MoveAnalysisOut",
 	"MoveListResponse",
 	"MoveOut",
+	"PgnImportJobOut",
+	"PlayerRatingResponse",
+	"PlayerStatsResponse",
+	"RatingHistoryPoint",
 	"ResignRequest",
+	"ResultCounters",
+	"SideAnalysisSummary",
+	"StandingOut",
 	"TimeoutRequest",
 	"TimeControlSettings",
+	"TournamentDetail",
+	"TournamentOut",
+	"TournamentPairingOut",
 	"WsErrorPayload",
 	"WsGameFinishedPayload",
 	"WsMoveMadePayload",
+	"WsSeekCommand",
 	"WsStatePayload",
+	"WsStreamAck",
+	"WsStreamCommand",
+	"WsStreamEnvelope",
+	"WsStreamError",
 ]
 
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Literal
+from uuid import UUID
+
+from pydantic import BaseModel, Field
+
+
+class MoveAnalysisOut(BaseModel):
+	ply: int
+	color: Literal["white", "black"]
+	uci: str
+	san: str | None = None
+	eval_before: int = Field(description="Оценка до хода с точки зрения белых, сантипешки")
+	eval_after: int
+	best_move: str | None = None
+	loss: int = Field(description="Потеря относительно лучшего продолжения для сходившего")
+	classification: Literal["inaccuracy", "mistake", "blunder"] | None = None
+
+
+class SideAnalysisSummary(BaseModel):
+	average_loss: float
+	inaccuracies: int
+	mistakes: int
+	blunders: int
+
+
+class GameAnalysisResponse(BaseModel):
+	game_id: UUID
+	status: Literal["PENDING", "RUNNING", "DONE", "FAILED"]
+	depth: int | None = None
+	requested_at: datetime
+	finished_at: datetime | None = None
+	white: SideAnalysisSummary | None = None
+	black: SideAnalysisSummary | None = None
+	moves: list[MoveAnalysisOut] = Field(default_factory=list)
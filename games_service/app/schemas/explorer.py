@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+from pydantic import BaseModel, Field
+
+from .game import GameSummary
+
+
+class ExplorerMove(BaseModel):
+	uci: str
+	san: str
+	games: int
+	white_wins: int
+	draws: int
+	black_wins: int
+
+
+class ExplorerResponse(BaseModel):
+	fen: str
+	games: int = 0
+	white_wins: int = 0
+	draws: int = 0
+	black_wins: int = 0
+	moves: list[ExplorerMove] = Field(default_factory=list)
+	recent_games: list[GameSummary] = Field(default_factory=list)
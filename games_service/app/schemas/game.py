@@ -76,10 +76,20 @@ class JoinGameResponse(GameDetail):
 	pass
 
 
+class GameShardInfo(BaseModel):
+	game_id: UUID
+	shard: str | None = None
+	members: list[str] = Field(default_factory=list)
+
+
 class MoveListResponse(BaseModel):
 	items: list[MoveOut]
 
 
+class AddBotRequest(BaseModel):
+	level: int = Field(default=3, ge=1, le=5, description="Сила компьютерного соперника")
+
+
 class ResignRequest(BaseModel):
 	side: Literal["white", "black"] | None = None
 
@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+from typing import Literal
+from uuid import UUID
+
+from pydantic import BaseModel
+
+
+class PgnImportJobOut(BaseModel):
+	job_id: UUID
+	status: Literal["queued", "running", "finished", "failed"]
+	chunks: int = 0
+	games_imported: int = 0
+	games_skipped: int = 0
+	moves_imported: int = 0
+	elapsed_seconds: float = 0.0
+	games_per_second: float = 0.0
+	error: str | None = None
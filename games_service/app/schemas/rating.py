@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+
+class RatingHistoryPoint(BaseModel):
+	period_id: int
+	rating: float
+	rd: float
+	closed_at: datetime
+
+
+class PlayerRatingResponse(BaseModel):
+	user_id: int
+	rating: float
+	rd: float = Field(description="Rating deviation (Glicko-2)")
+	volatility: float
+	games: int = 0
+	provisional: bool = Field(description="RD ещё велик — рейтинг предварительный")
+	history: list[RatingHistoryPoint] = Field(default_factory=list)
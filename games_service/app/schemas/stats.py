@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+
+class ResultCounters(BaseModel):
+	games: int = 0
+	wins: int = 0
+	losses: int = 0
+	draws: int = 0
+
+
+class HeadToHeadOut(ResultCounters):
+	opponent_id: int
+
+
+class PlayerStatsResponse(BaseModel):
+	user_id: int
+	total: ResultCounters
+	by_color: dict[str, ResultCounters] = Field(default_factory=dict)
+	by_time_control: dict[str, ResultCounters] = Field(default_factory=dict)
+	current_streak: int = Field(0, description=">0 — победы подряд, <0 — поражения подряд")
+	best_win_streak: int = 0
+	last_game_at: datetime | None = None
+	head_to_head: list[HeadToHeadOut] = Field(default_factory=list)
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from typing import Any, Literal
+
+from pydantic import BaseModel, Field
+
+from .game import TimeControlSettings
+
+
+class WsStreamCommand(BaseModel):
+	type: Literal["subscribe", "unsubscribe"]
+	channel: str = Field(max_length=64, description="'lobby' или 'game:<uuid>'")
+
+
+class WsStreamAck(BaseModel):
+	type: Literal["subscribed", "unsubscribed"]
+	channel: str
+	seq: int = 0
+
+
+class WsStreamError(BaseModel):
+	type: Literal["error"] = "error"
+	message: str
+	channel: str | None = None
+
+
+class WsStreamEnvelope(BaseModel):
+	channel: str
+	seq: int
+	data: dict[str, Any]
+
+
+class WsSeekCommand(BaseModel):
+	type: Literal["seek", "cancel"]
+	time_control: TimeControlSettings | None = None
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Literal
+from uuid import UUID
+
+from pydantic import BaseModel, Field
+
+from .game import TimeControlSettings
+
+
+class CreateTournamentRequest(BaseModel):
+	name: str = Field(min_length=1, max_length=120)
+	kind: Literal["arena", "swiss"]
+	time_control: TimeControlSettings | None = None
+	rounds: int | None = Field(default=None, ge=1, le=30, description="Число туров (швейцарка)")
+	duration_minutes: int | None = Field(default=None, ge=5, le=720, description="Длительность (арена)")
+	starts_at: datetime | None = Field(
+		default=None, description="Время старта; без него турнир запускает организатор"
+	)
+
+
+class TournamentOut(BaseModel):
+	id: UUID
+	name: str
+	kind: Literal["arena", "swiss"]
+	status: Literal["CREATED", "RUNNING", "FINISHED"]
+	created_by: int
+	time_control: dict[str, Any] | None = None
+	rounds: int | None = None
+	duration_seconds: int | None = None
+	current_round: int = 0
+	players: int = 0
+	starts_at: datetime | None = None
+	started_at: datetime | None = None
+	finished_at: datetime | None = None
+
+
+class StandingOut(BaseModel):
+	rank: int
+	user_id: int
+	rating: int
+	score: float
+	games: int
+	wins: int
+	draws: int
+	losses: int
+	buchholz: float
+	playing: bool = False
+	withdrawn: bool = False
+
+
+class TournamentPairingOut(BaseModel):
+	game_id: UUID
+	white_id: int
+	black_id: int
+	result: str | None = None
+
+
+class TournamentDetail(TournamentOut):
+	standings: list[StandingOut] = Field(default_factory=list)
+	pairings: list[TournamentPairingOut] = Field(default_factory=list)
+	checkpointed_at: datetime | None = None
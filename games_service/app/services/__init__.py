@@ -1,20 +1,71 @@
 from .games import (
 	GameService,
 	GameServiceError,
+	auto_cancel_overdue,
 	build_game_detail,
 	build_game_summary,
 	build_move_out,
 	cancel_auto_cancel,
 	schedule_auto_cancel,
+	with_auto_cancel_deadline,
 )
+from .dedupe import MoveDedupeCache
+from .actors import GameActorRegistry, game_actors, run_game_command
+from .analysis import analysis_scheduler, get_game_analysis, request_analysis
+from .explorer import explore_position
+from .stats import get_player_stats, record_game_stats
+from .ratings import get_player_rating, get_ratings, rating_period_scheduler, record_rated_game
+from .matchmaking import Matchmaker, Seeker, matchmaker
+from .tournaments import (
+	create_tournament,
+	get_tournament_detail,
+	join_tournament,
+	list_tournaments,
+	start_tournament,
+	tournament_director,
+	withdraw_from_tournament,
+)
+from .bot import BotPlayers, bot_players
+from .pgn_import import ImportProgress, import_pgn, pgn_import_jobs
 
 __all__ = [
+	"BotPlayers",
+	"GameActorRegistry",
 	"GameService",
 	"GameServiceError",
+	"ImportProgress",
+	"Matchmaker",
+	"MoveDedupeCache",
+	"Seeker",
+	"analysis_scheduler",
+	"auto_cancel_overdue",
+	"bot_players",
 	"build_game_detail",
 	"build_game_summary",
 	"build_move_out",
 	"schedule_auto_cancel",
 	"cancel_auto_cancel",
+	"create_tournament",
+	"explore_position",
+	"game_actors",
+	"get_game_analysis",
+	"get_player_rating",
+	"get_player_stats",
+	"get_ratings",
+	"get_tournament_detail",
+	"import_pgn",
+	"join_tournament",
+	"list_tournaments",
+	"matchmaker",
+	"pgn_import_jobs",
+	"rating_period_scheduler",
+	"record_game_stats",
+	"request_analysis",
+	"record_rated_game",
+	"run_game_command",
+	"start_tournament",
+	"tournament_director",
+	"with_auto_cancel_deadline",
+	"withdraw_from_tournament",
 ]
 
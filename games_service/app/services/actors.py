@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+from typing import Any, Callable
+from uuid import UUID
+
+from ..config import get_settings
+from ..database import SessionLocal
+from .games import GameService, GameServiceError, build_game_detail, build_move_out
+
+LOGGER = logging.getLogger(__name__)
+
+RECENT_MOVES_LIMIT = 60
+
+# Операции GameService, которые меняют состояние партии и идут через актора
+ACTOR_COMMANDS = frozenset({"add_bot", "join_game", "make_move", "resign", "timeout"})
+
+
+class GameActor:
+	"""
+	Единственный владелец активной партии в процессе.
+
+	Команды обрабатываются строго по очереди из mailbox. Каждая команда идёт в
+	своей короткой сессии: партия перечитывается, изменения коммитятся, и
+	соединение сразу возвращается в пул. Актор убирает очередь конкурирующих
+	запросов за блокировку строки, но саму блокировку SELECT ... FOR UPDATE не
+	отменяет: кольца реплик сходятся асинхронно, и пока они расходятся, у партии
+	может быть два владельца. Без конкурентов блокировка берётся сразу.
+	"""
+
+	def __init__(self, game_id: UUID, registry: GameActorRegistry, *, idle_seconds: float) -> None:
+		self.game_id = game_id
+		self._registry = registry
+		self._idle_seconds = idle_seconds
+		self._mailbox: asyncio.Queue[tuple[str, dict[str, Any], asyncio.Future]] = asyncio.Queue()
+		self._task = asyncio.create_task(self._run(), name=f"game-actor-{game_id}")
+
+	def ask(self, op: str, kwargs: dict[str, Any]) -> asyncio.Future:
+		future: asyncio.Future = asyncio.get_running_loop().create_future()
+		self._mailbox.put_nowait((op, kwargs, future))
+		return future
+
+	async def stop(self) -> None:
+		self._task.cancel()
+		with contextlib.suppress(asyncio.CancelledError):
+			await self._task
+
+	async def _run(self) -> None:
+		try:
+			while True:
+				try:
+					op, kwargs, future = await asyncio.wait_for(
+						self._mailbox.get(), timeout=self._idle_seconds
+					)
+				except asyncio.TimeoutError:
+					# Между проверкой и удалением нет await — новая команда не потеряется
+					if self._mailbox.empty():
+						self._registry._forget(self)
+						return
+					continue
+				if future.cancelled():
+					continue
+				try:
+					async with SessionLocal() as db:
+						service = GameService(db)
+						result = await execute_game_command(service, op, self.game_id, **kwargs)
+				except GameServiceError as exc:
+					future.set_exception(exc)
+				except Exception as exc:
+					LOGGER.exception("Game actor %s failed on %s", self.game_id, op)
+					future.set_exception(exc)
+				else:
+					if not future.done():
+						future.set_result(result)
+		finally:
+			self._registry._forget(self)
+			while not self._mailbox.empty():
+				_, _, future = self._mailbox.get_nowait()
+				if not future.done():
+					future.set_exception(GameServiceError("Game actor stopped"))
+
+
+class GameActorRegistry:
+	def __init__(self) -> None:
+		self._actors: dict[UUID, GameActor] = {}
+
+	def __len__(self) -> int:
+		return len(self._actors)
+
+	async def submit(self, game_id: UUID, op: str, **kwargs: Any) -> Any:
+		if op not in ACTOR_COMMANDS:
+			raise ValueError(f"Unsupported actor command: {op}")
+		actor = self._actors.get(game_id)
+		if actor is None:
+			actor = GameActor(
+				game_id, self, idle_seconds=get_settings().games_actor_idle_seconds
+			)
+			self._actors[game_id] = actor
+		return await actor.ask(op, kwargs)
+
+	def _forget(self, actor: GameActor) -> None:
+		if self._actors.get(actor.game_id) is actor:
+			self._actors.pop(actor.game_id, None)
+
+	async def release(self, predicate: Callable[[UUID], bool]) -> int:
+		"""Останавливает акторов партий, для которых predicate(game_id) истинен."""
+		released = 0
+		for actor in [a for game_id, a in self._actors.items() if predicate(game_id)]:
+			await actor.stop()
+			released += 1
+		return released
+
+	async def stop_all(self) -> None:
+		for actor in list(self._actors.values()):
+			await actor.stop()
+		self._actors.clear()
+
+
+game_actors = GameActorRegistry()
+
+
+async def execute_game_command(service: GameService, op: str, game_id: UUID, **kwargs: Any) -> Any:
+	"""
+	Выполняет команду и снимает с результата снимок в той же сессии.
+
+	Returns:
+		(GameDetail, MoveOut) для make_move, GameDetail для остальных команд
+	"""
+	result = await getattr(service, op)(game_id, **kwargs)
+	moves = await service.get_moves(game_id, limit=RECENT_MOVES_LIMIT)
+	if isinstance(result, tuple):
+		game, move = result
+		return build_game_detail(game, moves=moves), build_move_out(move)
+	return build_game_detail(result, moves=moves)
+
+
+async def run_game_command(service: GameService, op: str, game_id: UUID, **kwargs: Any) -> Any:
+	"""
+	Выполняет мутирующую команду партии: через актора в actor-режиме, иначе напрямую.
+
+	Вызывающий получает снимок (GameDetail/MoveOut), а не ORM-объект: в actor-режиме
+	партию к этому моменту может менять уже следующая команда.
+	"""
+	if get_settings().games_actor_mode:
+		return await game_actors.submit(game_id, op, **kwargs)
+	return await execute_game_command(service, op, game_id, **kwargs)
@@ -0,0 +1,415 @@
+"""
+Разбор завершённых партий.
+
+Партии попадают в очередь game_analyses при завершении (или по запросу).
+Процесс-лидер забирает их пачками и оценивает позиции встроенным поиском
+(app/engine.py) в пуле процессов. Оценки позиций кэшируются в position_evals
+по Zobrist-хешу: дебюты повторяются из партии в партию, поэтому с ростом
+кэша считать приходится в основном позиции после выхода из теории.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import and_, or_, select, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from common import LeaderElection
+
+from ..config import get_settings
+from ..database import SessionLocal, async_engine
+from ..engine import MATE_THRESHOLD, analyse_positions
+from ..models import AnalysisStatus, Game, GameAnalysis, Move, PositionEval
+from ..positions import board_from_initial, zobrist_key
+from ..schemas import GameAnalysisResponse, MoveAnalysisOut, SideAnalysisSummary
+
+LOGGER = logging.getLogger(__name__)
+
+INACCURACY_LOSS = 50
+MISTAKE_LOSS = 100
+BLUNDER_LOSS = 300
+# Мат в ответе показывается как ±MATE_EVAL, а при подсчёте потерь приравнивается к ±LOSS_CLAMP
+MATE_EVAL = 10_000
+LOSS_CLAMP = 1_000
+POSITIONS_PER_TASK = 32
+
+
+def _utcnow() -> datetime:
+	return datetime.now(timezone.utc)
+
+
+def classify(loss: int) -> str | None:
+	if loss >= BLUNDER_LOSS:
+		return "blunder"
+	if loss >= MISTAKE_LOSS:
+		return "mistake"
+	if loss >= INACCURACY_LOSS:
+		return "inaccuracy"
+	return None
+
+
+def _display(score: int) -> int:
+	if abs(score) >= MATE_THRESHOLD:
+		return MATE_EVAL if score > 0 else -MATE_EVAL
+	return score
+
+
+def move_analysis(
+	keys: list[int],
+	moves: list[tuple[str, str | None]],
+	evals: dict[int, tuple[int, str | None]],
+	*,
+	white_first: bool,
+) -> list[dict[str, Any]]:
+	"""
+	Оценка каждого хода по оценкам позиций до и после него.
+
+	keys[i] — позиция перед i-м ходом, keys[-1] — финальная; оценки с точки зрения белых.
+	"""
+	rows: list[dict[str, Any]] = []
+	for index, (uci, san) in enumerate(moves):
+		before, best_move = evals[keys[index]]
+		after, _ = evals[keys[index + 1]]
+		white_moved = (index % 2 == 0) == white_first
+		clamped_before = max(min(before, LOSS_CLAMP), -LOSS_CLAMP)
+		clamped_after = max(min(after, LOSS_CLAMP), -LOSS_CLAMP)
+		delta = clamped_before - clamped_after
+		loss = 0 if uci == best_move else max(delta if white_moved else -delta, 0)
+		rows.append(
+			{
+				"ply": index + 1,
+				"color": "white" if white_moved else "black",
+				"uci": uci,
+				"san": san,
+				"eval_before": _display(before),
+				"eval_after": _display(after),
+				"best_move": best_move,
+				"loss": loss,
+				"classification": classify(loss),
+			}
+		)
+	return rows
+
+
+async def enqueue_analysis(db: AsyncSession, game: Game) -> None:
+	"""Ставит завершённую партию в очередь разбора (в транзакции завершения)."""
+	if not game.move_count:
+		return
+	await db.execute(pg_insert(GameAnalysis).values(game_id=game.id).on_conflict_do_nothing())
+
+
+async def request_analysis(db: AsyncSession, game_id: UUID) -> None:
+	"""Ставит партию в очередь; неудавшийся разбор запускается заново."""
+	upsert = pg_insert(GameAnalysis).values(game_id=game_id)
+	await db.execute(
+		upsert.on_conflict_do_update(
+			index_elements=[GameAnalysis.game_id],
+			set_={
+				"status": AnalysisStatus.PENDING.value,
+				"error": None,
+				"requested_at": text("now()"),
+			},
+			where=GameAnalysis.status == AnalysisStatus.FAILED.value,
+		)
+	)
+	await db.commit()
+
+
+async def _claim_batch(batch_games: int, lease_seconds: float) -> list[UUID]:
+	"""Забирает пачку партий в работу короткой транзакцией (PENDING или просроченный RUNNING)."""
+	stale = _utcnow() - timedelta(seconds=lease_seconds)
+	claimable = (
+		select(GameAnalysis.game_id)
+		.where(
+			or_(
+				GameAnalysis.status == AnalysisStatus.PENDING.value,
+				and_(
+					GameAnalysis.status == AnalysisStatus.RUNNING.value,
+					GameAnalysis.claimed_at < stale,
+				),
+			)
+		)
+		.order_by(GameAnalysis.requested_at)
+		.limit(batch_games)
+		.with_for_update(skip_locked=True)
+	)
+	async with SessionLocal() as db:
+		game_ids = (
+			await db.execute(
+				update(GameAnalysis)
+				.where(GameAnalysis.game_id.in_(claimable))
+				.values(status=AnalysisStatus.RUNNING.value, claimed_at=text("now()"))
+				.returning(GameAnalysis.game_id)
+				.execution_options(synchronize_session=False)
+			)
+		).scalars().all()
+		await db.commit()
+	return list(game_ids)
+
+
+async def _release_claims(game_ids: list[UUID]) -> None:
+	"""Возвращает в очередь партии, разбор которых сорвался не по их вине."""
+	async with SessionLocal() as db:
+		await db.execute(
+			update(GameAnalysis)
+			.where(
+				GameAnalysis.game_id.in_(game_ids),
+				GameAnalysis.status == AnalysisStatus.RUNNING.value,
+			)
+			.values(status=AnalysisStatus.PENDING.value, claimed_at=None)
+			.execution_options(synchronize_session=False)
+		)
+		await db.commit()
+
+
+async def analyse_pending(
+	pool: ProcessPoolExecutor,
+	*,
+	depth: int,
+	node_budget: int,
+	batch_games: int,
+	lease_seconds: float,
+) -> int:
+	"""
+	Разбирает пачку партий из очереди; возвращает число обработанных.
+
+	Партии забираются в работу и коммитятся сразу, оценка идёт без открытой
+	транзакции, результаты пишутся отдельной транзакцией. Если процесс умрёт
+	посреди разбора, партии заберёт следующий лидер после analysis_lease_seconds.
+	"""
+	game_ids = await _claim_batch(batch_games, lease_seconds)
+	if not game_ids:
+		return 0
+	try:
+		analysed = await _analyse_claimed(pool, game_ids, depth=depth, node_budget=node_budget)
+	except Exception:
+		await _release_claims(game_ids)
+		raise
+	return analysed
+
+
+async def _analyse_claimed(
+	pool: ProcessPoolExecutor,
+	game_ids: list[UUID],
+	*,
+	depth: int,
+	node_budget: int,
+) -> int:
+	moves_by_game: dict[UUID, list[tuple[str, str | None]]] = defaultdict(list)
+	async with SessionLocal() as db:
+		initial = dict(
+			(await db.execute(select(Game.id, Game.initial_pos).where(Game.id.in_(game_ids)))).all()
+		)
+		for game_id, uci, san in (
+			await db.execute(
+				select(Move.game_id, Move.uci, Move.san)
+				.where(Move.game_id.in_(game_ids))
+				.order_by(Move.game_id, Move.move_index)
+			)
+		).all():
+			moves_by_game[game_id].append((uci, san))
+
+	# Позиции всех партий пачки: одинаковые дебютные позиции считаются один раз
+	positions: dict[int, tuple[str, bool]] = {}
+	plans: dict[UUID, tuple[list[int], bool]] = {}
+	failed: dict[UUID, str] = {}
+	for game_id in game_ids:
+		try:
+			board = board_from_initial(initial.get(game_id))
+			white_first = board.turn
+			keys = [zobrist_key(board)]
+			positions.setdefault(keys[0], (board.fen(), board.turn))
+			for uci, _ in moves_by_game[game_id]:
+				board.push_uci(uci)
+				keys.append(zobrist_key(board))
+				positions.setdefault(keys[-1], (board.fen(), board.turn))
+		except ValueError as exc:
+			failed[game_id] = f"Cannot replay game: {exc}"
+			continue
+		plans[game_id] = (keys, white_first)
+
+	async with SessionLocal() as db:
+		evals: dict[int, tuple[int, str | None]] = {
+			row.zobrist: (row.score, row.best_move)
+			for row in (
+				await db.execute(
+					select(PositionEval).where(
+						PositionEval.zobrist.in_(list(positions)), PositionEval.depth >= depth
+					)
+				)
+			).scalars()
+		}
+	# Дальше считаем без открытой транзакции: строки очереди уже помечены RUNNING
+	rows: list[dict[str, Any]] = []
+	missing = [key for key in positions if key not in evals]
+	if missing:
+		loop = asyncio.get_running_loop()
+		chunks = [missing[i:i + POSITIONS_PER_TASK] for i in range(0, len(missing), POSITIONS_PER_TASK)]
+		results = await asyncio.gather(
+			*(
+				loop.run_in_executor(
+					pool,
+					partial(
+						analyse_positions,
+						[positions[key][0] for key in chunk],
+						max_depth=depth,
+						node_budget=node_budget,
+					),
+				)
+				for chunk in chunks
+			)
+		)
+		for chunk, chunk_results in zip(chunks, results):
+			for key, result in zip(chunk, chunk_results):
+				white_to_move = positions[key][1]
+				score = result.score if white_to_move else -result.score
+				evals[key] = (score, result.uci)
+				rows.append({"zobrist": key, "depth": depth, "score": score, "best_move": result.uci})
+
+	now = _utcnow()
+	updates: list[dict[str, Any]] = [
+		{
+			"game_id": game_id,
+			"status": AnalysisStatus.DONE.value,
+			"depth": depth,
+			"moves": move_analysis(keys, moves_by_game[game_id], evals, white_first=white_first),
+			"finished_at": now,
+			"claimed_at": None,
+		}
+		for game_id, (keys, white_first) in plans.items()
+	]
+	updates.extend(
+		{
+			"game_id": game_id,
+			"status": AnalysisStatus.FAILED.value,
+			"error": error,
+			"finished_at": now,
+			"claimed_at": None,
+		}
+		for game_id, error in failed.items()
+	)
+	async with SessionLocal() as db:
+		if rows:
+			upsert = pg_insert(PositionEval)
+			await db.execute(
+				upsert.on_conflict_do_update(
+					index_elements=[PositionEval.zobrist],
+					set_={
+						"depth": upsert.excluded.depth,
+						"score": upsert.excluded.score,
+						"best_move": upsert.excluded.best_move,
+						"updated_at": text("now()"),
+					},
+					where=PositionEval.depth <= upsert.excluded.depth,
+				),
+				rows,
+			)
+		await db.execute(update(GameAnalysis), updates)
+		await db.commit()
+	LOGGER.info(
+		"Analysed %d game(s): %d position(s), %d from cache",
+		len(game_ids),
+		len(positions),
+		len(positions) - len(missing),
+	)
+	return len(game_ids)
+
+
+def _summary(moves: list[MoveAnalysisOut], color: str) -> SideAnalysisSummary:
+	own = [move for move in moves if move.color == color]
+	return SideAnalysisSummary(
+		average_loss=round(sum(move.loss for move in own) / len(own), 1) if own else 0.0,
+		inaccuracies=sum(move.classification == "inaccuracy" for move in own),
+		mistakes=sum(move.classification == "mistake" for move in own),
+		blunders=sum(move.classification == "blunder" for move in own),
+	)
+
+
+async def get_game_analysis(db: AsyncSession, game_id: UUID) -> GameAnalysisResponse | None:
+	row = await db.get(GameAnalysis, game_id)
+	if row is None:
+		return None
+	moves = [MoveAnalysisOut(**move) for move in row.moves or []]
+	done = row.status == AnalysisStatus.DONE.value
+	return GameAnalysisResponse(
+		game_id=row.game_id,
+		status=row.status,
+		depth=row.depth,
+		requested_at=row.requested_at,
+		finished_at=row.finished_at,
+		white=_summary(moves, "white") if done else None,
+		black=_summary(moves, "black") if done else None,
+		moves=moves,
+	)
+
+
+class AnalysisScheduler:
+	"""Разбирает очередь партий на процессе-лидере в пуле из analysis_workers процессов."""
+
+	def __init__(self, leader: LeaderElection) -> None:
+		self._task: asyncio.Task | None = None
+		self._leader = leader
+		self._pool: ProcessPoolExecutor | None = None
+
+	def start(self) -> None:
+		if self._task and not self._task.done():
+			return
+		self._leader.start()
+		self._task = asyncio.create_task(self._run(), name="game-analysis")
+
+	async def stop(self) -> None:
+		if self._task:
+			self._task.cancel()
+			with contextlib.suppress(asyncio.CancelledError):
+				await self._task
+			self._task = None
+		if self._pool is not None:
+			self._pool.shutdown(wait=False, cancel_futures=True)
+			self._pool = None
+		await self._leader.stop()
+
+	async def _run(self) -> None:
+		settings = get_settings()
+		while True:
+			await asyncio.sleep(settings.analysis_interval_seconds)
+			if not self._leader.is_leader:
+				continue
+			if self._pool is None:
+				self._pool = ProcessPoolExecutor(max_workers=max(settings.analysis_workers, 1))
+			try:
+				# Пока очередь отдаёт полные пачки — разбираем без паузы
+				while True:
+					analysed = await analyse_pending(
+						self._pool,
+						depth=settings.analysis_depth,
+						node_budget=settings.analysis_node_budget,
+						batch_games=settings.analysis_batch_games,
+						lease_seconds=settings.analysis_lease_seconds,
+					)
+					if analysed < settings.analysis_batch_games or not self._leader.is_leader:
+						break
+			except asyncio.CancelledError:
+				raise
+			except BrokenProcessPool:
+				# Рабочий процесс упал (OOM и т.п.) — пул больше не принимает задачи,
+				# пересоздаём его на следующем проходе; партии пачки уже возвращены в очередь
+				LOGGER.warning("Analysis process pool is broken, recreating it")
+				self._pool.shutdown(wait=False, cancel_futures=True)
+				self._pool = None
+			except Exception:  # pragma: no cover - defensive logging
+				LOGGER.exception("Game analysis iteration failed")
+
+
+analysis_scheduler = AnalysisScheduler(
+	LeaderElection(async_engine, "games_service:analysis", retry_interval=15)
+)
@@ -0,0 +1,232 @@
+"""
+Компьютерный соперник.
+
+Поиск хода (app/engine.py) выполняется в ProcessPoolExecutor, поэтому
+событийный цикл не блокируется. Размер пула (bot_workers) ограничивает число
+ядер, которые могут занять боты: лишние запросы ждут в очереди пула и не
+вытесняют партии людей.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from uuid import UUID
+
+import chess
+from sqlalchemy import and_, or_, select
+
+from ..config import get_settings
+from ..database import SessionLocal
+from ..engine import SearchResult, search
+from ..models import Game, GameStatus, SideToMove
+from ..realtime import game_ws_manager
+from ..schemas import GameSummary, MakeMovePayload, WsGameFinishedPayload, WsMoveMadePayload
+from ..sharding import shard_coordinator
+from .actors import run_game_command
+from .games import GameService, GameServiceError
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_LEVEL = 3
+# Уровень -> (глубина, бюджет узлов); итоговые значения ограничены настройками
+BOT_LEVELS = {
+	1: (1, 2_000),
+	2: (2, 10_000),
+	3: (3, 40_000),
+	4: (4, 120_000),
+	5: (5, 300_000),
+}
+
+
+class BotPlayers:
+	def __init__(
+		self,
+		*,
+		user_id: int,
+		workers: int,
+		max_depth: int,
+		max_nodes: int,
+		table_entries: int,
+	) -> None:
+		self.user_id = user_id
+		self._workers = max(workers, 1)
+		self._max_depth = max_depth
+		self._max_nodes = max_nodes
+		self._table_entries = table_entries
+		self._executor: ProcessPoolExecutor | None = None
+		self._tasks: dict[UUID, asyncio.Task] = {}
+		self._rerun: set[UUID] = set()
+		self._resume_task: asyncio.Task | None = None
+
+	def start(self) -> None:
+		"""Доигрывает ходы бота, прерванные перезапуском процесса."""
+		if self._resume_task and not self._resume_task.done():
+			return
+		self._resume_task = asyncio.create_task(self._resume(), name="bot-resume")
+
+	async def stop(self) -> None:
+		if self._resume_task:
+			self._resume_task.cancel()
+			with contextlib.suppress(asyncio.CancelledError):
+				await self._resume_task
+			self._resume_task = None
+		for task in list(self._tasks.values()):
+			task.cancel()
+			with contextlib.suppress(asyncio.CancelledError):
+				await task
+		self._tasks.clear()
+		if self._executor is not None:
+			self._executor.shutdown(wait=False, cancel_futures=True)
+			self._executor = None
+
+	def is_bot_turn(self, game: Game | GameSummary) -> bool:
+		if game.status == GameStatus.FINISHED.value:
+			return False
+		to_move = game.white_id if game.next_turn == SideToMove.WHITE.value else game.black_id
+		return to_move == self.user_id
+
+	def notify(self, game: Game | GameSummary) -> None:
+		"""Ставит ответ бота в очередь, если ход за ним."""
+		if not self.is_bot_turn(game):
+			return
+		if game.id in self._tasks:
+			# Задача ещё дописывает предыдущий ход: пусть перепроверит партию после него
+			self._rerun.add(game.id)
+			return
+		self._tasks[game.id] = asyncio.create_task(self._run(game.id), name=f"bot-{game.id}")
+
+	def _pool(self) -> ProcessPoolExecutor:
+		if self._executor is None:
+			self._executor = ProcessPoolExecutor(max_workers=self._workers)
+		return self._executor
+
+	def _budget(self, game: Game) -> tuple[int, int]:
+		level = int(((game.metadata_json or {}).get("bot") or {}).get("level", DEFAULT_LEVEL))
+		depth, nodes = BOT_LEVELS.get(level, BOT_LEVELS[DEFAULT_LEVEL])
+		return min(depth, self._max_depth), min(nodes, self._max_nodes)
+
+	async def _resume(self) -> None:
+		try:
+			async with SessionLocal() as db:
+				games = (
+					await db.execute(
+						select(Game).where(
+							Game.status != GameStatus.FINISHED.value,
+							or_(
+								and_(Game.white_id == self.user_id, Game.next_turn == SideToMove.WHITE.value),
+								and_(Game.black_id == self.user_id, Game.next_turn == SideToMove.BLACK.value),
+							),
+						)
+					)
+				).scalars().all()
+		except Exception:  # pragma: no cover - defensive logging
+			LOGGER.exception("Failed to resume bot games")
+			return
+		for game in games:
+			if shard_coordinator.is_owner(game.id):
+				self.notify(game)
+
+	async def _run(self, game_id: UUID) -> None:
+		try:
+			while True:
+				self._rerun.discard(game_id)
+				try:
+					await self._reply(game_id)
+				except asyncio.CancelledError:
+					raise
+				except Exception:  # pragma: no cover - defensive logging
+					LOGGER.exception("Bot failed to reply in game %s", game_id)
+				if game_id not in self._rerun:
+					return
+		finally:
+			self._tasks.pop(game_id, None)
+
+	async def _search(self, fen: str, depth: int, nodes: int) -> SearchResult:
+		task = partial(search, fen, max_depth=depth, node_budget=nodes, table_entries=self._table_entries)
+		loop = asyncio.get_running_loop()
+		pool = self._pool()
+		try:
+			return await loop.run_in_executor(pool, task)
+		except BrokenProcessPool:
+			# Воркер упал, и пул больше не принимает задачи: пересоздаём его и пробуем ещё раз
+			LOGGER.warning("Bot process pool is broken, recreating it")
+			self._reset_pool(pool)
+			return await loop.run_in_executor(self._pool(), task)
+
+	def _reset_pool(self, pool: ProcessPoolExecutor) -> None:
+		if self._executor is pool:
+			self._executor = None
+		pool.shutdown(wait=False, cancel_futures=True)
+
+	async def _reply(self, game_id: UUID) -> None:
+		async with SessionLocal() as db:
+			try:
+				game = await GameService(db).get_game(game_id)
+			except GameServiceError:
+				return
+			if not self.is_bot_turn(game):
+				return
+			fen = game.current_pos
+			depth, nodes = self._budget(game)
+			next_turn = game.next_turn
+			white_ms, black_ms = game.white_clock_ms, game.black_clock_ms
+			# None — партия без контроля времени, часы не трогаем
+			increment = int(game.time_control.get("increment_ms") or 0) if game.time_control else None
+		# Сессия закрыта до поиска: ожидание в очереди пула и сам поиск не держат соединение из пула БД
+
+		started = time.monotonic()
+		result = await self._search(fen, depth, nodes)
+		if result.uci is None:
+			return
+		elapsed_ms = int((time.monotonic() - started) * 1000)
+
+		if increment is not None:
+			if next_turn == SideToMove.WHITE.value:
+				white_ms = max(white_ms - elapsed_ms, 0) + increment
+			else:
+				black_ms = max(black_ms - elapsed_ms, 0) + increment
+		promotion = chess.Move.from_uci(result.uci).promotion
+		payload = MakeMovePayload(
+			type="make_move",
+			uci=result.uci,
+			white_clock_ms=white_ms,
+			black_clock_ms=black_ms,
+			promotion=chess.piece_symbol(promotion) if promotion else None,
+		)
+		async with SessionLocal() as db:
+			try:
+				game_detail, move_out = await run_game_command(
+					GameService(db), "make_move", game_id, player_id=self.user_id, payload=payload
+				)
+			except GameServiceError as exc:
+				LOGGER.info("Bot move %s rejected in game %s: %s", result.uci, game_id, exc.message)
+				return
+
+		await game_ws_manager.broadcast(
+			game_id,
+			WsMoveMadePayload(type="move_made", move=move_out, game=game_detail).model_dump(mode="json"),
+		)
+		if game_detail.status == GameStatus.FINISHED.value:
+			await game_ws_manager.broadcast(
+				game_id,
+				WsGameFinishedPayload(type="game_finished", game=game_detail).model_dump(mode="json"),
+			)
+
+
+def _bot_players_from_settings() -> BotPlayers:
+	settings = get_settings()
+	return BotPlayers(
+		user_id=settings.bot_user_id,
+		workers=settings.bot_workers,
+		max_depth=settings.bot_max_depth,
+		max_nodes=settings.bot_max_nodes,
+		table_entries=settings.bot_tt_entries,
+	)
+
+
+bot_players = _bot_players_from_settings()
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from uuid import UUID
+
+DedupeKey = tuple[UUID, int, str]
+
+
+class MoveDedupeCache:
+	"""
+	Кэш результатов make_move по ключу (game_id, player_id, client_move_id).
+
+	Повторная отправка того же хода (ретрай клиента после таймаута) получает
+	исходный ответ без обращения к БД. Если оригинал ещё обрабатывается,
+	повтор ждёт его результат. Записи живут ttl_seconds, размер ограничен;
+	незавершённые записи не вытесняются, поэтому лимит может временно
+	превышаться на число ходов, обрабатываемых прямо сейчас.
+	"""
+
+	def __init__(self, *, ttl_seconds: float, max_entries: int) -> None:
+		self._ttl = ttl_seconds
+		self._max_entries = max_entries
+		self._entries: OrderedDict[DedupeKey, tuple[float, asyncio.Future]] = OrderedDict()
+
+	def __len__(self) -> int:
+		return len(self._entries)
+
+	def claim(self, key: DedupeKey) -> tuple[asyncio.Future, bool]:
+		"""Возвращает (future с результатом, True если вызывающий должен обработать ход сам)."""
+		now = time.monotonic()
+		self._evict(now)
+		entry = self._entries.get(key)
+		if entry is not None:
+			return entry[1], False
+		future: asyncio.Future = asyncio.get_running_loop().create_future()
+		self._entries[key] = (now + self._ttl, future)
+		return future, True
+
+	def resolve(self, key: DedupeKey, result: dict) -> None:
+		entry = self._entries.get(key)
+		if entry is not None and not entry[1].done():
+			entry[1].set_result(result)
+
+	def discard(self, key: DedupeKey, result: dict) -> None:
+		"""Убирает ключ (например, после непредвиденной ошибки), ожидающим отдаёт result."""
+		entry = self._entries.pop(key, None)
+		if entry is not None and not entry[1].done():
+			entry[1].set_result(result)
+
+	def _evict(self, now: float) -> None:
+		# TTL одинаковый для всех записей, поэтому порядок вставки совпадает с порядком истечения
+		for _ in range(len(self._entries)):
+			key, (expires_at, future) = next(iter(self._entries.items()))
+			if expires_at > now and len(self._entries) < self._max_entries:
+				break
+			if not future.done():
+				# Ход ещё обрабатывается: ретраи ждут этот future, а без записи ход
+				# выполнился бы повторно. Запись продлевается и уходит в конец очереди
+				self._entries.move_to_end(key)
+				self._entries[key] = (now + self._ttl, future)
+				continue
+			self._entries.popitem(last=False)
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import chess
+from sqlalchemy import func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import Game, GamePosition, GameResult
+from ..positions import zobrist_key
+from ..schemas import ExplorerMove, ExplorerResponse
+from .games import GameServiceError, build_game_summary
+
+
+def _outcome_counts(column):
+	return (
+		func.count(func.distinct(GamePosition.game_id)).filter(column == GameResult.WHITE_WIN.value),
+		func.count(func.distinct(GamePosition.game_id)).filter(column == GameResult.DRAW.value),
+		func.count(func.distinct(GamePosition.game_id)).filter(column == GameResult.BLACK_WIN.value),
+	)
+
+
+async def explore_position(
+	db: AsyncSession,
+	fen: str,
+	*,
+	player_id: int | None = None,
+	recent_limit: int = 10,
+) -> ExplorerResponse:
+	"""Статистика ходов из позиции по индексу game_positions (поиск по Zobrist-ключу)."""
+	try:
+		board = chess.Board(fen)
+	except ValueError as exc:
+		raise GameServiceError("Invalid FEN supplied") from exc
+
+	key = zobrist_key(board)
+	conditions = [GamePosition.zobrist == key]
+	if player_id is not None:
+		conditions.append(
+			GamePosition.game_id.in_(
+				select(Game.id).where(or_(Game.white_id == player_id, Game.black_id == player_id))
+			)
+		)
+
+	totals = (
+		await db.execute(
+			select(
+				func.count(func.distinct(GamePosition.game_id)),
+				*_outcome_counts(GamePosition.result),
+			).where(*conditions)
+		)
+	).one()
+
+	move_rows = (
+		await db.execute(
+			select(
+				GamePosition.next_move,
+				func.count(func.distinct(GamePosition.game_id)).label("games"),
+				*_outcome_counts(GamePosition.result),
+			)
+			.where(*conditions, GamePosition.next_move.is_not(None))
+			.group_by(GamePosition.next_move)
+			.order_by(func.count(func.distinct(GamePosition.game_id)).desc())
+		)
+	).all()
+
+	moves: list[ExplorerMove] = []
+	for uci, games, white_wins, draws, black_wins in move_rows:
+		try:
+			san = board.san(chess.Move.from_uci(uci))
+		except ValueError:
+			# Коллизия Zobrist-хеша: ход нелегален в запрошенной позиции
+			continue
+		moves.append(
+			ExplorerMove(
+				uci=uci, san=san, games=games, white_wins=white_wins, draws=draws, black_wins=black_wins
+			)
+		)
+
+	recent_ids = select(GamePosition.game_id).where(*conditions).distinct()
+	recent = await db.execute(
+		select(Game)
+		.where(Game.id.in_(recent_ids))
+		.order_by(Game.finished_at.desc().nulls_last())
+		.limit(recent_limit)
+	)
+
+	games_total, white_wins, draws, black_wins = totals
+	return ExplorerResponse(
+		fen=board.fen(),
+		games=games_total,
+		white_wins=white_wins,
+		draws=draws,
+		black_wins=black_wins,
+		moves=moves,
+		recent_games=[build_game_summary(game) for game in recent.scalars().all()],
+	)
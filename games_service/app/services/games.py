@@ -9,11 +9,14 @@ from uuid import UUID
 import chess
 from fastapi import status
 from sqlalchemy import or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from ..config import get_settings
 from ..database import SessionLocal
 from ..models import (
 	Game,
+	GamePosition,
 	GameResult,
 	GameSnapshot,
 	GameStatus,
@@ -27,8 +30,14 @@ from ..schemas import (
 	GameSummary,
 	MakeMovePayload,
 	MoveOut,
+	TimeControlSettings,
 )
+from ..positions import position_rows
 from ..realtime.manager import game_ws_manager
+from ..sharding import shard_coordinator
+from .analysis import enqueue_analysis
+from .ratings import record_rated_game
+from .stats import record_game_stats
 
 SNAPSHOT_INTERVAL = 50
 AUTO_CANCEL_TIMEOUT_SECONDS = 30
@@ -97,6 +106,13 @@ def build_game_detail(game: Game, moves: Sequence[Move] | None = None) -> GameDe
 	return GameDetail(**data)
 
 
+def with_auto_cancel_deadline(detail: GameDetail) -> GameDetail:
+	"""Снимок партии с актуальным сроком автоотмены (после schedule_auto_cancel)."""
+	with _AUTO_CANCEL_LOCK:
+		deadline = _AUTO_CANCEL_DEADLINES.get(detail.id)
+	return detail.model_copy(update={"auto_cancel_at": deadline})
+
+
 async def _persist_auto_cancel_deadline(game_id: UUID, deadline: datetime | None) -> None:
 	async with SessionLocal() as db:
 		db_game = await db.get(Game, game_id)
@@ -122,20 +138,19 @@ async def _auto_cancel_job(game_id: UUID) -> None:
 				return
 			await db.delete(game)
 			await db.commit()
-		await game_ws_manager.broadcast(
-			game_id,
-			{
-				"type": "game_cancelled",
-				"game_id": str(game_id),
-			},
-		)
+		cancelled = {
+			"type": "game_cancelled",
+			"game_id": str(game_id),
+		}
+		await game_ws_manager.broadcast(game_id, cancelled)
+		await game_ws_manager.broadcast_lobby(cancelled)
 	finally:
 		with _AUTO_CANCEL_LOCK:
 			_AUTO_CANCEL_TASKS.pop(game_id, None)
 			_AUTO_CANCEL_DEADLINES.pop(game_id, None)
 
 
-async def schedule_auto_cancel(game: Game) -> None:
+async def schedule_auto_cancel(game: Game | GameSummary) -> None:
 	if (
 		game.status != GameStatus.CREATED.value
 		or game.move_count > 0
@@ -144,6 +159,12 @@ async def schedule_auto_cancel(game: Game) -> None:
 	):
 		await cancel_auto_cancel(game.id)
 		return
+	if not shard_coordinator.is_owner(game.id):
+		# Партию создал не владелец (например, подбор соперника): таймер здесь не заводим,
+		# владелец отменит её по сохранённому сроку (см. auto_cancel_overdue в watchdog)
+		deadline = _utcnow() + timedelta(seconds=AUTO_CANCEL_TIMEOUT_SECONDS)
+		await _persist_auto_cancel_deadline(game.id, deadline)
+		return
 	loop = asyncio.get_running_loop()
 	with _AUTO_CANCEL_LOCK:
 		if game.id in _AUTO_CANCEL_TASKS:
@@ -154,6 +175,20 @@ async def schedule_auto_cancel(game: Game) -> None:
 	await _persist_auto_cancel_deadline(game.id, deadline)
 
 
+def auto_cancel_overdue(game: Game, now: datetime) -> bool:
+	"""Истёк ли сохранённый срок автоотмены партии, за которой не следит таймер этого процесса."""
+	with _AUTO_CANCEL_LOCK:
+		if game.id in _AUTO_CANCEL_TASKS:
+			return False
+	raw_deadline = (game.metadata_json or {}).get("auto_cancel_deadline")
+	if not raw_deadline:
+		return False
+	try:
+		return datetime.fromisoformat(raw_deadline) <= now
+	except ValueError:
+		return False
+
+
 async def cancel_auto_cancel(game_id: UUID) -> None:
 	with _AUTO_CANCEL_LOCK:
 		task = _AUTO_CANCEL_TASKS.pop(game_id, None)
@@ -229,13 +264,47 @@ class GameService:
 		await self.db.refresh(game)
 		return game
 
+	async def create_paired_game(
+		self,
+		*,
+		white_id: int,
+		black_id: int,
+		time_control: TimeControlSettings | None,
+	) -> Game:
+		"""Создаёт партию подобранной пары: оба игрока уже на местах, одна транзакция."""
+		if white_id == black_id:
+			raise GameServiceError("Cannot pair a player with themselves")
+		board = chess.Board()
+		initial_clock = time_control.initial_ms if time_control else 0
+		game = Game(
+			white_id=white_id,
+			black_id=black_id,
+			initial_pos="startpos",
+			current_pos=board.fen(),
+			next_turn=SideToMove.WHITE.value,
+			time_control=time_control.model_dump() if time_control else None,
+			move_count=0,
+			white_clock_ms=initial_clock,
+			black_clock_ms=initial_clock,
+			metadata_json={"matchmaking": True},
+		)
+		self.db.add(game)
+		await self.db.commit()
+		await self.db.refresh(game)
+		return game
+
 	async def list_games(
 		self,
 		*,
 		statuses: list[GameStatus] | None = None,
 		limit: int = 50,
 	) -> list[Game]:
-		stmt = select(Game).order_by(Game.created_at.desc()).limit(limit)
+		stmt = (
+			select(Game)
+			.where(Game.source == "live")
+			.order_by(Game.created_at.desc())
+			.limit(limit)
+		)
 		if statuses:
 			stmt = stmt.where(Game.status.in_([s.value for s in statuses]))
 		result = await self.db.execute(stmt)
@@ -297,6 +366,25 @@ class GameService:
 		await self.db.refresh(game)
 		return game
 
+	async def add_bot(self, game_id: UUID, *, player_id: int, bot_id: int, level: int) -> Game:
+		"""Сажает компьютерного соперника на свободное место партии создателя."""
+		game = await self._lock_game(game_id)
+		if game.status != GameStatus.CREATED.value:
+			raise GameServiceError("Game is not open for joining", status.HTTP_409_CONFLICT)
+		if player_id not in {game.white_id, game.black_id}:
+			raise GameServiceError("You are not a participant", status.HTTP_403_FORBIDDEN)
+		if game.white_id is not None and game.black_id is not None:
+			raise GameServiceError("Game already has two players", status.HTTP_409_CONFLICT)
+
+		if game.white_id is None:
+			game.white_id = bot_id
+		else:
+			game.black_id = bot_id
+		game.metadata_json = {**(game.metadata_json or {}), "bot": {"level": level}}
+		await self.db.commit()
+		await self.db.refresh(game)
+		return game
+
 	async def make_move(
 		self,
 		game_id: UUID,
@@ -376,7 +464,7 @@ class GameService:
 
 		if board.is_checkmate():
 			winner = SideToMove.WHITE.value if player_id == game.white_id else SideToMove.BLACK.value
-			self._finish_game(
+			await self._finish_game(
 				game,
 				winner=winner,
 				reason=TerminationReason.CHECKMATE.value,
@@ -451,9 +539,27 @@ class GameService:
 		game.ended_by = ended_by
 		if winner is None:
 			game.result = GameResult.DRAW.value
-			return
-		game.result = (
-			GameResult.WHITE_WIN.value if winner == SideToMove.WHITE.value else GameResult.BLACK_WIN.value
+		else:
+			game.result = (
+				GameResult.WHITE_WIN.value if winner == SideToMove.WHITE.value else GameResult.BLACK_WIN.value
+			)
+		# Тренировочные партии с ботом не влияют на рейтинг, статистику и индекс позиций
+		if get_settings().bot_user_id not in (game.white_id, game.black_id):
+			await self._index_positions(game)
+			await record_game_stats(self.db, game)
+			await record_rated_game(self.db, game)
+		await enqueue_analysis(self.db, game)
+
+	async def _index_positions(self, game: Game) -> None:
+		"""Пополняет индекс позиций в той же транзакции, что и завершение партии."""
+		# Последний ход (например, мат) ещё не сброшен в БД: autoflush выключен
+		await self.db.flush()
+		result = await self.db.execute(
+			select(Move.uci).where(Move.game_id == game.id).order_by(Move.move_index)
+		)
+		rows = position_rows(game.id, game.initial_pos, result.scalars().all(), game.result)
+		await self.db.execute(
+			pg_insert(GamePosition).values(rows).on_conflict_do_nothing()
 		)
 
 	async def _lock_game(self, game_id: UUID) -> Game:
@@ -0,0 +1,263 @@
+"""
+Подбор соперника для /ws/seek.
+
+Ищущие хранятся в корзинах по контролю времени, внутри корзины — в списке,
+отсортированном по рейтингу. Соседи по рейтингу находятся бинарным поиском,
+поэтому подбор при постановке в очередь — O(log n) плюс просмотр кандидатов
+внутри окна. Окно допустимой разницы рейтингов расширяется со временем
+ожидания; периодический проход пытается свести соседние пары заново.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import itertools
+import logging
+import random
+import time
+from bisect import bisect_left
+from dataclasses import dataclass, field
+
+from fastapi import WebSocket
+
+from ..config import get_settings
+from ..database import SessionLocal
+from ..schemas import TimeControlSettings
+from .games import GameService, schedule_auto_cancel
+from .stats import time_control_key
+
+LOGGER = logging.getLogger(__name__)
+
+_SEQUENCE = itertools.count()
+
+
+@dataclass(eq=False)
+class Seeker:
+	user_id: int
+	websocket: WebSocket
+	rating: float
+	time_control: TimeControlSettings | None
+	joined_at: float = field(default_factory=time.monotonic)
+	seq: int = field(default_factory=lambda: next(_SEQUENCE))
+
+	@property
+	def bucket(self) -> tuple[int, int, str] | None:
+		"""Точный контроль времени: партия создаётся с контролем белых, и он должен совпасть у обоих."""
+		if self.time_control is None:
+			return None
+		return (self.time_control.initial_ms, self.time_control.increment_ms, self.time_control.type)
+
+	@property
+	def bucket_label(self) -> str:
+		return time_control_key(self.time_control.model_dump() if self.time_control else None)
+
+	@property
+	def sort_key(self) -> tuple[float, int]:
+		return (self.rating, self.seq)
+
+
+@dataclass
+class SeekWindow:
+	initial: float
+	growth_per_second: float
+	maximum: float
+
+	def width(self, seeker: Seeker, now: float) -> float:
+		return min(self.initial + self.growth_per_second * (now - seeker.joined_at), self.maximum)
+
+	def accepts(self, a: Seeker, b: Seeker, now: float) -> bool:
+		if a.user_id == b.user_id:
+			return False
+		diff = abs(a.rating - b.rating)
+		return diff <= self.width(a, now) and diff <= self.width(b, now)
+
+
+class SeekBucket:
+	"""Ищущие с одним контролем времени, упорядоченные по (рейтинг, seq)."""
+
+	def __init__(self) -> None:
+		self._keys: list[tuple[float, int]] = []
+		self._seekers: list[Seeker] = []
+
+	def __len__(self) -> int:
+		return len(self._seekers)
+
+	def add(self, seeker: Seeker) -> None:
+		index = bisect_left(self._keys, seeker.sort_key)
+		self._keys.insert(index, seeker.sort_key)
+		self._seekers.insert(index, seeker)
+
+	def remove(self, seeker: Seeker) -> bool:
+		index = bisect_left(self._keys, seeker.sort_key)
+		if index < len(self._seekers) and self._seekers[index] is seeker:
+			del self._keys[index]
+			del self._seekers[index]
+			return True
+		return False
+
+	def closest(self, seeker: Seeker, window: SeekWindow, now: float) -> Seeker | None:
+		"""Ближайший по рейтингу взаимно подходящий соперник."""
+		index = bisect_left(self._keys, seeker.sort_key)
+		left, right = index - 1, index
+		limit = window.width(seeker, now)
+		while left >= 0 or right < len(self._seekers):
+			left_diff = float("inf")
+			right_diff = float("inf")
+			if left >= 0:
+				left_diff = seeker.rating - self._seekers[left].rating
+			if right < len(self._seekers):
+				right_diff = self._seekers[right].rating - seeker.rating
+			if min(left_diff, right_diff) > limit:
+				return None
+			if left_diff <= right_diff:
+				candidate = self._seekers[left]
+				left -= 1
+			else:
+				candidate = self._seekers[right]
+				right += 1
+			if candidate is not seeker and window.accepts(seeker, candidate, now):
+				return candidate
+		return None
+
+	def adjacent_pairs(self, window: SeekWindow, now: float) -> list[tuple[Seeker, Seeker]]:
+		pairs: list[tuple[Seeker, Seeker]] = []
+		index = 0
+		while index + 1 < len(self._seekers):
+			a, b = self._seekers[index], self._seekers[index + 1]
+			if window.accepts(a, b, now):
+				pairs.append((a, b))
+				index += 2
+			else:
+				index += 1
+		return pairs
+
+
+class Matchmaker:
+	def __init__(self, window: SeekWindow, *, sweep_interval: float = 1.0) -> None:
+		self._window = window
+		self._sweep_interval = sweep_interval
+		self._buckets: dict[tuple[int, int, str] | None, SeekBucket] = {}
+		self._by_user: dict[int, Seeker] = {}
+		self._lock = asyncio.Lock()
+		self._task: asyncio.Task | None = None
+
+	def start(self) -> None:
+		if self._task and not self._task.done():
+			return
+		self._task = asyncio.create_task(self._run(), name="matchmaking-sweep")
+
+	async def stop(self) -> None:
+		if self._task:
+			self._task.cancel()
+			with contextlib.suppress(asyncio.CancelledError):
+				await self._task
+			self._task = None
+
+	async def seek(self, seeker: Seeker) -> Seeker | None:
+		"""
+		Ставит игрока в очередь или сразу подбирает пару.
+
+		Returns:
+			Прежний запрос того же пользователя, если он был заменён (с другого сокета)
+		"""
+		async with self._lock:
+			replaced = self._drop(self._by_user.get(seeker.user_id))
+			bucket = self._buckets.setdefault(seeker.bucket, SeekBucket())
+			opponent = bucket.closest(seeker, self._window, time.monotonic())
+			if opponent is None:
+				bucket.add(seeker)
+				self._by_user[seeker.user_id] = seeker
+			else:
+				self._drop(opponent)
+		if opponent is not None:
+			await self._start_game(seeker, opponent)
+		return replaced
+
+	async def cancel(self, websocket: WebSocket, user_id: int) -> bool:
+		async with self._lock:
+			seeker = self._by_user.get(user_id)
+			if seeker is None or seeker.websocket is not websocket:
+				return False
+			self._drop(seeker)
+			return True
+
+	def _drop(self, seeker: Seeker | None) -> Seeker | None:
+		if seeker is None:
+			return None
+		bucket = self._buckets.get(seeker.bucket)
+		if bucket is not None:
+			bucket.remove(seeker)
+			if not len(bucket):
+				self._buckets.pop(seeker.bucket, None)
+		if self._by_user.get(seeker.user_id) is seeker:
+			del self._by_user[seeker.user_id]
+		return seeker
+
+	async def _run(self) -> None:
+		while True:
+			await asyncio.sleep(self._sweep_interval)
+			try:
+				await self._sweep()
+			except asyncio.CancelledError:
+				raise
+			except Exception:  # pragma: no cover - defensive logging
+				LOGGER.exception("Matchmaking sweep failed")
+
+	async def _sweep(self) -> None:
+		now = time.monotonic()
+		async with self._lock:
+			pairs = [
+				pair
+				for bucket in self._buckets.values()
+				for pair in bucket.adjacent_pairs(self._window, now)
+			]
+			for a, b in pairs:
+				self._drop(a)
+				self._drop(b)
+		for a, b in pairs:
+			await self._start_game(a, b)
+
+	async def _start_game(self, a: Seeker, b: Seeker) -> None:
+		white, black = (a, b) if random.random() < 0.5 else (b, a)
+		try:
+			async with SessionLocal() as db:
+				game = await GameService(db).create_paired_game(
+					white_id=white.user_id,
+					black_id=black.user_id,
+					time_control=white.time_control,
+				)
+				await schedule_auto_cancel(game)
+		except Exception:
+			LOGGER.exception("Failed to create game for %s vs %s", white.user_id, black.user_id)
+			for seeker in (a, b):
+				with contextlib.suppress(Exception):
+					await seeker.websocket.send_json({"type": "error", "message": "Failed to create game"})
+			return
+
+		for seeker, color in ((white, "white"), (black, "black")):
+			opponent = black if seeker is white else white
+			with contextlib.suppress(Exception):
+				await seeker.websocket.send_json(
+					{
+						"type": "matched",
+						"game_id": str(game.id),
+						"color": color,
+						"opponent_id": opponent.user_id,
+						"opponent_rating": round(opponent.rating),
+					}
+				)
+
+
+def _matchmaker_from_settings() -> Matchmaker:
+	settings = get_settings()
+	return Matchmaker(
+		SeekWindow(
+			initial=settings.seek_initial_window,
+			growth_per_second=settings.seek_window_growth_per_second,
+			maximum=settings.seek_max_window,
+		),
+		sweep_interval=settings.seek_sweep_interval_seconds,
+	)
+
+
+matchmaker = _matchmaker_from_settings()
@@ -0,0 +1,137 @@
+"""
+Жеребьёвка турниров: арена (пара сразу, как игроки освободились) и швейцарская система.
+
+Функции чистые и работают над таблицей положения в памяти, поэтому тур на
+несколько сотен игроков раскладывается за миллисекунды без обращений к БД.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from uuid import UUID
+
+MAX_BACKTRACK_STEPS = 20000
+
+
+@dataclass
+class Standing:
+	user_id: int
+	rating: float
+	score: float = 0.0
+	games: int = 0
+	wins: int = 0
+	draws: int = 0
+	losses: int = 0
+	white_games: int = 0
+	black_games: int = 0
+	had_bye: bool = False
+	opponents: list[int] = field(default_factory=list)
+	current_game: UUID | None = None
+	withdrawn: bool = False
+	# Поражения подряд без единого своего хода (неявка к партии)
+	no_shows: int = 0
+
+	@property
+	def color_balance(self) -> int:
+		return self.white_games - self.black_games
+
+	@property
+	def last_opponent(self) -> int | None:
+		return self.opponents[-1] if self.opponents else None
+
+	def record(self, opponent_id: int | None, color: str | None, score: float) -> None:
+		self.score += score
+		self.games += 1
+		if score == 1.0:
+			self.wins += 1
+		elif score == 0.5:
+			self.draws += 1
+		else:
+			self.losses += 1
+		if opponent_id is not None:
+			self.opponents.append(opponent_id)
+		if color == "white":
+			self.white_games += 1
+		elif color == "black":
+			self.black_games += 1
+
+
+def ranking_key(standing: Standing) -> tuple:
+	return (-standing.score, -standing.rating, standing.user_id)
+
+
+def assign_colors(a: Standing, b: Standing) -> tuple[int, int]:
+	"""(white_id, black_id): белыми играет тот, у кого меньше перекос в сторону белых."""
+	if a.color_balance < b.color_balance:
+		return a.user_id, b.user_id
+	if b.color_balance < a.color_balance:
+		return b.user_id, a.user_id
+	return (a.user_id, b.user_id) if ranking_key(a) <= ranking_key(b) else (b.user_id, a.user_id)
+
+
+def arena_pairings(free: list[Standing]) -> list[tuple[int, int]]:
+	"""Соседей по таблице ставим в пары, избегая немедленного реванша, если есть замена."""
+	order = sorted(free, key=ranking_key)
+	pairs: list[tuple[int, int]] = []
+	while len(order) >= 2:
+		player = order.pop(0)
+		index = next(
+			(i for i, candidate in enumerate(order) if candidate.user_id != player.last_opponent),
+			0,
+		)
+		opponent = order.pop(index)
+		pairs.append(assign_colors(player, opponent))
+	return pairs
+
+
+def _pair_without_rematches(order: list[Standing]) -> list[tuple[Standing, Standing]] | None:
+	steps = 0
+	pairs: list[tuple[Standing, Standing]] = []
+
+	def solve(remaining: list[Standing]) -> bool:
+		nonlocal steps
+		if not remaining:
+			return True
+		player, rest = remaining[0], remaining[1:]
+		met = set(player.opponents)
+		for index, candidate in enumerate(rest):
+			steps += 1
+			if steps > MAX_BACKTRACK_STEPS:
+				return False
+			if candidate.user_id in met:
+				continue
+			pairs.append((player, candidate))
+			if solve(rest[:index] + rest[index + 1:]):
+				return True
+			pairs.pop()
+		return False
+
+	return pairs if solve(order) else None
+
+
+def swiss_pairings(players: list[Standing]) -> tuple[list[tuple[int, int]], int | None]:
+	"""
+	Пары очередного тура по швейцарской системе (вариант Монрада).
+
+	Игроки упорядочиваются по очкам и рейтингу, соседи по таблице играют друг
+	с другом; повторные встречи обходятся перебором с возвратом (с лимитом шагов,
+	после которого повторы допускаются). При нечётном числе игроков bye получает
+	самый низкий в таблице игрок, у которого его ещё не было.
+
+	Returns:
+		Список (white_id, black_id) и user_id игрока с bye (или None)
+	"""
+	order = sorted((p for p in players if not p.withdrawn), key=ranking_key)
+	bye: Standing | None = None
+	if len(order) % 2:
+		bye = next((p for p in reversed(order) if not p.had_bye), order[-1])
+		order.remove(bye)
+
+	matched = _pair_without_rematches(order)
+	if matched is None:
+		matched = [(order[i], order[i + 1]) for i in range(0, len(order) - 1, 2)]
+	pairs = [assign_colors(a, b) for a, b in matched]
+	return pairs, bye.user_id if bye else None
+
+
+def buchholz(standing: Standing, table: dict[int, Standing]) -> float:
+	return sum(table[opponent].score for opponent in standing.opponents if opponent in table)
@@ -0,0 +1,234 @@
+"""
+Массовый импорт партий из PGN.
+
+Поток строк режется на куски, куски разбираются в ProcessPoolExecutor
+(python-chess упирается в CPU и GIL), а результаты пишутся в БД пачками через
+executemany: одна транзакция на кусок вместо ORM-вставки по строке.
+
+Основной путь для больших файлов — python -m app.import_pgn; эндпоинт API
+закрыт служебным токеном и разбирает файлы в небольшом пуле процессов.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Iterable
+from uuid import UUID, uuid4
+
+from sqlalchemy import insert, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import get_settings
+from ..database import sync_engine
+from ..models import Game, GamePosition, GameSnapshot, Move, PgnImportJob
+from ..pgn_parsing import ParsedChunk, iter_pgn_chunks, parse_pgn_chunk
+
+LOGGER = logging.getLogger(__name__)
+
+# Прогресс задания пишется в БД не чаще раза в секунду
+PROGRESS_WRITE_SECONDS = 1.0
+# Задание running без обновлений дольше этого считается брошенным (процесс перезапущен)
+JOB_STALE_SECONDS = 600
+
+
+@dataclass
+class ImportProgress:
+	chunks: int = 0
+	games_imported: int = 0
+	games_skipped: int = 0
+	moves_imported: int = 0
+	started_at: float = field(default_factory=time.monotonic)
+	finished_at: float | None = None
+
+	@property
+	def elapsed_seconds(self) -> float:
+		end = self.finished_at if self.finished_at is not None else time.monotonic()
+		return end - self.started_at
+
+	@property
+	def games_per_second(self) -> float:
+		elapsed = self.elapsed_seconds
+		return self.games_imported / elapsed if elapsed > 0 else 0.0
+
+
+def _write_chunk(engine: Engine, chunk: ParsedChunk) -> None:
+	if not chunk.games:
+		return
+	with engine.begin() as conn:
+		conn.execute(insert(Game.__table__), chunk.games)
+		if chunk.moves:
+			conn.execute(insert(Move.__table__), chunk.moves)
+		if chunk.snapshots:
+			conn.execute(insert(GameSnapshot.__table__), chunk.snapshots)
+		if chunk.positions:
+			conn.execute(insert(GamePosition.__table__), chunk.positions)
+
+
+def import_pgn(
+	lines: Iterable[str],
+	*,
+	engine: Engine = sync_engine,
+	workers: int | None = None,
+	games_per_chunk: int | None = None,
+	imported_by: int | None = None,
+	on_progress: Callable[[ImportProgress], None] | None = None,
+) -> ImportProgress:
+	"""
+	Импортирует партии из потока строк PGN (синхронно, для CLI и фонового потока).
+
+	В полёте держится не больше 2 * workers кусков, поэтому память не растёт
+	с размером файла. Партии с ошибками или без результата пропускаются.
+	"""
+	settings = get_settings()
+	# CLI по умолчанию занимает все ядра; задания API передают pgn_import_workers
+	workers = workers or os.cpu_count() or 1
+	games_per_chunk = games_per_chunk or settings.pgn_import_chunk_games
+	progress = ImportProgress()
+
+	def consume(future: Future) -> None:
+		chunk: ParsedChunk = future.result()
+		_write_chunk(engine, chunk)
+		progress.chunks += 1
+		progress.games_imported += len(chunk.games)
+		progress.games_skipped += chunk.skipped
+		progress.moves_imported += len(chunk.moves)
+		if on_progress is not None:
+			on_progress(progress)
+
+	with ProcessPoolExecutor(max_workers=workers) as pool:
+		pending: set[Future] = set()
+		try:
+			for text in iter_pgn_chunks(lines, games_per_chunk):
+				if len(pending) >= workers * 2:
+					done, pending = wait(pending, return_when=FIRST_COMPLETED)
+					for future in done:
+						consume(future)
+				pending.add(pool.submit(parse_pgn_chunk, text, imported_by))
+			while pending:
+				done, pending = wait(pending, return_when=FIRST_COMPLETED)
+				for future in done:
+					consume(future)
+		except BaseException:
+			for future in pending:
+				future.cancel()
+			raise
+
+	progress.finished_at = time.monotonic()
+	return progress
+
+
+def _utcnow() -> datetime:
+	return datetime.now(timezone.utc)
+
+
+def _update_job(job_id: UUID, **values) -> None:
+	with sync_engine.begin() as conn:
+		conn.execute(
+			update(PgnImportJob.__table__)
+			.where(PgnImportJob.__table__.c.id == job_id)
+			.values(updated_at=_utcnow(), **values)
+		)
+
+
+def _progress_values(progress: ImportProgress) -> dict[str, int]:
+	return {
+		"chunks": progress.chunks,
+		"games_imported": progress.games_imported,
+		"games_skipped": progress.games_skipped,
+		"moves_imported": progress.moves_imported,
+	}
+
+
+class PgnImportJobs:
+	"""
+	Фоновые импорты, запущенные через API.
+
+	Импорты выполняются по одному в небольшом пуле (pgn_import_workers): процесс
+	обслуживает живые партии, а крупные загрузки лучше вести через CLI. Состояние
+	задания хранится в pgn_import_jobs, поэтому прогресс отдаёт любая реплика.
+	"""
+
+	def __init__(self) -> None:
+		self._semaphore: asyncio.Semaphore | None = None
+		self._tasks: set[asyncio.Task] = set()
+
+	async def get(self, db: AsyncSession, job_id: UUID) -> PgnImportJob | None:
+		return await db.get(PgnImportJob, job_id)
+
+	async def spool(self, chunks, *, max_bytes: int) -> Path:
+		"""Сохраняет тело запроса во временный файл, не держа его в памяти целиком."""
+		handle = tempfile.NamedTemporaryFile("wb", suffix=".pgn", delete=False)
+		path = Path(handle.name)
+		size = 0
+		try:
+			with handle:
+				async for data in chunks:
+					size += len(data)
+					if size > max_bytes:
+						raise ValueError("PGN upload is too large")
+					handle.write(data)
+		except BaseException:
+			path.unlink(missing_ok=True)
+			raise
+		return path
+
+	async def submit(self, db: AsyncSession, path: Path, *, user_id: int) -> PgnImportJob:
+		job = PgnImportJob(id=uuid4(), user_id=user_id, status="queued")
+		db.add(job)
+		await db.commit()
+		await db.refresh(job)
+		task = asyncio.create_task(self._run(job.id, user_id, path), name=f"pgn-import:{job.id}")
+		self._tasks.add(task)
+		task.add_done_callback(self._tasks.discard)
+		return job
+
+	async def _run(self, job_id: UUID, user_id: int, path: Path) -> None:
+		if self._semaphore is None:
+			self._semaphore = asyncio.Semaphore(1)
+		workers = max(get_settings().pgn_import_workers, 1)
+		try:
+			async with self._semaphore:
+				await asyncio.to_thread(_update_job, job_id, status="running", started_at=_utcnow())
+				last_write = time.monotonic()
+
+				def on_progress(progress: ImportProgress) -> None:
+					nonlocal last_write
+					if time.monotonic() - last_write < PROGRESS_WRITE_SECONDS:
+						return
+					last_write = time.monotonic()
+					_update_job(job_id, **_progress_values(progress))
+
+				def run() -> ImportProgress:
+					with path.open("r", encoding="utf-8", errors="replace") as source:
+						return import_pgn(
+							source, workers=workers, imported_by=user_id, on_progress=on_progress
+						)
+
+				progress = await asyncio.to_thread(run)
+				await asyncio.to_thread(
+					_update_job,
+					job_id,
+					status="finished",
+					finished_at=_utcnow(),
+					**_progress_values(progress),
+				)
+		except Exception as exc:
+			LOGGER.exception("PGN import %s failed", job_id)
+			with contextlib.suppress(Exception):
+				await asyncio.to_thread(
+					_update_job, job_id, status="failed", error=str(exc), finished_at=_utcnow()
+				)
+		finally:
+			path.unlink(missing_ok=True)
+
+
+pgn_import_jobs = PgnImportJobs()
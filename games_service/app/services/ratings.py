@@ -0,0 +1,252 @@
+"""
+Рейтинги Glicko-2.
+
+Завершённые партии попадают в очередь rated_games в транзакции завершения.
+Лидер периодически закрывает рейтинговый период: забирает все ожидающие
+партии и пересчитывает рейтинги всех затронутых игроков одним пакетом NumPy.
+Пустые периоды тоже сохраняются, а пропущенные игроком периоды считаются по
+времени с его последнего периода (last_rated_at), а не по разрыву id.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+
+import numpy as np
+from sqlalchemy import insert, select, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from common import LeaderElection
+
+from ..config import get_settings
+from ..database import SessionLocal, async_engine
+from ..glicko2 import (
+	DEFAULT_RATING,
+	DEFAULT_RD,
+	DEFAULT_VOLATILITY,
+	RatingBatch,
+	inflate_rd,
+	rate_period,
+)
+from ..models import Game, GameResult, PlayerRating, RatedGame, RatingHistory, RatingPeriod
+from ..schemas import PlayerRatingResponse, RatingHistoryPoint
+
+LOGGER = logging.getLogger(__name__)
+
+PROVISIONAL_RD = 110.0
+WHITE_SCORES = {
+	GameResult.WHITE_WIN.value: 1.0,
+	GameResult.DRAW.value: 0.5,
+	GameResult.BLACK_WIN.value: 0.0,
+}
+
+CLAIM_PENDING_GAMES = text(
+	"""
+	UPDATE rated_games SET period_id = :period_id
+	WHERE period_id IS NULL
+	RETURNING white_id, black_id, white_score
+	"""
+)
+
+
+async def record_rated_game(db: AsyncSession, game: Game) -> None:
+	"""Ставит завершённую партию в очередь ближайшего рейтингового периода."""
+	if game.white_id is None or game.black_id is None or game.result not in WHITE_SCORES:
+		return
+	await db.execute(
+		pg_insert(RatedGame)
+		.values(
+			game_id=game.id,
+			white_id=game.white_id,
+			black_id=game.black_id,
+			white_score=WHITE_SCORES[game.result],
+			finished_at=game.finished_at,
+		)
+		.on_conflict_do_nothing()
+	)
+
+
+async def close_rating_period(db: AsyncSession, *, tau: float, period_seconds: float) -> int:
+	"""Закрывает период и пересчитывает рейтинги; возвращает число учтённых партий."""
+	period_id, closed_at = (
+		await db.execute(
+			insert(RatingPeriod).values().returning(RatingPeriod.id, RatingPeriod.closed_at)
+		)
+	).one()
+	games = (await db.execute(CLAIM_PENDING_GAMES, {"period_id": period_id})).all()
+	if not games:
+		# Пустой период фиксируется явно: история периодов не зависит от пропусков в sequence
+		await db.commit()
+		return 0
+
+	white_ids = np.fromiter((row.white_id for row in games), dtype=np.int64, count=len(games))
+	black_ids = np.fromiter((row.black_id for row in games), dtype=np.int64, count=len(games))
+	white_score = np.fromiter((row.white_score for row in games), dtype=np.float64, count=len(games))
+	user_ids, inverse = np.unique(np.concatenate([white_ids, black_ids]), return_inverse=True)
+	white_idx, black_idx = inverse[: len(games)], inverse[len(games):]
+
+	existing = {
+		row.user_id: row
+		for row in (
+			await db.execute(select(PlayerRating).where(PlayerRating.user_id.in_(user_ids.tolist())))
+		).scalars()
+	}
+	count = len(user_ids)
+	rating = np.full(count, DEFAULT_RATING)
+	rd = np.full(count, DEFAULT_RD)
+	volatility = np.full(count, DEFAULT_VOLATILITY)
+	idle_periods = np.zeros(count)
+	previous_games = np.zeros(count, dtype=np.int64)
+	for index, user_id in enumerate(user_ids.tolist()):
+		row = existing.get(user_id)
+		if row is None:
+			continue
+		rating[index], rd[index], volatility[index] = row.rating, row.rd, row.volatility
+		previous_games[index] = row.games
+		if row.last_rated_at is not None:
+			# Целые периоды с последнего рейтингового периода игрока, не считая текущего
+			elapsed = (closed_at - row.last_rated_at).total_seconds()
+			idle_periods[index] = max(elapsed // period_seconds - 1, 0)
+	# Неактивность в пропущенных периодах учитываем лениво, только для вернувшихся игроков
+	rd = inflate_rd(rd, volatility, idle_periods)
+
+	before = RatingBatch(rating=rating, rd=rd, volatility=volatility)
+	after = await asyncio.to_thread(rate_period, before, white_idx, black_idx, white_score, tau=tau)
+	games_played = np.bincount(np.concatenate([white_idx, black_idx]), minlength=count)
+
+	rows = [
+		{
+			"user_id": user_id,
+			"rating": float(after.rating[index]),
+			"rd": float(after.rd[index]),
+			"volatility": float(after.volatility[index]),
+			"games": int(previous_games[index] + games_played[index]),
+			"last_period_id": period_id,
+			"last_rated_at": closed_at,
+		}
+		for index, user_id in enumerate(user_ids.tolist())
+	]
+	upsert = pg_insert(PlayerRating)
+	await db.execute(
+		upsert.on_conflict_do_update(
+			index_elements=[PlayerRating.user_id],
+			set_={
+				"rating": upsert.excluded.rating,
+				"rd": upsert.excluded.rd,
+				"volatility": upsert.excluded.volatility,
+				"games": upsert.excluded.games,
+				"last_period_id": upsert.excluded.last_period_id,
+				"last_rated_at": upsert.excluded.last_rated_at,
+				"updated_at": text("now()"),
+			},
+		),
+		rows,
+	)
+	await db.execute(
+		insert(RatingHistory),
+		[
+			{
+				"user_id": row["user_id"],
+				"period_id": period_id,
+				"rating": row["rating"],
+				"rd": row["rd"],
+				"volatility": row["volatility"],
+			}
+			for row in rows
+		],
+	)
+	await db.execute(
+		update(RatingPeriod)
+		.where(RatingPeriod.id == period_id)
+		.values(games=len(games), players=count)
+	)
+	await db.commit()
+	return len(games)
+
+
+async def get_player_rating(db: AsyncSession, user_id: int, *, history_limit: int = 50) -> PlayerRatingResponse:
+	row = await db.get(PlayerRating, user_id)
+	history = (
+		await db.execute(
+			select(RatingHistory, RatingPeriod.closed_at)
+			.join(RatingPeriod, RatingPeriod.id == RatingHistory.period_id)
+			.where(RatingHistory.user_id == user_id)
+			.order_by(RatingHistory.period_id.desc())
+			.limit(history_limit)
+		)
+	).all()
+	rd = row.rd if row else DEFAULT_RD
+	return PlayerRatingResponse(
+		user_id=user_id,
+		rating=round(row.rating if row else DEFAULT_RATING, 1),
+		rd=round(rd, 1),
+		volatility=row.volatility if row else DEFAULT_VOLATILITY,
+		games=row.games if row else 0,
+		provisional=rd > PROVISIONAL_RD,
+		history=[
+			RatingHistoryPoint(
+				period_id=point.period_id,
+				rating=round(point.rating, 1),
+				rd=round(point.rd, 1),
+				closed_at=closed_at,
+			)
+			for point, closed_at in reversed(history)
+		],
+	)
+
+
+async def get_ratings(db: AsyncSession, user_ids: list[int]) -> dict[int, float]:
+	"""Текущие рейтинги игроков; новичкам — рейтинг по умолчанию."""
+	result = await db.execute(
+		select(PlayerRating.user_id, PlayerRating.rating).where(PlayerRating.user_id.in_(user_ids))
+	)
+	ratings = {user_id: DEFAULT_RATING for user_id in user_ids}
+	ratings.update({user_id: rating for user_id, rating in result.all()})
+	return ratings
+
+
+class RatingPeriodScheduler:
+	"""Закрывает рейтинговые периоды раз в rating_period_seconds на процессе-лидере."""
+
+	def __init__(self, leader: LeaderElection) -> None:
+		self._task: asyncio.Task | None = None
+		self._leader = leader
+
+	def start(self) -> None:
+		if self._task and not self._task.done():
+			return
+		self._leader.start()
+		self._task = asyncio.create_task(self._run(), name="rating-periods")
+
+	async def stop(self) -> None:
+		if self._task:
+			self._task.cancel()
+			with contextlib.suppress(asyncio.CancelledError):
+				await self._task
+			self._task = None
+		await self._leader.stop()
+
+	async def _run(self) -> None:
+		settings = get_settings()
+		while True:
+			await asyncio.sleep(settings.rating_period_seconds)
+			if not self._leader.is_leader:
+				continue
+			try:
+				async with SessionLocal() as db:
+					rated = await close_rating_period(
+						db, tau=settings.glicko_tau, period_seconds=settings.rating_period_seconds
+					)
+				if rated:
+					LOGGER.info("Closed rating period with %d game(s)", rated)
+			except asyncio.CancelledError:
+				raise
+			except Exception:  # pragma: no cover - defensive logging
+				LOGGER.exception("Rating period iteration failed")
+
+
+rating_period_scheduler = RatingPeriodScheduler(
+	LeaderElection(async_engine, "games_service:rating-periods", retry_interval=15)
+)
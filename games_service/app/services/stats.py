@@ -0,0 +1,226 @@
+"""
+Агрегаты по игрокам: итоги по цвету и контролю времени, серии и личные встречи.
+
+Строки обновляются UPSERT'ами в транзакции завершения партии, поэтому чтение
+статистики — выборка нескольких строк по первичному ключу, без скана games.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Iterable
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import Game, GameResult, PlayerHeadToHead, PlayerStats, PlayerStreak
+from ..schemas import HeadToHeadOut, PlayerStatsResponse, ResultCounters
+
+UNTIMED = "untimed"
+HEAD_TO_HEAD_LIMIT = 20
+
+STATS_UPSERT = text(
+	"""
+	INSERT INTO player_stats (user_id, color, time_control, games, wins, losses, draws)
+	VALUES (:user_id, :color, :time_control, 1, :win, :loss, :draw)
+	ON CONFLICT (user_id, color, time_control) DO UPDATE SET
+		games = player_stats.games + 1,
+		wins = player_stats.wins + EXCLUDED.wins,
+		losses = player_stats.losses + EXCLUDED.losses,
+		draws = player_stats.draws + EXCLUDED.draws
+	"""
+)
+
+HEAD_TO_HEAD_UPSERT = text(
+	"""
+	INSERT INTO player_head_to_head (user_id, opponent_id, games, wins, losses, draws)
+	VALUES (:user_id, :opponent_id, 1, :win, :loss, :draw)
+	ON CONFLICT (user_id, opponent_id) DO UPDATE SET
+		games = player_head_to_head.games + 1,
+		wins = player_head_to_head.wins + EXCLUDED.wins,
+		losses = player_head_to_head.losses + EXCLUDED.losses,
+		draws = player_head_to_head.draws + EXCLUDED.draws
+	"""
+)
+
+# step: 1 — победа, -1 — поражение, 0 — ничья (обрывает любую серию)
+STREAK_UPSERT = text(
+	"""
+	INSERT INTO player_streaks (user_id, current_streak, best_win_streak, last_game_at)
+	VALUES (:user_id, :step, GREATEST(:step, 0), :finished_at)
+	ON CONFLICT (user_id) DO UPDATE SET
+		current_streak = CASE
+			WHEN EXCLUDED.current_streak > 0 THEN GREATEST(player_streaks.current_streak, 0) + 1
+			WHEN EXCLUDED.current_streak < 0 THEN LEAST(player_streaks.current_streak, 0) - 1
+			ELSE 0
+		END,
+		best_win_streak = CASE
+			WHEN EXCLUDED.current_streak > 0
+				THEN GREATEST(player_streaks.best_win_streak, GREATEST(player_streaks.current_streak, 0) + 1)
+			ELSE player_streaks.best_win_streak
+		END,
+		last_game_at = EXCLUDED.last_game_at
+	"""
+)
+
+
+@dataclass(frozen=True)
+class PlayerOutcome:
+	user_id: int
+	opponent_id: int
+	color: str
+	time_control: str
+	step: int
+
+
+def time_control_key(time_control: dict[str, Any] | None) -> str:
+	if not time_control:
+		return UNTIMED
+	initial = int(time_control.get("initial_ms") or 0) // 1000
+	increment = int(time_control.get("increment_ms") or 0) // 1000
+	return f"{initial}+{increment}"
+
+
+def game_outcomes(
+	white_id: int | None,
+	black_id: int | None,
+	result: str | None,
+	time_control: dict[str, Any] | None,
+) -> list[PlayerOutcome]:
+	"""Исходы партии для обоих игроков в порядке user_id (единый порядок блокировок строк)."""
+	if white_id is None or black_id is None or result is None:
+		return []
+	white_step = {GameResult.WHITE_WIN.value: 1, GameResult.BLACK_WIN.value: -1}.get(result, 0)
+	key = time_control_key(time_control)
+	outcomes = [
+		PlayerOutcome(white_id, black_id, "white", key, white_step),
+		PlayerOutcome(black_id, white_id, "black", key, -white_step),
+	]
+	return sorted(outcomes, key=lambda outcome: outcome.user_id)
+
+
+def _counter_params(outcome: PlayerOutcome) -> dict[str, int]:
+	return {
+		"win": int(outcome.step > 0),
+		"loss": int(outcome.step < 0),
+		"draw": int(outcome.step == 0),
+	}
+
+
+async def record_game_stats(db: AsyncSession, game: Game) -> None:
+	"""Учитывает завершённую партию в агрегатах; коммит — за вызывающим кодом."""
+	outcomes = game_outcomes(game.white_id, game.black_id, game.result, game.time_control)
+	if not outcomes:
+		return
+	await db.execute(
+		STATS_UPSERT,
+		[
+			{"user_id": o.user_id, "color": o.color, "time_control": o.time_control, **_counter_params(o)}
+			for o in outcomes
+		],
+	)
+	await db.execute(
+		HEAD_TO_HEAD_UPSERT,
+		[{"user_id": o.user_id, "opponent_id": o.opponent_id, **_counter_params(o)} for o in outcomes],
+	)
+	await db.execute(
+		STREAK_UPSERT,
+		[{"user_id": o.user_id, "step": o.step, "finished_at": game.finished_at} for o in outcomes],
+	)
+
+
+class StatsAccumulator:
+	"""Пересчёт агрегатов с нуля одним проходом по партиям в порядке завершения."""
+
+	def __init__(self) -> None:
+		self.stats: dict[tuple[int, str, str], list[int]] = {}
+		self.head_to_head: dict[tuple[int, int], list[int]] = {}
+		self.streaks: dict[int, list[Any]] = {}
+
+	def add(self, outcomes: Iterable[PlayerOutcome], finished_at: datetime | None) -> None:
+		for outcome in outcomes:
+			counters = (1, int(outcome.step > 0), int(outcome.step < 0), int(outcome.step == 0))
+			for table, key in (
+				(self.stats, (outcome.user_id, outcome.color, outcome.time_control)),
+				(self.head_to_head, (outcome.user_id, outcome.opponent_id)),
+			):
+				row = table.setdefault(key, [0, 0, 0, 0])
+				for index, value in enumerate(counters):
+					row[index] += value
+			streak = self.streaks.setdefault(outcome.user_id, [0, 0, None])
+			if outcome.step > 0:
+				streak[0] = max(streak[0], 0) + 1
+				streak[1] = max(streak[1], streak[0])
+			elif outcome.step < 0:
+				streak[0] = min(streak[0], 0) - 1
+			else:
+				streak[0] = 0
+			streak[2] = finished_at
+
+	def rows(self) -> tuple[list[dict], list[dict], list[dict]]:
+		stats = [
+			{"user_id": u, "color": c, "time_control": tc, "games": g, "wins": w, "losses": l, "draws": d}
+			for (u, c, tc), (g, w, l, d) in self.stats.items()
+		]
+		head_to_head = [
+			{"user_id": u, "opponent_id": o, "games": g, "wins": w, "losses": l, "draws": d}
+			for (u, o), (g, w, l, d) in self.head_to_head.items()
+		]
+		streaks = [
+			{"user_id": u, "current_streak": cur, "best_win_streak": best, "last_game_at": at}
+			for u, (cur, best, at) in self.streaks.items()
+		]
+		return stats, head_to_head, streaks
+
+
+def _counters(games: int, wins: int, losses: int, draws: int) -> ResultCounters:
+	return ResultCounters(games=games, wins=wins, losses=losses, draws=draws)
+
+
+async def get_player_stats(db: AsyncSession, user_id: int) -> PlayerStatsResponse:
+	stats_rows = (
+		await db.execute(select(PlayerStats).where(PlayerStats.user_id == user_id))
+	).scalars().all()
+	streak = await db.get(PlayerStreak, user_id)
+	head_to_head = (
+		await db.execute(
+			select(PlayerHeadToHead)
+			.where(PlayerHeadToHead.user_id == user_id)
+			.order_by(PlayerHeadToHead.games.desc())
+			.limit(HEAD_TO_HEAD_LIMIT)
+		)
+	).scalars().all()
+
+	total = [0, 0, 0, 0]
+	by_color: dict[str, list[int]] = {}
+	by_time_control: dict[str, list[int]] = {}
+	for row in stats_rows:
+		values = (row.games, row.wins, row.losses, row.draws)
+		buckets = (
+			total,
+			by_color.setdefault(row.color, [0, 0, 0, 0]),
+			by_time_control.setdefault(row.time_control, [0, 0, 0, 0]),
+		)
+		for bucket in buckets:
+			for index, value in enumerate(values):
+				bucket[index] += value
+
+	return PlayerStatsResponse(
+		user_id=user_id,
+		total=_counters(*total),
+		by_color={color: _counters(*values) for color, values in by_color.items()},
+		by_time_control={key: _counters(*values) for key, values in by_time_control.items()},
+		current_streak=streak.current_streak if streak else 0,
+		best_win_streak=streak.best_win_streak if streak else 0,
+		last_game_at=streak.last_game_at if streak else None,
+		head_to_head=[
+			HeadToHeadOut(
+				opponent_id=row.opponent_id,
+				games=row.games,
+				wins=row.wins,
+				losses=row.losses,
+				draws=row.draws,
+			)
+			for row in head_to_head
+		],
+	)
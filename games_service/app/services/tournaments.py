@@ -0,0 +1,663 @@
+"""
+Турниры: арена и швейцарская система.
+
+Директор турниров работает на процессе-лидере и держит таблицы положения в
+памяти. Каждые несколько секунд он одним запросом забирает результаты всех
+идущих турнирных партий, раскладывает пары и создаёт все партии тура одной
+транзакцией (bulk INSERT в games и tournament_games). Таблица периодически
+сохраняется в tournaments.standings вместе с результатами учтённых партий,
+поэтому после смены лидера состояние восстанавливается из снимка.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any
+from uuid import UUID, uuid4
+
+import chess
+from fastapi import status
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from common import LeaderElection
+
+from ..config import get_settings
+from ..database import SessionLocal, async_engine
+from ..models import (
+	Game,
+	GameResult,
+	GameStatus,
+	SideToMove,
+	Tournament,
+	TournamentGame,
+	TournamentKind,
+	TournamentPlayer,
+	TournamentStatus,
+)
+from ..realtime import game_ws_manager, tournament_channel
+from ..schemas import (
+	CreateTournamentRequest,
+	StandingOut,
+	TournamentDetail,
+	TournamentOut,
+	TournamentPairingOut,
+)
+from .games import GameServiceError
+from .pairing import Standing, arena_pairings, buchholz, ranking_key, swiss_pairings
+from .ratings import get_ratings
+
+LOGGER = logging.getLogger(__name__)
+
+WHITE_SCORES = {
+	GameResult.WHITE_WIN.value: 1.0,
+	GameResult.DRAW.value: 0.5,
+	GameResult.BLACK_WIN.value: 0.0,
+}
+
+
+def _utcnow() -> datetime:
+	return datetime.now(timezone.utc)
+
+
+@dataclass
+class PendingGame:
+	white_id: int
+	black_id: int
+	round: int
+
+
+@dataclass
+class TournamentState:
+	id: UUID
+	kind: str
+	rounds: int | None
+	ends_at: datetime | None
+	time_control: dict[str, Any] | None
+	current_round: int = 0
+	table: dict[int, Standing] = field(default_factory=dict)
+	pending: dict[UUID, PendingGame] = field(default_factory=dict)
+	# Результаты, учтённые в памяти, но ещё не сохранённые в tournament_games
+	unsaved_results: dict[UUID, str] = field(default_factory=dict)
+	dirty: bool = False
+
+	def standings(self) -> list[StandingOut]:
+		ordered = sorted(self.table.values(), key=ranking_key)
+		return [
+			StandingOut(
+				rank=rank,
+				user_id=row.user_id,
+				rating=round(row.rating),
+				score=row.score,
+				games=row.games,
+				wins=row.wins,
+				draws=row.draws,
+				losses=row.losses,
+				buchholz=buchholz(row, self.table),
+				playing=row.current_game is not None,
+				withdrawn=row.withdrawn,
+			)
+			for rank, row in enumerate(ordered, start=1)
+		]
+
+	def checkpoint(self) -> list[dict[str, Any]]:
+		rows = []
+		for row in self.table.values():
+			data = asdict(row)
+			data.pop("current_game")
+			rows.append(data)
+		return rows
+
+	def apply_result(self, game_id: UUID, result: str | None, move_count: int = 0) -> None:
+		pending = self.pending.pop(game_id)
+		for user_id in (pending.white_id, pending.black_id):
+			if user_id in self.table:
+				self.table[user_id].current_game = None
+		self.dirty = True
+		if result not in WHITE_SCORES:
+			# Партия удалена без результата: очки не начисляются
+			self.unsaved_results[game_id] = "VOID"
+			return
+		white_score = WHITE_SCORES[result]
+		if pending.white_id in self.table:
+			self.table[pending.white_id].record(pending.black_id, "white", white_score)
+		if pending.black_id in self.table:
+			self.table[pending.black_id].record(pending.white_id, "black", 1.0 - white_score)
+		self.unsaved_results[game_id] = result
+		# Неявка — поражение без единого своего хода; любая сыгранная партия обнуляет счёт
+		for user_id, moved, lost in (
+			(pending.white_id, move_count >= 1, white_score == 0.0),
+			(pending.black_id, move_count >= 2, white_score == 1.0),
+		):
+			standing = self.table.get(user_id)
+			if standing is not None:
+				standing.no_shows = standing.no_shows + 1 if lost and not moved else 0
+
+
+def _state_from_row(tournament: Tournament) -> TournamentState:
+	ends_at = None
+	is_arena = tournament.kind == TournamentKind.ARENA.value
+	if is_arena and tournament.started_at and tournament.duration_seconds:
+		ends_at = tournament.started_at + timedelta(seconds=tournament.duration_seconds)
+	state = TournamentState(
+		id=tournament.id,
+		kind=tournament.kind,
+		rounds=tournament.rounds,
+		ends_at=ends_at,
+		time_control=tournament.time_control,
+		current_round=tournament.current_round,
+	)
+	for data in tournament.standings or []:
+		standing = Standing(**data)
+		state.table[standing.user_id] = standing
+	return state
+
+
+def _tournament_out(tournament: Tournament, players: int) -> TournamentOut:
+	return TournamentOut(
+		id=tournament.id,
+		name=tournament.name,
+		kind=tournament.kind,
+		status=tournament.status,
+		created_by=tournament.created_by,
+		time_control=tournament.time_control,
+		rounds=tournament.rounds,
+		duration_seconds=tournament.duration_seconds,
+		current_round=tournament.current_round,
+		players=players,
+		starts_at=tournament.starts_at,
+		started_at=tournament.started_at,
+		finished_at=tournament.finished_at,
+	)
+
+
+class TournamentDirector:
+	def __init__(self, leader: LeaderElection) -> None:
+		self._leader = leader
+		self._task: asyncio.Task | None = None
+		self._states: dict[UUID, TournamentState] = {}
+		self._last_checkpoint = 0.0
+
+	def start(self) -> None:
+		if self._task and not self._task.done():
+			return
+		self._leader.start()
+		self._task = asyncio.create_task(self._run(), name="tournament-director")
+
+	async def stop(self) -> None:
+		if self._task:
+			self._task.cancel()
+			with contextlib.suppress(asyncio.CancelledError):
+				await self._task
+			self._task = None
+		if self._states:
+			with contextlib.suppress(Exception):
+				await self._checkpoint(list(self._states.values()))
+		self._states.clear()
+		await self._leader.stop()
+
+	def live_state(self, tournament_id: UUID) -> TournamentState | None:
+		return self._states.get(tournament_id)
+
+	async def _run(self) -> None:
+		settings = get_settings()
+		while True:
+			await asyncio.sleep(settings.tournament_tick_seconds)
+			if not self._leader.is_leader:
+				# Лидерство потеряно: состояние восстановит новый лидер из снимка
+				self._states.clear()
+				continue
+			try:
+				await self._tick()
+			except asyncio.CancelledError:
+				raise
+			except Exception:  # pragma: no cover - defensive logging
+				LOGGER.exception("Tournament director iteration failed")
+
+	async def _tick(self) -> None:
+		settings = get_settings()
+		async with SessionLocal() as db:
+			await self._load_running(db)
+			await self._sync_players(db)
+			await self._collect_results(db, settings.tournament_max_no_shows)
+
+		finished: list[TournamentState] = []
+		now = _utcnow()
+		for state in list(self._states.values()):
+			if state.kind == TournamentKind.ARENA.value:
+				if state.ends_at and now >= state.ends_at:
+					if not state.pending:
+						finished.append(state)
+					continue
+				free = [
+					row for row in state.table.values() if row.current_game is None and not row.withdrawn
+				]
+				pairs = arena_pairings(free)
+				if pairs:
+					await self._create_round(state, pairs, None)
+			elif not state.pending:
+				active = [row for row in state.table.values() if not row.withdrawn]
+				if state.current_round >= (state.rounds or 0) or len(active) < 2:
+					if state.current_round > 0 or len(active) < 2:
+						finished.append(state)
+					continue
+				pairs, bye = swiss_pairings(active)
+				await self._create_round(state, pairs, bye)
+
+		for state in finished:
+			await self._finish(state)
+
+		loop_time = asyncio.get_running_loop().time()
+		if loop_time - self._last_checkpoint >= settings.tournament_checkpoint_seconds:
+			self._last_checkpoint = loop_time
+			dirty = [state for state in self._states.values() if state.dirty]
+			if dirty:
+				await self._checkpoint(dirty)
+
+	async def _load_running(self, db: AsyncSession) -> None:
+		now = _utcnow()
+		due = (
+			await db.execute(
+				update(Tournament)
+				.where(
+					Tournament.status == TournamentStatus.CREATED.value,
+					Tournament.starts_at.is_not(None),
+					Tournament.starts_at <= now,
+				)
+				.values(status=TournamentStatus.RUNNING.value, started_at=now)
+				.returning(Tournament.id)
+			)
+		).scalars().all()
+		await db.commit()
+		for tournament_id in due:
+			await self._publish(tournament_id, {"type": "tournament_started"})
+
+		stmt = select(Tournament).where(Tournament.status == TournamentStatus.RUNNING.value)
+		if self._states:
+			stmt = stmt.where(Tournament.id.not_in(list(self._states)))
+		running = (await db.execute(stmt)).scalars().all()
+		if not running:
+			return
+		restored = [_state_from_row(tournament) for tournament in running]
+		pending = (
+			await db.execute(
+				select(TournamentGame).where(
+					TournamentGame.tournament_id.in_([state.id for state in restored]),
+					TournamentGame.result.is_(None),
+				)
+			)
+		).scalars().all()
+		by_id = {state.id: state for state in restored}
+		for row in pending:
+			state = by_id[row.tournament_id]
+			state.pending[row.game_id] = PendingGame(row.white_id, row.black_id, row.round)
+			for user_id in (row.white_id, row.black_id):
+				if user_id in state.table:
+					state.table[user_id].current_game = row.game_id
+		self._states.update(by_id)
+
+	async def _sync_players(self, db: AsyncSession) -> None:
+		if not self._states:
+			return
+		rows = (
+			await db.execute(
+				select(
+					TournamentPlayer.tournament_id,
+					TournamentPlayer.user_id,
+					TournamentPlayer.rating,
+					TournamentPlayer.withdrawn,
+				).where(TournamentPlayer.tournament_id.in_(list(self._states)))
+			)
+		).all()
+		for tournament_id, user_id, rating, withdrawn in rows:
+			state = self._states[tournament_id]
+			standing = state.table.get(user_id)
+			if standing is None:
+				state.table[user_id] = Standing(user_id=user_id, rating=rating, withdrawn=withdrawn)
+				state.dirty = True
+			elif standing.withdrawn != withdrawn:
+				# Флаг в tournament_players главный: снятие через API или возвращение на арену
+				standing.withdrawn = withdrawn
+				standing.no_shows = 0
+				state.dirty = True
+
+	async def _collect_results(self, db: AsyncSession, max_no_shows: int) -> None:
+		pending_ids = {game_id: state for state in self._states.values() for game_id in state.pending}
+		if not pending_ids:
+			return
+		rows = {
+			row.id: row
+			for row in (
+				await db.execute(
+					select(Game.id, Game.status, Game.result, Game.move_count).where(
+						Game.id.in_(list(pending_ids))
+					)
+				)
+			).all()
+		}
+		# Неявку белых к первому ходу засчитывает поражением watchdog владельца партии
+		for game_id, state in pending_ids.items():
+			row = rows.get(game_id)
+			if row is None:
+				state.apply_result(game_id, None)
+			elif row.status == GameStatus.FINISHED.value:
+				state.apply_result(game_id, row.result, row.move_count)
+		if max_no_shows <= 0:
+			return
+		withdrawn = [
+			(state.id, standing)
+			for state in {state.id: state for state in pending_ids.values()}.values()
+			for standing in state.table.values()
+			if not standing.withdrawn and standing.no_shows >= max_no_shows
+		]
+		if not withdrawn:
+			return
+		for tournament_id, standing in withdrawn:
+			await db.execute(
+				update(TournamentPlayer)
+				.where(
+					TournamentPlayer.tournament_id == tournament_id,
+					TournamentPlayer.user_id == standing.user_id,
+				)
+				.values(withdrawn=True)
+			)
+		await db.commit()
+		for tournament_id, standing in withdrawn:
+			standing.withdrawn = True
+			self._states[tournament_id].dirty = True
+			LOGGER.info(
+				"Withdrew player %s from tournament %s after %d no-show(s)",
+				standing.user_id,
+				tournament_id,
+				standing.no_shows,
+			)
+
+	async def _create_round(
+		self,
+		state: TournamentState,
+		pairs: list[tuple[int, int]],
+		bye: int | None,
+	) -> None:
+		"""Создаёт все партии тура одной транзакцией."""
+		round_number = state.current_round + 1
+		board = chess.Board()
+		initial_clock = int((state.time_control or {}).get("initial_ms") or 0)
+		games: list[dict[str, Any]] = []
+		links: list[dict[str, Any]] = []
+		for white_id, black_id in pairs:
+			game_id = uuid4()
+			games.append(
+				{
+					"id": game_id,
+					"white_id": white_id,
+					"black_id": black_id,
+					"initial_pos": "startpos",
+					"current_pos": board.fen(),
+					"next_turn": SideToMove.WHITE.value,
+					"time_control": state.time_control,
+					"move_count": 0,
+					"status": GameStatus.CREATED.value,
+					"white_clock_ms": initial_clock,
+					"black_clock_ms": initial_clock,
+					"metadata_json": {"tournament_id": str(state.id), "round": round_number},
+				}
+			)
+			links.append(
+				{
+					"game_id": game_id,
+					"tournament_id": state.id,
+					"round": round_number,
+					"white_id": white_id,
+					"black_id": black_id,
+				}
+			)
+
+		if bye is not None:
+			standing = state.table[bye]
+			standing.record(None, None, 1.0)
+			standing.had_bye = True
+		state.current_round = round_number
+
+		try:
+			async with SessionLocal() as db:
+				if games:
+					await db.execute(insert(Game), games)
+					await db.execute(insert(TournamentGame), links)
+				await self._write_checkpoint(db, state)
+				await db.commit()
+		except Exception:
+			# Состояние в памяти уже продвинуто — перечитаем его из последнего снимка
+			self._states.pop(state.id, None)
+			raise
+		state.unsaved_results.clear()
+		state.dirty = False
+
+		for link in links:
+			state.pending[link["game_id"]] = PendingGame(link["white_id"], link["black_id"], round_number)
+			state.table[link["white_id"]].current_game = link["game_id"]
+			state.table[link["black_id"]].current_game = link["game_id"]
+
+		await self._publish(
+			state.id,
+			{
+				"type": "tournament_pairings",
+				"round": round_number,
+				"bye": bye,
+				"pairings": [
+					{
+						"game_id": str(link["game_id"]),
+						"white_id": link["white_id"],
+						"black_id": link["black_id"],
+					}
+					for link in links
+				],
+			},
+		)
+
+	async def _write_checkpoint(self, db: AsyncSession, state: TournamentState) -> None:
+		if state.unsaved_results:
+			await db.execute(
+				update(TournamentGame),
+				[
+					{"game_id": game_id, "result": result}
+					for game_id, result in state.unsaved_results.items()
+				],
+			)
+		await db.execute(
+			update(Tournament)
+			.where(Tournament.id == state.id)
+			.values(
+				standings=state.checkpoint(),
+				current_round=state.current_round,
+				checkpointed_at=_utcnow(),
+			)
+		)
+
+	async def _checkpoint(self, states: list[TournamentState]) -> None:
+		async with SessionLocal() as db:
+			for state in states:
+				await self._write_checkpoint(db, state)
+			await db.commit()
+		for state in states:
+			state.unsaved_results.clear()
+			state.dirty = False
+		for state in states:
+			await self._publish(
+				state.id,
+				{
+					"type": "tournament_standings",
+					"standings": [row.model_dump(mode="json") for row in state.standings()],
+				},
+			)
+
+	async def _finish(self, state: TournamentState) -> None:
+		async with SessionLocal() as db:
+			await self._write_checkpoint(db, state)
+			await db.execute(
+				update(Tournament)
+				.where(Tournament.id == state.id)
+				.values(status=TournamentStatus.FINISHED.value, finished_at=_utcnow())
+			)
+			await db.commit()
+		self._states.pop(state.id, None)
+		await self._publish(
+			state.id,
+			{
+				"type": "tournament_finished",
+				"standings": [row.model_dump(mode="json") for row in state.standings()],
+			},
+		)
+
+	async def _publish(self, tournament_id: UUID, message: dict) -> None:
+		await game_ws_manager.publish(tournament_channel(tournament_id), message)
+
+
+tournament_director = TournamentDirector(
+	LeaderElection(async_engine, "games_service:tournaments", retry_interval=5)
+)
+
+
+async def create_tournament(
+	db: AsyncSession, *, creator_id: int, payload: CreateTournamentRequest
+) -> TournamentOut:
+	if payload.kind == TournamentKind.SWISS.value and not payload.rounds:
+		raise GameServiceError("Swiss tournaments need a number of rounds")
+	if payload.kind == TournamentKind.ARENA.value and not payload.duration_minutes:
+		raise GameServiceError("Arena tournaments need a duration")
+	tournament = Tournament(
+		name=payload.name,
+		kind=payload.kind,
+		created_by=creator_id,
+		time_control=payload.time_control.model_dump() if payload.time_control else None,
+		rounds=payload.rounds if payload.kind == TournamentKind.SWISS.value else None,
+		duration_seconds=(
+			payload.duration_minutes * 60 if payload.kind == TournamentKind.ARENA.value else None
+		),
+		starts_at=payload.starts_at,
+	)
+	db.add(tournament)
+	await db.commit()
+	await db.refresh(tournament)
+	return _tournament_out(tournament, 0)
+
+
+async def list_tournaments(db: AsyncSession, *, limit: int = 50) -> list[TournamentOut]:
+	players = (
+		select(TournamentPlayer.tournament_id, func.count().label("players"))
+		.group_by(TournamentPlayer.tournament_id)
+		.subquery()
+	)
+	rows = (
+		await db.execute(
+			select(Tournament, func.coalesce(players.c.players, 0))
+			.outerjoin(players, players.c.tournament_id == Tournament.id)
+			.where(Tournament.status != TournamentStatus.FINISHED.value)
+			.order_by(Tournament.created_at.desc())
+			.limit(limit)
+		)
+	).all()
+	return [_tournament_out(tournament, count) for tournament, count in rows]
+
+
+async def _get_tournament(db: AsyncSession, tournament_id: UUID) -> Tournament:
+	tournament = await db.get(Tournament, tournament_id)
+	if tournament is None:
+		raise GameServiceError("Tournament not found", status.HTTP_404_NOT_FOUND)
+	return tournament
+
+
+async def join_tournament(db: AsyncSession, tournament_id: UUID, *, user_id: int) -> None:
+	tournament = await _get_tournament(db, tournament_id)
+	if tournament.status == TournamentStatus.FINISHED.value:
+		raise GameServiceError("Tournament is finished", status.HTTP_409_CONFLICT)
+	if tournament.kind == TournamentKind.SWISS.value and tournament.status != TournamentStatus.CREATED.value:
+		raise GameServiceError("Swiss tournament has already started", status.HTTP_409_CONFLICT)
+	rating = (await get_ratings(db, [user_id]))[user_id]
+	upsert = pg_insert(TournamentPlayer).values(tournament_id=tournament_id, user_id=user_id, rating=rating)
+	# Повторный вход снявшегося игрока возвращает его в жеребьёвку
+	await db.execute(
+		upsert.on_conflict_do_update(
+			index_elements=[TournamentPlayer.tournament_id, TournamentPlayer.user_id],
+			set_={"withdrawn": False},
+			where=TournamentPlayer.withdrawn.is_(True),
+		)
+	)
+	await db.commit()
+
+
+async def withdraw_from_tournament(db: AsyncSession, tournament_id: UUID, *, user_id: int) -> None:
+	"""Снимает игрока: текущую партию он доигрывает, новых пар не получает."""
+	tournament = await _get_tournament(db, tournament_id)
+	if tournament.status == TournamentStatus.FINISHED.value:
+		raise GameServiceError("Tournament is finished", status.HTTP_409_CONFLICT)
+	result = await db.execute(
+		update(TournamentPlayer)
+		.where(TournamentPlayer.tournament_id == tournament_id, TournamentPlayer.user_id == user_id)
+		.values(withdrawn=True)
+	)
+	if not result.rowcount:
+		raise GameServiceError("You are not in this tournament", status.HTTP_404_NOT_FOUND)
+	await db.commit()
+
+
+async def start_tournament(db: AsyncSession, tournament_id: UUID, *, user_id: int) -> TournamentDetail:
+	tournament = await _get_tournament(db, tournament_id)
+	if tournament.created_by != user_id:
+		raise GameServiceError("Only the organizer can start the tournament", status.HTTP_403_FORBIDDEN)
+	if tournament.status != TournamentStatus.CREATED.value:
+		raise GameServiceError("Tournament has already started", status.HTTP_409_CONFLICT)
+	tournament.starts_at = _utcnow()
+	await db.commit()
+	await db.refresh(tournament)
+	return await get_tournament_detail(db, tournament_id)
+
+
+async def get_tournament_detail(db: AsyncSession, tournament_id: UUID) -> TournamentDetail:
+	tournament = await _get_tournament(db, tournament_id)
+	players = (
+		await db.execute(select(TournamentPlayer).where(TournamentPlayer.tournament_id == tournament_id))
+	).scalars().all()
+
+	live = tournament_director.live_state(tournament_id)
+	if live is not None:
+		standings = live.standings()
+	else:
+		state = _state_from_row(tournament)
+		for player in players:
+			standing = state.table.setdefault(
+				player.user_id, Standing(user_id=player.user_id, rating=player.rating)
+			)
+			standing.withdrawn = player.withdrawn
+		standings = state.standings()
+
+	pairings = []
+	if tournament.current_round:
+		rows = (
+			await db.execute(
+				select(TournamentGame).where(
+					TournamentGame.tournament_id == tournament_id,
+					TournamentGame.round == tournament.current_round,
+				)
+			)
+		).scalars().all()
+		pairings = [
+			TournamentPairingOut(
+				game_id=row.game_id,
+				white_id=row.white_id,
+				black_id=row.black_id,
+				result=row.result,
+			)
+			for row in rows
+		]
+
+	base = _tournament_out(tournament, len(players))
+	return TournamentDetail(
+		**base.model_dump(),
+		standings=standings,
+		pairings=pairings,
+		checkpointed_at=tournament.checkpointed_at,
+	)
@@ -0,0 +1,278 @@
+from __future__ import annotations
+
+import asyncio
+import bisect
+import contextlib
+import hashlib
+import hmac
+import json
+import logging
+import re
+from uuid import UUID
+
+import httpx
+from sqlalchemy import text
+
+from .config import get_settings
+from .database import SessionLocal
+
+LOGGER = logging.getLogger(__name__)
+
+SHARD_HEADER = "x-games-shard"
+SHARD_HOP_HEADER = "x-games-shard-hop"
+SHARD_TOKEN_HEADER = "x-games-shard-token"
+CLOSE_WRONG_SHARD = 4307
+GAME_PATH_RE = re.compile(
+	r"^/(?:api|ws)/games/([0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12})(?:/|$)"
+)
+
+
+def _hash64(value: str) -> int:
+	return int.from_bytes(hashlib.sha1(value.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+	"""Кольцо консистентного хеширования с виртуальными узлами."""
+
+	def __init__(self, members: list[str], *, vnodes: int = 128) -> None:
+		self.members = tuple(sorted(set(members)))
+		points: list[tuple[int, str]] = []
+		for member in self.members:
+			for replica in range(vnodes):
+				points.append((_hash64(f"{member}#{replica}"), member))
+		points.sort()
+		self._keys = [point for point, _ in points]
+		self._owners = [member for _, member in points]
+
+	def owner(self, key: str) -> str | None:
+		if not self._keys:
+			return None
+		index = bisect.bisect(self._keys, _hash64(key)) % len(self._keys)
+		return self._owners[index]
+
+
+class ShardCoordinator:
+	"""
+	Назначает каждой партии процесс-владелец по консистентному хешу game_id.
+
+	Участники берутся из статического списка (games_shard_members) или из
+	heartbeat-таблицы games_shard_members в Postgres. При смене состава кольцо
+	перестраивается, и процесс выгружает акторов партий, которыми больше не владеет.
+	"""
+
+	def __init__(self) -> None:
+		settings = get_settings()
+		self.member = settings.games_shard_member
+		self._vnodes = settings.games_shard_vnodes
+		self._heartbeat_seconds = settings.games_shard_heartbeat_seconds
+		self._member_ttl_seconds = settings.games_shard_member_ttl_seconds
+		self._static_members = [
+			name.strip() for name in (settings.games_shard_members or "").split(",") if name.strip()
+		]
+		initial = self._static_members or ([self.member] if self.member else [])
+		self._ring = HashRing(initial, vnodes=self._vnodes)
+		self._task: asyncio.Task | None = None
+
+	@property
+	def enabled(self) -> bool:
+		return self.member is not None
+
+	@property
+	def members(self) -> tuple[str, ...]:
+		return self._ring.members
+
+	def owner_of(self, game_id: UUID | str) -> str | None:
+		if not self.enabled:
+			return None
+		return self._ring.owner(str(game_id).lower())
+
+	def is_owner(self, game_id: UUID | str) -> bool:
+		owner = self.owner_of(game_id)
+		return owner is None or owner == self.member
+
+	def start(self) -> None:
+		if not self.enabled or self._static_members:
+			return
+		if self._task and not self._task.done():
+			return
+		self._task = asyncio.create_task(self._run(), name="games-shard-membership")
+
+	async def stop(self) -> None:
+		if not self._task:
+			return
+		self._task.cancel()
+		with contextlib.suppress(asyncio.CancelledError):
+			await self._task
+		self._task = None
+		# Корректный выход: остальные участники перестроят кольцо сразу, не дожидаясь TTL
+		with contextlib.suppress(Exception):
+			async with SessionLocal() as db:
+				await db.execute(
+					text("DELETE FROM games_shard_members WHERE member = :member"),
+					{"member": self.member},
+				)
+				await db.commit()
+
+	async def _run(self) -> None:
+		while True:
+			try:
+				await self._refresh_members()
+			except asyncio.CancelledError:
+				raise
+			except Exception:  # pragma: no cover - defensive logging
+				LOGGER.exception("Shard membership refresh failed")
+			await asyncio.sleep(self._heartbeat_seconds)
+
+	async def _refresh_members(self) -> None:
+		async with SessionLocal() as db:
+			await db.execute(
+				text(
+					"INSERT INTO games_shard_members (member, heartbeat_at) VALUES (:member, NOW()) "
+					"ON CONFLICT (member) DO UPDATE SET heartbeat_at = EXCLUDED.heartbeat_at"
+				),
+				{"member": self.member},
+			)
+			result = await db.execute(
+				text(
+					"SELECT member FROM games_shard_members "
+					"WHERE heartbeat_at > NOW() - make_interval(secs => :ttl)"
+				),
+				{"ttl": self._member_ttl_seconds},
+			)
+			members = [row[0] for row in result]
+			await db.commit()
+		if self.member not in members:
+			members.append(self.member)
+		if tuple(sorted(set(members))) != self._ring.members:
+			await self._rebalance(members)
+
+	async def _rebalance(self, members: list[str]) -> None:
+		previous = self._ring.members
+		self._ring = HashRing(members, vnodes=self._vnodes)
+		LOGGER.info("Games shard ring changed: %s -> %s", list(previous), list(self._ring.members))
+		# Импорт здесь, чтобы избежать цикла sharding -> services -> sharding
+		from .services import game_actors
+
+		await game_actors.release(lambda game_id: not self.is_owner(game_id))
+
+
+class ShardRoutingMiddleware:
+	"""
+	ASGI-middleware: запросы к чужим партиям уходят процессу-владельцу.
+
+	HTTP-запрос проксируется владельцу с заголовком X-Games-Shard-Hop (повторно
+	он не пересылается, даже если кольца процессов временно расходятся). Если задан
+	games_shard_internal_token, пометка учитывается только вместе с этим токеном
+	в X-Games-Shard-Token: иначе клиент мог бы обойти маршрутизацию к владельцу.
+	WebSocket принимается и закрывается с кодом 4307, перед этим клиент получает
+	{"type": "shard_redirect", "shard": owner} и переподключается с `?shard=<owner>`.
+	Все ответы по партиям несут заголовок X-Games-Shard — ключ маршрутизации,
+	по которому nginx направляет следующие запросы сразу владельцу.
+	"""
+
+	def __init__(self, app, coordinator: ShardCoordinator) -> None:
+		self.app = app
+		self.coordinator = coordinator
+		self._client: httpx.AsyncClient | None = None
+
+	async def __call__(self, scope, receive, send) -> None:
+		if scope["type"] not in {"http", "websocket"} or not self.coordinator.enabled:
+			await self.app(scope, receive, send)
+			return
+		match = GAME_PATH_RE.match(scope.get("path", ""))
+		if not match:
+			await self.app(scope, receive, send)
+			return
+
+		owner = self.coordinator.owner_of(match.group(1))
+		forwarded = self._is_forwarded(dict(scope.get("headers") or []))
+		if owner and owner != self.coordinator.member and not forwarded:
+			if scope["type"] == "http":
+				await self._forward_http(scope, receive, send, owner)
+			else:
+				await self._redirect_websocket(receive, send, owner)
+			return
+
+		if scope["type"] != "http" or not owner:
+			await self.app(scope, receive, send)
+			return
+
+		async def send_with_shard(message) -> None:
+			if message["type"] == "http.response.start":
+				message = dict(message)
+				message["headers"] = [*message.get("headers", []), (SHARD_HEADER.encode(), owner.encode())]
+			await send(message)
+
+		await self.app(scope, receive, send_with_shard)
+
+	@staticmethod
+	def _is_forwarded(headers: dict[bytes, bytes]) -> bool:
+		if SHARD_HOP_HEADER.encode() not in headers:
+			return False
+		expected = get_settings().games_shard_internal_token
+		if not expected:
+			return True
+		token = headers.get(SHARD_TOKEN_HEADER.encode(), b"")
+		return hmac.compare_digest(token, expected.encode())
+
+	async def _forward_http(self, scope, receive, send, owner: str) -> None:
+		body = b""
+		while True:
+			message = await receive()
+			if message["type"] != "http.request":
+				return
+			body += message.get("body", b"")
+			if not message.get("more_body"):
+				break
+
+		if self._client is None:
+			self._client = httpx.AsyncClient(timeout=get_settings().games_shard_forward_timeout_seconds)
+		url = f"http://{owner}:{get_settings().games_shard_port}{scope['path']}"
+		query = scope.get("query_string") or b""
+		if query:
+			url = f"{url}?{query.decode('latin-1')}"
+		request_headers = [
+			(key, value)
+			for key, value in scope.get("headers") or []
+			if key
+			not in {
+				b"host",
+				b"content-length",
+				b"connection",
+				SHARD_HOP_HEADER.encode(),
+				SHARD_TOKEN_HEADER.encode(),
+			}
+		]
+		request_headers.append((SHARD_HOP_HEADER.encode(), b"1"))
+		internal_token = get_settings().games_shard_internal_token
+		if internal_token:
+			request_headers.append((SHARD_TOKEN_HEADER.encode(), internal_token.encode()))
+		try:
+			response = await self._client.request(
+				scope["method"], url, content=body, headers=request_headers
+			)
+		except httpx.HTTPError:
+			LOGGER.warning("Failed to forward %s to games shard %s", scope["path"], owner)
+			response = httpx.Response(503, json={"detail": "Game shard unavailable"})
+
+		response_headers = [
+			(key.encode("latin-1"), value.encode("latin-1"))
+			for key, value in response.headers.items()
+			if key.lower() not in {"content-length", "transfer-encoding", "connection", "content-encoding"}
+		]
+		response_headers.append((b"content-length", str(len(response.content)).encode()))
+		if SHARD_HEADER not in response.headers:
+			response_headers.append((SHARD_HEADER.encode(), owner.encode()))
+		await send({"type": "http.response.start", "status": response.status_code, "headers": response_headers})
+		await send({"type": "http.response.body", "body": response.content})
+
+	async def _redirect_websocket(self, receive, send, owner: str) -> None:
+		message = await receive()
+		if message["type"] != "websocket.connect":
+			return
+		await send({"type": "websocket.accept"})
+		await send({"type": "websocket.send", "text": json.dumps({"type": "shard_redirect", "shard": owner})})
+		await send({"type": "websocket.close", "code": CLOSE_WRONG_SHARD, "reason": "Wrong shard"})
+
+
+shard_coordinator = ShardCoordinator()
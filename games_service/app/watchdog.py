@@ -3,41 +3,51 @@ import contextlib
 import logging
 from datetime import datetime, timezone, timedelta
 
-from sqlalchemy import select, or_
+from sqlalchemy import delete, select, or_
 
-from .database import SessionLocal
+from common import LeaderElection
+
+from .config import get_settings
+from .database import SessionLocal, async_engine
 from .models import Game, GameStatus, SideToMove
 from .realtime import game_ws_manager
 from .schemas import WsGameFinishedPayload
-from .services import GameService, GameServiceError, build_game_detail
+from .sharding import shard_coordinator
+from .services import GameService, GameServiceError, auto_cancel_overdue, run_game_command
 
 LOGGER = logging.getLogger(__name__)
 WATCHDOG_INTERVAL_SECONDS = 15
-RECENT_MOVES_LIMIT = 120
 ABANDONED_GAME_TIMEOUT_MINUTES = 10  # Delete games without second player after 10 minutes
 
 
 class TimeoutWatchdog:
-	def __init__(self) -> None:
+	def __init__(self, leader: LeaderElection) -> None:
 		self._task: asyncio.Task | None = None
+		self._leader = leader
 
 	def start(self) -> None:
 		if self._task and not self._task.done():
 			return
+		self._leader.start()
 		self._task = asyncio.create_task(self._run(), name="timeout-watchdog")
 
 	async def stop(self) -> None:
-		if not self._task:
-			return
-		self._task.cancel()
-		with contextlib.suppress(asyncio.CancelledError):
-			await self._task
-		self._task = None
+		if self._task:
+			self._task.cancel()
+			with contextlib.suppress(asyncio.CancelledError):
+				await self._task
+			self._task = None
+		await self._leader.stop()
+
+	def _should_run(self) -> bool:
+		# При шардировании партии поделены между владельцами, иначе работает только лидер
+		return shard_coordinator.enabled or self._leader.is_leader
 
 	async def _run(self) -> None:
 		while True:
 			try:
-				await self._tick()
+				if self._should_run():
+					await self._tick()
 			except asyncio.CancelledError:
 				raise
 			except Exception:  # pragma: no cover - defensive logging
@@ -53,6 +63,9 @@ class TimeoutWatchdog:
 			result = await db.execute(stmt)
 			active_games = result.scalars().all()
 			for game in active_games:
+				# При шардировании каждый процесс обслуживает только свои партии
+				if not shard_coordinator.is_owner(game.id):
+					continue
 				try:
 					white_clock, black_clock = await service._compute_effective_clocks(game)
 				except Exception:
@@ -75,8 +88,8 @@ class TimeoutWatchdog:
 					continue
 
 				try:
-					finished_game = await service.timeout(
-						game.id, loser_color=loser, requested_by=requested_by
+					detail = await run_game_command(
+						service, "timeout", game.id, loser_color=loser, requested_by=requested_by
 					)
 				except GameServiceError as exc:
 					if exc.message not in {"White clock has not expired", "Black clock has not expired"}:
@@ -85,8 +98,6 @@ class TimeoutWatchdog:
 						)
 					continue
 
-				moves = await service.get_moves(game.id, limit=RECENT_MOVES_LIMIT)
-				detail = build_game_detail(finished_game, moves=moves)
 				await game_ws_manager.broadcast(
 					game.id,
 					WsGameFinishedPayload(type="game_finished", game=detail).model_dump(mode="json"),
@@ -105,17 +116,18 @@ class TimeoutWatchdog:
 			
 			deleted_count = 0
 			for game in abandoned_games:
+				if not shard_coordinator.is_owner(game.id):
+					continue
 				try:
 					await db.delete(game)
 					deleted_count += 1
 					LOGGER.info("Deleted abandoned game %s (created at %s, missing player)", game.id, game.created_at)
-					await game_ws_manager.broadcast(
-						game.id,
-						{
-							"type": "game_cancelled",
-							"game_id": str(game.id),
-						},
-					)
+					cancelled = {
+						"type": "game_cancelled",
+						"game_id": str(game.id),
+					}
+					await game_ws_manager.broadcast(game.id, cancelled)
+					await game_ws_manager.broadcast_lobby(cancelled)
 				except Exception:
 					LOGGER.exception("Failed to delete abandoned game %s", game.id)
 			
@@ -123,6 +135,67 @@ class TimeoutWatchdog:
 				await db.commit()
 				LOGGER.info("Timeout watchdog deleted %d abandoned game(s)", deleted_count)
 
+			# 3. Paired games nobody has started yet (only the ones this process owns)
+			now = datetime.now(timezone.utc)
+			stmt = select(Game).where(
+				Game.status == GameStatus.CREATED.value,
+				Game.move_count == 0,
+				Game.white_id.is_not(None),
+				Game.black_id.is_not(None),
+			)
+			result = await db.execute(stmt)
+			unstarted = [game for game in result.scalars().all() if shard_coordinator.is_owner(game.id)]
+			no_show_cutoff = now - timedelta(seconds=get_settings().tournament_first_move_seconds)
+			no_shows = [
+				(game.id, game.white_id)
+				for game in unstarted
+				if (game.metadata_json or {}).get("tournament_id") and game.created_at < no_show_cutoff
+			]
+
+			# 3a. Auto-cancel games whose timer lives on another process
+			# (created by a non-owner, or the owner restarted): the deadline is in metadata
+			overdue_ids = [game.id for game in unstarted if auto_cancel_overdue(game, now)]
+			if overdue_ids:
+				# The rows were read earlier in this pass: delete only if still unstarted,
+				# a concurrent first move holds the row lock and fails the re-check
+				deleted_ids = (
+					await db.execute(
+						delete(Game)
+						.where(
+							Game.id.in_(overdue_ids),
+							Game.status == GameStatus.CREATED.value,
+							Game.move_count == 0,
+						)
+						.returning(Game.id)
+						.execution_options(synchronize_session=False)
+					)
+				).scalars().all()
+				await db.commit()
+				for game_id in deleted_ids:
+					cancelled = {
+						"type": "game_cancelled",
+						"game_id": str(game_id),
+					}
+					await game_ws_manager.broadcast(game_id, cancelled)
+					await game_ws_manager.broadcast_lobby(cancelled)
+				if deleted_ids:
+					LOGGER.info("Timeout watchdog auto-cancelled %d unstarted game(s)", len(deleted_ids))
+
+			# 3b. Tournament games: white did not make the first move in time and loses.
+			# The forfeit runs here, on the owner, so it goes through the game's actor
+			for game_id, white_id in no_shows:
+				try:
+					detail = await run_game_command(service, "resign", game_id, player_id=white_id)
+				except GameServiceError as exc:
+					LOGGER.warning("Tournament forfeit failed for game %s: %s", game_id, exc.message)
+					continue
+				await game_ws_manager.broadcast(
+					game_id,
+					WsGameFinishedPayload(type="game_finished", game=detail).model_dump(mode="json"),
+				)
+
 
-timeout_watchdog = TimeoutWatchdog()
+timeout_watchdog = TimeoutWatchdog(
+	LeaderElection(async_engine, "games_service:timeout-watchdog", retry_interval=WATCHDOG_INTERVAL_SECONDS)
+)
 
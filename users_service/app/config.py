@@ -3,6 +3,12 @@ from common import BaseServiceSettings, make_get_settings
 
 class Settings(BaseServiceSettings):
 	app_name: str = "Users Service"
+	users_internal_token: str | None = None
+
+	# Пакетная выдача профилей (/api/users/batch)
+	users_batch_max_ids: int = 100
+	profile_cache_ttl_seconds: float = 60.0
+	profile_cache_max_entries: int = 50_000
 
 
 get_settings = make_get_settings(Settings)
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Boolean, DateTime, Integer, String, func
+from sqlalchemy import Boolean, DateTime, Index, Integer, String, func, text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from ..database import Base
@@ -8,6 +8,11 @@ from ..database import Base
 
 class User(Base):
 	__tablename__ = "users"
+	__table_args__ = (
+		# Вход и регистрация сравнивают lower(...) — только эти индексы их и обслуживают
+		Index("uq_users_email_ci", text("lower(email)"), unique=True),
+		Index("uq_users_username_ci", text("lower(username)"), unique=True),
+	)
 
 	id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
 	username: Mapped[str] = mapped_column(String(32), unique=True, index=True, nullable=False)
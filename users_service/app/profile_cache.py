@@ -0,0 +1,114 @@
+"""
+Кэш публичных профилей для /api/users/batch.
+
+Списки партий и лобби запрашивают одних и тех же игроков снова и снова, поэтому
+профили (и отсутствие профиля) хранятся ttl_seconds. Одновременные запросы,
+которым не хватает одного и того же id, объединяются: в БД за ним идёт только
+первый, остальные ждут его результат.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Iterable
+
+from prometheus_client import Counter
+
+from .config import get_settings
+from .schemas import UserPublic
+
+PROFILE_CACHE_REQUESTS = Counter(
+	"users_profile_cache_requests_total",
+	"Lookups in the public profile cache",
+	["result"],
+)
+
+Fetcher = Callable[[list[int]], Awaitable[dict[int, UserPublic]]]
+
+# Результат загрузки, которая упала или была отменена: ждавшие её запросы загружают id сами
+_FAILED = object()
+
+
+class ProfileCache:
+	def __init__(self, *, ttl_seconds: float, max_entries: int) -> None:
+		self._ttl = ttl_seconds
+		self._max_entries = max_entries
+		self._entries: OrderedDict[int, tuple[float, UserPublic | None]] = OrderedDict()
+		self._inflight: dict[int, asyncio.Future] = {}
+
+	def __len__(self) -> int:
+		return len(self._entries)
+
+	def _lookup(self, user_id: int) -> tuple[bool, UserPublic | None]:
+		entry = self._entries.get(user_id)
+		if entry is not None and entry[0] <= time.monotonic():
+			del self._entries[user_id]
+			entry = None
+		PROFILE_CACHE_REQUESTS.labels("hit" if entry is not None else "miss").inc()
+		return (True, entry[1]) if entry is not None else (False, None)
+
+	def put(self, user_id: int, profile: UserPublic | None) -> None:
+		if self._ttl <= 0 or self._max_entries <= 0:
+			return
+		self._entries.pop(user_id, None)
+		self._entries[user_id] = (time.monotonic() + self._ttl, profile)
+		while len(self._entries) > self._max_entries:
+			self._entries.popitem(last=False)
+
+	def invalidate(self, user_id: int) -> None:
+		self._entries.pop(user_id, None)
+
+	async def get_many(self, user_ids: Iterable[int], fetch: Fetcher) -> dict[int, UserPublic]:
+		"""Профили активных пользователей по id; отсутствующие в ответе не попадают."""
+		found: dict[int, UserPublic] = {}
+		waiting: dict[int, asyncio.Future] = {}
+		missing: list[int] = []
+		for user_id in dict.fromkeys(user_ids):
+			cached, profile = self._lookup(user_id)
+			if cached:
+				if profile is not None:
+					found[user_id] = profile
+			elif user_id in self._inflight:
+				waiting[user_id] = self._inflight[user_id]
+			else:
+				missing.append(user_id)
+
+		if missing:
+			found.update(await self._load(missing, fetch))
+
+		retry: list[int] = []
+		for user_id, future in waiting.items():
+			profile = await asyncio.shield(future)
+			if profile is _FAILED:
+				retry.append(user_id)
+			elif profile is not None:
+				found[user_id] = profile
+		if retry:
+			found.update(await fetch(retry))
+		return found
+
+	async def _load(self, user_ids: list[int], fetch: Fetcher) -> dict[int, UserPublic]:
+		loop = asyncio.get_running_loop()
+		futures = {user_id: loop.create_future() for user_id in user_ids}
+		self._inflight.update(futures)
+		fetched: dict[int, UserPublic] | None = None
+		try:
+			fetched = await fetch(user_ids)
+		finally:
+			for user_id, future in futures.items():
+				if self._inflight.get(user_id) is future:
+					del self._inflight[user_id]
+				if fetched is None:
+					future.set_result(_FAILED)
+					continue
+				profile = fetched.get(user_id)
+				self.put(user_id, profile)
+				future.set_result(profile)
+		return fetched
+
+
+profile_cache = ProfileCache(
+	ttl_seconds=get_settings().profile_cache_ttl_seconds,
+	max_entries=get_settings().profile_cache_max_entries,
+)
@@ -1,20 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import any_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from ..config import get_settings
 from ..database import get_db
 from ..models import User
-from ..schemas import UserPublic
+from ..profile_cache import profile_cache
+from ..schemas import UserBatchRequest, UserPublic
+from ..security import verify_internal_token
 
 
 router = APIRouter(prefix="/api/users", tags=["users"])
 
 
-@router.get("/{user_id}", response_model=UserPublic)
-async def get_user_by_id(user_id: int, db: AsyncSession = Depends(get_db)) -> UserPublic:
-	user = await db.get(User, user_id)
-	if not user or not user.is_active:
-		raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-
+def _to_public(user: User) -> UserPublic:
 	return UserPublic(
 		id=user.id,
 		username=user.username,
@@ -22,3 +23,56 @@ async def get_user_by_id(user_id: int, db: AsyncSession = Depends(get_db)) -> Us
 		created_at=user.created_at,
 		updated_at=user.updated_at,
 	)
+
+
+def _parse_ids(raw: str) -> list[int]:
+	try:
+		return [int(part) for part in raw.split(",") if part.strip()]
+	except ValueError:
+		raise HTTPException(
+			status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+			detail="ids must be a comma-separated list of integers",
+		)
+
+
+async def _resolve_batch(user_ids: list[int], db: AsyncSession) -> List[UserPublic]:
+	limit = get_settings().users_batch_max_ids
+	if len(set(user_ids)) > limit:
+		raise HTTPException(
+			status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+			detail=f"At most {limit} ids per request",
+		)
+
+	async def fetch(missing: list[int]) -> dict[int, UserPublic]:
+		# Один запрос на все недостающие id вместо запроса на каждого
+		rows = await db.scalars(select(User).where(User.id == any_(missing), User.is_active.is_(True)))
+		return {user.id: _to_public(user) for user in rows}
+
+	found = await profile_cache.get_many(user_ids, fetch)
+	return [found[user_id] for user_id in dict.fromkeys(user_ids) if user_id in found]
+
+
+@router.get("/batch", response_model=List[UserPublic])
+async def get_users_batch(
+	ids: str = Query(..., description="Comma-separated user ids"),
+	db: AsyncSession = Depends(get_db),
+) -> List[UserPublic]:
+	return await _resolve_batch(_parse_ids(ids), db)
+
+
+@router.post("/internal/batch", response_model=List[UserPublic])
+async def get_users_batch_internal(
+	payload: UserBatchRequest,
+	_: None = Depends(verify_internal_token),
+	db: AsyncSession = Depends(get_db),
+) -> List[UserPublic]:
+	return await _resolve_batch(payload.ids, db)
+
+
+@router.get("/{user_id}", response_model=UserPublic)
+async def get_user_by_id(user_id: int, db: AsyncSession = Depends(get_db)) -> UserPublic:
+	user = await db.get(User, user_id)
+	if not user or not user.is_active:
+		raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+	return _to_public(user)
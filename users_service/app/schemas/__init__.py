@@ -1,5 +1,5 @@
-from .user import UserPublic
+from .user import UserBatchRequest, UserPublic
 
-__all__ = ["UserPublic"]
+__all__ = ["UserBatchRequest", "UserPublic"]
 
 
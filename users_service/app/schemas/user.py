@@ -1,7 +1,7 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
-from pydantic import BaseModel, HttpUrl
+from pydantic import BaseModel, Field, HttpUrl
 
 
 class UserPublic(BaseModel):
@@ -18,4 +18,5 @@ class UserPublic(BaseModel):
 	model_config = {"from_attributes": True}
 
 
-
+class UserBatchRequest(BaseModel):
+	ids: List[int] = Field(default_factory=list)